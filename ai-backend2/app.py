@@ -3,17 +3,41 @@ NeuroDesk LLM Wrapper API
 Main Flask application for ticket assignment workflow - Step 1
 """
 from dotenv import load_dotenv
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify, stream_with_context
 from flask_cors import CORS
 from langchain_google_genai import ChatGoogleGenerativeAI
+import asyncio
+import hmac
 import logging
 import os
+import threading
+import time
+from urllib.parse import urlsplit
+from pydantic import ValidationError
 from models.ticket import Ticket
-from models.skill import Skill
-from models.technician import Technician
-from services.skill_extraction import extract_skills_from_ticket as extract_skills_from_ticket_single
-from services.technician_selection import select_best_technician_for_ticket
+from services.assignment_pipeline import (
+    AssignmentError,
+    PipelineSettings,
+    iter_ticket_assignment_events,
+    prepare_ticket_assignment,
+    run_ticket_assignment,
+)
+from services.assignment_reservations import AssignmentReservations
+from services.backend_client import get_backend_client
+from services.batch_assignment import BatchSettings, iter_batch_assignments
+from services.bulk_evaluation import BulkEvaluationSettings, iter_bulk_evaluations
+from services.catalog_cache import build_catalog_cache
+from services import deadline
+from services.extraction_cache import SkillExtractionCache
+from services.job_queue import Job, JobQueue, JobWorkerPool, PermanentJobError, payload_idempotency_key
+from services.llm_circuit import STATE_CODES as LLM_CIRCUIT_STATE_CODES, CircuitBreaker
+from services.llm_hedging import HedgePolicy
+from services.llm_scheduler import LLMScheduler, ScheduledLLM
+from services import metrics
+from services.prompts import registry as prompt_registry
 from services.evaluation_service import EvaluationService
+from services.sentiment_scorer import LexiconSentimentScorer
+from services.technician_state import TechnicianStateStore
 import requests
 import json
 
@@ -32,18 +56,329 @@ CORS(app, resources={
     r"/*": {
         "origins": "*",
         "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-        "allow_headers": ["Content-Type", "Authorization", "X-Requested-With"]
+        "allow_headers": ["Content-Type", "Authorization", "X-Requested-With", deadline.DEADLINE_HEADER]
     }
 })
 
 # Initialize Gemini model
-llm = ChatGoogleGenerativeAI(
+gemini = ChatGoogleGenerativeAI(
     model=os.environ.get("GOOGLE_MODEL", "gemini-2.5-flash"),
     temperature=float(os.environ.get("GOOGLE_TEMPERATURE", 0.1)),
-    google_api_key=os.environ.get("GOOGLE_API_KEY") # type: ignore
+    google_api_key=os.environ.get("GOOGLE_API_KEY"), # type: ignore
+    transport=os.environ.get("GOOGLE_TRANSPORT") or None
 )
+
+# Optional faster model that hedged calls are duplicated to
+fallback_gemini = ChatGoogleGenerativeAI(
+    model=os.environ["GOOGLE_FALLBACK_MODEL"],
+    temperature=float(os.environ.get("GOOGLE_TEMPERATURE", 0.1)),
+    google_api_key=os.environ.get("GOOGLE_API_KEY"), # type: ignore
+    transport=os.environ.get("GOOGLE_TRANSPORT") or None
+) if os.environ.get("GOOGLE_FALLBACK_MODEL") else None
+
+# Every LLM call goes through one scheduler (rate limits, concurrency, priority lanes);
+# batch and evaluation work runs in the background lane. While the provider fails or
+# breaches its latency SLO, the circuit breaker refuses calls and callers use their
+# local fallbacks (keyword skill matching, rule scoring, templated justifications).
+# Interactive calls slower than the observed p90 are hedged with a duplicate request.
+llm_scheduler = LLMScheduler.from_env(os.environ)
+llm_breaker = CircuitBreaker.from_env(os.environ) if os.environ.get("LLM_CIRCUIT_ENABLED", "true").lower() == "true" else None
+llm_hedging = HedgePolicy.from_env(os.environ) if os.environ.get("LLM_HEDGE_ENABLED", "true").lower() == "true" else None
+llm = ScheduledLLM(
+    gemini,
+    llm_scheduler,
+    expected_output_tokens=int(os.environ.get("LLM_EXPECTED_OUTPUT_TOKENS", 256)),
+    breaker=llm_breaker,
+    hedging=llm_hedging,
+    fallback_llm=fallback_gemini
+)
+background_llm = llm.with_lane("background")
 backend_url = os.environ.get("BACKEND_SERVER_URL")
 
+# Pooled client shared by every backend call, and the cache of validated catalogs
+backend_client = get_backend_client()
+catalog_cache = build_catalog_cache(backend_client, os.environ)
+
+# Technicians are read from a live state store fed by change events and delta pulls
+# instead of refetching the whole roster when the cache TTL expires
+technician_state = None
+if os.environ.get("TECHNICIAN_STATE_ENABLED", "true").lower() == "true":
+    technician_state = TechnicianStateStore.from_env(
+        backend_client,
+        os.environ,
+        skill_names=lambda: {skill.id: skill.name for skill in catalog_cache.get("skills").value.skills if skill.id is not None}
+    )
+    catalog_cache.attach("technicians", technician_state)
+technician_events_token = os.environ.get("TECHNICIAN_EVENTS_TOKEN")
+
+# Response cache in front of the skill-extraction LLM call
+extraction_cache = SkillExtractionCache.from_env(os.environ)
+pipeline_settings = PipelineSettings.from_env(os.environ)
+
+# Workload held for technicians picked by in-flight assignments until the backend records them
+# (in memory, so per worker process under gunicorn; see gunicorn.conf.py)
+assignment_reservations = AssignmentReservations.from_env(os.environ)
+batch_settings = BatchSettings.from_env(os.environ)
+
+# Reused across requests so its worker pool is shared
+evaluation_service = EvaluationService(
+    llm=background_llm,
+    technician_api_url=backend_url,
+    backend_client=backend_client,
+    llm_timeout=float(os.environ.get("EVALUATION_LLM_TIMEOUT", 30)),
+    max_workers=int(os.environ.get("EVALUATION_MAX_WORKERS", 8)),
+    sentiment_scorer=LexiconSentimentScorer() if os.environ.get("SENTIMENT_LOCAL_ENABLED", "true").lower() == "true" else None,
+    local_sentiment_min_confidence=float(os.environ.get("SENTIMENT_LOCAL_MIN_CONFIDENCE", 0.75)),
+    local_sentiment_max_words=int(os.environ.get("SENTIMENT_LOCAL_MAX_WORDS", 40)),
+    # Newly computed skill scores reach assignments without waiting for a backend sync
+    on_skills_updated=technician_state.apply_skill_updates if technician_state is not None else None
+)
+bulk_evaluation_settings = BulkEvaluationSettings.from_env(os.environ)
+
+
+# =====================
+# BACKGROUND JOBS
+# =====================
+
+def _run_assignment_job(payload):
+    try:
+        ticket = Ticket.model_validate(payload["ticket"])
+        with deadline.deadline_scope(pipeline_settings.deadline or None):
+            return asyncio.run(run_ticket_assignment(
+                ticket=ticket,
+                llm=llm,
+                catalog_cache=catalog_cache,
+                extraction_cache=extraction_cache,
+                settings=pipeline_settings,
+                reservations=assignment_reservations
+            ))
+    except ValidationError as e:
+        raise PermanentJobError(f"Invalid ticket: {e}") from e
+    except AssignmentError as e:
+        if e.status_code < 500:
+            raise PermanentJobError(e.message) from e
+        raise
+
+
+def _run_evaluation_job(payload):
+    ticket_data = payload["ticket"]
+    technician_id = ticket_data.get("assigned_technician_id") or ticket_data.get("assignedTechnicianId")
+    if not technician_id:
+        raise PermanentJobError("No technician assigned to this ticket")
+    return evaluation_service.evaluate_ticket(ticket_data, technician_id)
+
+
+# Hosts job results may be POSTed to: the backend's, plus JOB_CALLBACK_ALLOWED_HOSTS
+job_callback_hosts = {
+    host.strip().lower() for host in os.environ.get("JOB_CALLBACK_ALLOWED_HOSTS", "").split(",") if host.strip()
+}
+if backend_url and urlsplit(backend_url).hostname:
+    job_callback_hosts.add(urlsplit(backend_url).hostname.lower())
+
+
+def _callback_url_error(callback_url):
+    """Why a client-supplied callback URL is refused, or None when results may be POSTed to it"""
+    if not isinstance(callback_url, str):
+        return "'callback_url' must be a string"
+    parts = urlsplit(callback_url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        return "'callback_url' must be an absolute http(s) URL"
+    if parts.hostname.lower() not in job_callback_hosts:
+        return f"Callback host not allowed: {parts.hostname}"
+    return None
+
+
+def _post_job_callback(job: Job):
+    # Checked again for jobs queued before the allowlist changed
+    error = _callback_url_error(job.callback_url)
+    if error is not None:
+        raise ValueError(error)
+    response = backend_client.session.post(job.callback_url, json=job.public(), timeout=10, allow_redirects=False)
+    response.raise_for_status()
+
+
+# Persistent queue behind the submit/poll mode, drained by a pool of worker threads
+job_queue = JobQueue.from_env(os.environ)
+job_workers = JobWorkerPool(
+    queue=job_queue,
+    handlers={
+        "ticket_assignment": _run_assignment_job,
+        "technician_evaluation": _run_evaluation_job
+    },
+    concurrency=int(os.environ.get("JOB_WORKERS", 4)),
+    poll_interval=float(os.environ.get("JOB_POLL_INTERVAL", 0.5)),
+    retry_backoff=float(os.environ.get("JOB_RETRY_BACKOFF", 2)),
+    callback=_post_job_callback
+)
+
+
+# =====================
+# LIFECYCLE
+# =====================
+
+# Set once the process starts shutting down; readiness fails from then on
+draining = threading.Event()
+
+
+def warm_up():
+    """
+    Load the catalogs ahead of the first request. Under gunicorn this runs in the master
+    before workers are forked, so every worker starts with them (see gunicorn.conf.py).
+    """
+    for name in ("skills", "technicians"):
+        try:
+            with metrics.timed(f"warm_up.{name}"):
+                catalog_cache.get(name)
+        except Exception as e:
+            logger.warning(f"Could not preload the {name} catalog, it loads on first use: {e}")
+    # Forked workers must not share the connections opened while warming up
+    backend_client.session.close()
+
+
+def start_background_workers():
+    """Start the job workers and the technician state sync (once per process, after any fork)"""
+    if os.environ.get("JOB_WORKERS_ENABLED", "true").lower() == "true":
+        job_workers.start()
+    if technician_state is not None:
+        technician_state.start()
+
+
+def drain(timeout: float) -> bool:
+    """
+    Stop background work and wait for in-flight LLM calls (jobs, evaluations, requests
+    still finishing) for up to `timeout` seconds. Returns whether everything finished.
+    """
+    draining.set()
+    stop_by = time.monotonic() + timeout
+    logger.info(f"Draining: stopping background work and waiting up to {timeout:.0f}s for LLM calls")
+    job_workers.stop(max(stop_by - time.monotonic(), 0))
+    if technician_state is not None:
+        technician_state.stop(max(stop_by - time.monotonic(), 0))
+    evaluation_service.shutdown(wait=False)
+    drained = llm_scheduler.drain(max(stop_by - time.monotonic(), 0))
+    if not drained:
+        logger.warning(f"Drain timed out with LLM calls still running: {llm_scheduler.stats()['in_flight']} in flight")
+    return drained
+
+
+# =====================
+# METRICS
+# =====================
+
+def _collect_service_metrics():
+    """Cache, routing, scheduler and queue stats exported on each /metrics scrape"""
+    extraction = extraction_cache.stats()
+    for tier in ("exact_hits", "similar_hits", "misses", "evictions"):
+        yield ("neurodesk_extraction_cache_events_total", "counter", "Skill extraction cache lookups and evictions",
+               {"event": tier}, extraction[tier])
+    yield ("neurodesk_extraction_cache_hit_ratio", "gauge", "Skill extraction cache hit ratio", {}, extraction["hit_rate"])
+
+    for name, status in catalog_cache.status().items():
+        for event in ("hits", "stale_hits", "misses", "not_modified"):
+            if event in status:
+                yield ("neurodesk_catalog_cache_events_total", "counter", "Catalog cache lookups by outcome",
+                       {"catalog": name, "event": event}, status[event])
+
+    routing = evaluation_service.sentiment_routing_stats()
+    for route in ("local", "llm", "no_feedback"):
+        yield ("neurodesk_sentiment_routing_total", "counter", "Feedback sentiment scoring by route",
+               {"route": route}, routing[route])
+
+    scheduler = llm_scheduler.stats()
+    for lane, lane_stats in scheduler["lanes"].items():
+        yield ("neurodesk_llm_queue_depth", "gauge", "LLM calls waiting for admission", {"lane": lane}, lane_stats["queued"])
+        yield ("neurodesk_llm_in_flight", "gauge", "LLM calls in flight", {"lane": lane}, lane_stats["in_flight"])
+        yield ("neurodesk_llm_queue_timeouts_total", "counter", "LLM calls that timed out waiting for admission",
+               {"lane": lane}, lane_stats["timeouts"])
+
+    if llm_breaker is not None:
+        breaker = llm_breaker.status()
+        yield ("neurodesk_llm_circuit_state", "gauge", "LLM circuit breaker state (0 closed, 1 half-open, 2 open)",
+               {}, LLM_CIRCUIT_STATE_CODES[breaker["state"]])
+        for event in ("opened", "closed", "rejected"):
+            yield ("neurodesk_llm_circuit_events_total", "counter", "LLM circuit breaker transitions and refused calls",
+                   {"event": event}, breaker[event])
+
+    for status, count in job_queue.stats().items():
+        yield ("neurodesk_jobs", "gauge", "Queued jobs by status", {"status": status}, count)
+
+    reservations = assignment_reservations.status()
+    yield ("neurodesk_assignment_reservations_active", "gauge", "Technician reservations of in-flight assignments",
+           {}, reservations["active"])
+    for event in ("reserved", "reconciled", "expired", "released"):
+        yield ("neurodesk_assignment_reservations_total", "counter", "Assignment reservations by outcome",
+               {"event": event}, reservations[event])
+
+    if technician_state is not None:
+        state = technician_state.status()
+        yield ("neurodesk_technician_state_technicians", "gauge", "Technicians held in the technician state store",
+               {}, state["technicians"])
+        for event in ("events_applied", "events_stale", "events_unknown", "skill_updates_applied",
+                      "delta_pulls", "full_syncs", "sync_errors"):
+            yield ("neurodesk_technician_state_events_total", "counter", "Technician state store updates by kind",
+                   {"event": event}, state[event])
+
+
+metrics.registry.add_collector(_collect_service_metrics)
+timing_header_always = os.environ.get("METRICS_TIMING_HEADER", "false").lower() == "true"
+
+
+@app.before_request
+def _start_request_timing():
+    g.request_started = time.perf_counter()
+    g.stage_timings = metrics.start_request_timings()
+
+
+@app.after_request
+def _record_request_metrics(response):
+    started = g.pop("request_started", None)
+    if started is None:
+        return response
+    elapsed = time.perf_counter() - started
+    endpoint = request.url_rule.rule if request.url_rule is not None else "unmatched"
+    metrics.HTTP_REQUESTS.inc(endpoint=endpoint, method=request.method, status=str(response.status_code))
+    metrics.HTTP_SECONDS.observe(elapsed, endpoint=endpoint)
+
+    # Per-request stage breakdown, on demand (X-Debug-Timing: 1) or always when configured
+    if timing_header_always or request.headers.get("X-Debug-Timing") == "1":
+        response.headers["Server-Timing"] = metrics.server_timing_header(g.get("stage_timings", []), elapsed)
+    metrics.stop_request_timings()
+    return response
+
+
+def _request_deadline():
+    """Budget from the caller's deadline header, else the configured assignment deadline"""
+    return deadline.from_headers(request.headers, pipeline_settings.deadline or None)
+
+
+def _wants_async(request_data):
+    """Clients opt into submit/poll with `"async": true` or a `Prefer: respond-async` header"""
+    return request_data.get("async") is True or "respond-async" in request.headers.get("Prefer", "")
+
+
+def _enqueue_job(kind, payload, ticket_id, request_data):
+    """
+    Queue a job and answer 202. Resubmitting a ticket with the same payload returns the existing
+    job unless an Idempotency-Key header gives the key; a changed payload queues a new job.
+    """
+    callback_url = request_data.get("callback_url")
+    if callback_url is not None:
+        error = _callback_url_error(callback_url)
+        if error is not None:
+            return jsonify({"error": error}), 400
+
+    idempotency_key = request.headers.get("Idempotency-Key") or (
+        payload_idempotency_key(kind, ticket_id, payload) if ticket_id is not None else None
+    )
+    job, created = job_queue.submit(kind, payload, idempotency_key, callback_url=callback_url)
+    if created:
+        job_workers.notify()
+
+    response = jsonify({**job.public(), "duplicate": not created, "status_url": f"/api/jobs/{job.id}"})
+    response.headers["Location"] = f"/api/jobs/{job.id}"
+    return response, 202
+
+
 @app.route("/", methods=["GET"])
 def home():
     """Home endpoint with API information"""
@@ -53,33 +388,155 @@ def home():
         "status": "active",
         "endpoints": {
             "health": "/health",
+            "health_live": "/health/live",
+            "health_ready": "/health/ready",
             "ticket_assignment": "/api/ticket-assignment",
-            "service_status": "/api/service-status"
+            "ticket_assignment_stream": "/api/ticket-assignment/stream",
+            "ticket_assignment_batch": "/api/ticket-assignment/batch",
+            "evaluate_technician": "/api/evaluate-technician",
+            "evaluate_technician_bulk": "/api/evaluate-technician/bulk",
+            "job_status": "/api/jobs/<job_id>",
+            "metrics": "/metrics",
+            "service_status": "/api/service-status",
+            "cache_invalidate": "/api/cache/invalidate",
+            "technician_updated_event": "/api/events/technician-updated"
         },
         "required_request_fields": ["ticket", "skills"]
     })
 
+@app.route("/health/live", methods=["GET"])
+def liveness_check():
+    """Liveness: the process serves requests (no dependency checks, so a backend outage does not restart it)"""
+    return jsonify({"status": "alive", "service": "NeuroDesk LLM Wrapper"})
+
 @app.route("/health", methods=["GET"])
-def health_check():
-    """Health check endpoint"""
+@app.route("/health/ready", methods=["GET"])
+def readiness_check():
+    """
+    Readiness: the process should receive traffic. Requires the skills and technicians
+    catalogs (loaded, or loadable now) and no shutdown in progress. An open LLM circuit
+    does not fail readiness since assignments then use their local fallbacks.
+    """
+    checks = {"accepting_requests": not draining.is_set()}
+    for name in ("skills", "technicians"):
+        try:
+            catalog_cache.get(name)
+            checks[f"{name}_catalog"] = True
+        except Exception as e:
+            logger.warning(f"Readiness: {name} catalog unavailable: {e}")
+            checks[f"{name}_catalog"] = False
+    ready = all(checks.values())
     return jsonify({
-        "status": "healthy",
+        "status": "ready" if ready else "not_ready",
+        "checks": checks,
         "llm_available": os.environ.get("GOOGLE_API_KEY") is not None,
+        "llm_circuit": llm_breaker.state if llm_breaker is not None else None,
         "service": "NeuroDesk LLM Wrapper"
+    }), 200 if ready else 503
+
+@app.route("/api/service-status", methods=["GET"])
+def service_status():
+    """Service status endpoint with catalog cache statistics"""
+    return jsonify({
+        "service": "NeuroDesk LLM Wrapper",
+        "catalog_cache": catalog_cache.status(),
+        "extraction_cache": extraction_cache.stats(),
+        "sentiment_routing": evaluation_service.sentiment_routing_stats(),
+        "job_queue": {**job_queue.stats(), "workers": job_workers.concurrency, "workers_running": job_workers.running},
+        "llm_scheduler": llm_scheduler.stats(),
+        "llm_circuit": llm_breaker.status() if llm_breaker is not None else None,
+        "llm_hedging": llm_hedging.status() if llm_hedging is not None else None,
+        "assignment_reservations": assignment_reservations.status(),
+        "prompt_versions": prompt_registry.versions()
     })
 
+@app.route("/metrics", methods=["GET"])
+def prometheus_metrics():
+    """Prometheus text-format metrics (stage latency histograms, LLM tokens, cache and queue stats)"""
+    return Response(metrics.registry.render(), mimetype="text/plain; version=0.0.4")
+
+@app.route("/api/jobs/<job_id>", methods=["GET"])
+def get_job(job_id):
+    """Status and, once finished, result or error of a queued assignment/evaluation job"""
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({"error": f"Unknown job: {job_id}"}), 404
+    return jsonify(job.public()), 200
+
+@app.route("/api/cache/invalidate", methods=["POST"])
+def invalidate_cache():
+    """
+    Invalidate cached catalogs so the next request refetches them from the backend.
+    Body (optional): {"resources": ["skills", "technicians"]}; omit to invalidate everything.
+    """
+    request_data = request.get_json(silent=True) or {}
+    resources = request_data.get("resources")
+
+    try:
+        if resources:
+            invalidated = [name for resource in resources for name in catalog_cache.invalidate(resource)]
+        else:
+            invalidated = catalog_cache.invalidate()
+    except KeyError as e:
+        return jsonify({"error": str(e)}), 400
+
+    return jsonify({"invalidated": invalidated}), 200
+
+@app.route("/api/events/technician-updated", methods=["POST"])
+def technician_updated_event():
+    """
+    Change events from the backend, applied to the technician state store.
+    Body: {"technician": {...}} or {"technicians": [...]} (full records, or partial ones
+    with at least an "id"), and/or {"deleted_ids": [...]}. Records carrying an older
+    "updatedAt" than the state already held are ignored.
+    """
+    if technician_state is None:
+        return jsonify({"error": "Technician state store is disabled"}), 404
+    if not technician_events_token:
+        # Fail closed: without a shared secret anyone could rewrite technician state
+        return jsonify({"error": "Technician events are disabled (TECHNICIAN_EVENTS_TOKEN is not set)"}), 403
+    token = request.headers.get("X-Event-Token", "")
+    if not hmac.compare_digest(token.encode("utf-8"), technician_events_token.encode("utf-8")):
+        return jsonify({"error": "Invalid event token"}), 401
+
+    request_data = request.get_json(silent=True)
+    if not isinstance(request_data, dict):
+        return jsonify({"error": "Request body must be a JSON object"}), 400
+
+    records = request_data.get("technicians") or []
+    if request_data.get("technician"):
+        records = [*records, request_data["technician"]]
+    deleted_ids = request_data.get("deleted_ids") or []
+    if not isinstance(records, list) or not isinstance(deleted_ids, list) or not (records or deleted_ids):
+        return jsonify({"error": "Expected 'technician', 'technicians' or 'deleted_ids'"}), 400
+
+    try:
+        applied = technician_state.apply_updates(records, deleted_ids)
+    except requests.exceptions.RequestException as e:
+        # The store bootstraps on first use; the event is covered by that full listing once it succeeds
+        logger.error(f"Technician state bootstrap failed: {str(e)}")
+        return jsonify({"error": f"Failed to communicate with backend: {str(e)}"}), 503
+
+    return jsonify({"received": len(records) + len(deleted_ids), "applied": applied}), 200
+
+# Flask runs async views on the WSGI thread that took the request, in an event loop of their
+# own: the pipeline overlaps the LLM and backend calls of one ticket, but tickets in flight
+# per process stay bounded by the server's threads (GUNICORN_THREADS per worker)
 @app.route("/api/ticket-assignment", methods=["POST"])
-def ticket_assignment():
+async def ticket_assignment():
     """
     Handles incoming ticket assignment requests.
     Steps:
     1. Validate input JSON
-    2. Fetch available skills from backend
-    3. Extract required skills using LLM
-    4. Select best technician using LLM
-    5. Return structured response
+    2. Get available skills from the catalog cache
+    3. Extract required skills using LLM (technicians catalog loads concurrently)
+    4. Shortlist the top-K technicians locally
+    5. Select best technician from the shortlist
+    6. Return structured response
+    With `"async": true` (or a `Prefer: respond-async` header) the ticket is queued
+    instead and 202 is returned with a job id to poll at /api/jobs/<job_id>.
     """
-    print("Received ticket assignment request")
+    logger.info("Received ticket assignment request")
 
     try:
         if not request.is_json:
@@ -93,73 +550,123 @@ def ticket_assignment():
         if not raw_ticket:
             return jsonify({"error": "Missing 'ticket' field in request"}), 400
 
-        ticket = Ticket.model_validate(raw_ticket)
-
-        # ✅ Step 2: Fetch skills from backend
-        backend_url = os.environ.get("BACKEND_SERVER_URL")
-        skills_url = f"{backend_url}/api/v1/skills/all"
-
-        skills_response = requests.get(skills_url, timeout=10)
-        skills_response.raise_for_status()
-        skills_data = skills_response.json().get("data", {}).get("skills", [])
-
-        if not skills_data:
-            return jsonify({"error": "Failed to fetch skills from backend"}), 500
-
-        available_skills = [s.get("name") for s in skills_data if "name" in s]
-
-        # ✅ Step 3: Extract skills using your single-function version
-        skill_extraction_result = extract_skills_from_ticket_single(
-            ticket=ticket,
-            available_skills=available_skills,
-            llm=llm
-        )
-
-        existing_skills = skill_extraction_result.existing_skills
-        new_skills = [ns.dict() for ns in skill_extraction_result.new_skills]
-
-        print(json.dumps(existing_skills), json.dumps(new_skills))
-        # ✅ Step 4: Fetch technicians
-        technicians_url = f"{backend_url}/api/v1/technicians/all"
-        technicians_response = requests.get(technicians_url, timeout=10)
-        technicians_response.raise_for_status()
-        technicians_data = technicians_response.json().get("data", {}).get("technicians", [])
-
-        if not technicians_data:
-            return jsonify({"error": "Failed to fetch technicians from backend"}), 500
-        
-        print("Technicians data:", json.dumps(technicians_data))
-        available_technicians = [Technician.model_validate(t) for t in technicians_data]
-
-        # ✅ Step 5: Select best technician
-        selected_technician, justification = select_best_technician_for_ticket(
-            ticket=ticket,
-            available_technicians=available_technicians,
-            required_skills=[Skill(id=None, name=s, category=None, description=None) for s in existing_skills],
-            llm=llm
-        )
-
-        if not selected_technician:
-            return jsonify({"error": "No suitable technician found"}), 404
-
-        # ✅ Step 6: Build and return response
-        response = {
-            "ticket_subject": ticket.subject,
-            "existing_skills": existing_skills,
-            "new_skills": new_skills,
-            "assigned_technician_id": selected_technician.id,
-            "selected_technician_id": selected_technician.id,  # Alternative field name
-            "technician_name": selected_technician.name,
-            "justification": justification
-        }
+        with metrics.timed("validation"):
+            ticket = Ticket.model_validate(raw_ticket)
+
+        # Submit/poll mode: queue the assignment and return a job id
+        if _wants_async(request_data):
+            return _enqueue_job("ticket_assignment", {"ticket": raw_ticket}, ticket.id, request_data)
+
+        # ✅ Steps 2-5: Run the async assignment pipeline within the request's deadline
+        with deadline.deadline_scope(_request_deadline()):
+            response = await run_ticket_assignment(
+                ticket=ticket,
+                llm=llm,
+                catalog_cache=catalog_cache,
+                extraction_cache=extraction_cache,
+                settings=pipeline_settings,
+                reservations=assignment_reservations
+            )
 
         return jsonify(response), 200
 
+    except AssignmentError as e:
+        return jsonify({"error": e.message}), e.status_code
     except Exception as e:
         logger.error(f"Error in ticket assignment: {str(e)}", exc_info=True)
         return jsonify({"error": str(e)}), 500
 
 
+@app.route("/api/ticket-assignment/stream", methods=["POST"])
+async def ticket_assignment_stream():
+    """
+    Streaming variant of /api/ticket-assignment for the justification modal.
+    Emits a `technician` event as soon as the technician is chosen, then `justification`
+    events carrying the justification as the LLM writes it, then a `summary` event with
+    the full assignment response (or an `error` event). Events are NDJSON lines, or
+    Server-Sent Events when the client sends `Accept: text/event-stream`.
+    """
+    if not request.is_json:
+        return jsonify({"error": "Content-Type must be application/json"}), 400
+
+    raw_ticket = (request.get_json() or {}).get("ticket")
+    if not raw_ticket:
+        return jsonify({"error": "Missing 'ticket' field in request"}), 400
+
+    try:
+        with metrics.timed("validation"):
+            ticket = Ticket.model_validate(raw_ticket)
+        # Everything up to the selection runs before the response starts, so its
+        # failures still get a proper status code
+        with deadline.deadline_scope(_request_deadline()):
+            prepared = await prepare_ticket_assignment(
+                ticket=ticket,
+                llm=llm,
+                catalog_cache=catalog_cache,
+                extraction_cache=extraction_cache,
+                settings=pipeline_settings
+            )
+    except ValidationError as e:
+        return jsonify({"error": f"Invalid ticket: {e}"}), 400
+    except AssignmentError as e:
+        return jsonify({"error": e.message}), e.status_code
+    except Exception as e:
+        logger.error(f"Error in streaming ticket assignment: {str(e)}", exc_info=True)
+        return jsonify({"error": str(e)}), 500
+
+    server_sent_events = "text/event-stream" in request.headers.get("Accept", "")
+
+    def generate():
+        for event in iter_ticket_assignment_events(prepared, llm, reservations=assignment_reservations):
+            if server_sent_events:
+                yield f"event: {event['event']}\ndata: {json.dumps(event)}\n\n"
+            else:
+                yield json.dumps(event) + "\n"
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream" if server_sent_events else "application/x-ndjson",
+        # Keep proxies from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.route("/api/ticket-assignment/batch", methods=["POST"])
+def ticket_assignment_batch():
+    """
+    Assign many tickets in one request.
+    Body: {"tickets": [...]}. Results are streamed back as NDJSON, one line per ticket
+    in completion order (each carrying its `index` in the request), then a summary line.
+    """
+    if not request.is_json:
+        return jsonify({"error": "Content-Type must be application/json"}), 400
+
+    raw_tickets = (request.get_json() or {}).get("tickets")
+    if not isinstance(raw_tickets, list) or not raw_tickets:
+        return jsonify({"error": "Missing 'tickets' list in request"}), 400
+    if len(raw_tickets) > batch_settings.max_tickets:
+        return jsonify({"error": f"At most {batch_settings.max_tickets} tickets per batch"}), 400
+
+    logger.info(f"Received batch ticket assignment request for {len(raw_tickets)} tickets")
+
+    def generate():
+        try:
+            for result in iter_batch_assignments(
+                raw_tickets=raw_tickets,
+                llm=background_llm,
+                catalog_cache=catalog_cache,
+                extraction_cache=extraction_cache,
+                settings=batch_settings,
+                reservations=assignment_reservations
+            ):
+                yield json.dumps(result) + "\n"
+        except Exception as e:
+            logger.error(f"Error in batch ticket assignment: {str(e)}", exc_info=True)
+            yield json.dumps({"error": str(e)}) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+
 @app.route("/api/evaluate-technician", methods=["POST"])
 def evaluate_technician():
     """
@@ -169,6 +676,8 @@ def evaluate_technician():
     2. Calculate metrics (resolution time, SLA adherence, skill performance, sentiment)
     3. Update technician skills based on performance
     4. Return evaluation results
+    With `"async": true` (or a `Prefer: respond-async` header) the evaluation is queued
+    instead and 202 is returned with a job id to poll at /api/jobs/<job_id>.
     """
     logger.info("Received technician evaluation request")
 
@@ -188,48 +697,12 @@ def evaluate_technician():
         if not technician_id:
             return jsonify({"error": "No technician assigned to this ticket"}), 400
 
-        # ✅ Step 2: Initialize evaluation service
-        evaluation_service = EvaluationService(llm=llm, technician_api_url=backend_url)
-
-        # ✅ Step 3: Calculate metrics
-        metrics = evaluation_service.calculate_metrics(ticket_data)
-
-        # ✅ Step 4: Fetch current technician skills
-        technician_url = f"{backend_url}/api/v1/technicians/{technician_id}"
-        tech_response = requests.get(technician_url, timeout=10)
-        tech_response.raise_for_status()
-        technician_data = tech_response.json().get("data", {}).get("technician", {})
-
-        current_skills = technician_data.get("technician_skills", [])
-
-        # ✅ Step 5: Update skills based on performance
-        skill_updates = evaluation_service.update_technician_skills(
-            technician_id=technician_id,
-            current_skills=current_skills,
-            ticket_metrics=metrics
-        )
-
-        # ✅ Step 6: Build response
-        response = {
-            "ticket_id": ticket_data.get("id"),
-            "technician_id": technician_id,
-            "evaluation": {
-                "resolution_time_minutes": metrics.resolution_time,
-                "sla_adherence": metrics.sla_adherence,
-                "feedback_sentiment": {
-                    "score": metrics.feedback_sentiment.score,
-                    "reasoning": metrics.feedback_sentiment.reasoning
-                },
-                "skill_performance": {
-                    skill_id: {
-                        "score": metric.score,
-                        "reasoning": metric.reasoning
-                    }
-                    for skill_id, metric in metrics.skill_metrics.items()
-                }
-            },
-            "skill_updates": skill_updates
-        }
+        # Submit/poll mode: queue the evaluation and return a job id
+        if _wants_async(request_data):
+            return _enqueue_job("technician_evaluation", {"ticket": ticket_data}, ticket_data.get("id"), request_data)
+
+        # ✅ Steps 2-4: Calculate metrics, fetch current skills and update them
+        response = evaluation_service.evaluate_ticket(ticket_data, technician_id)
 
         logger.info(f"Evaluation completed for technician {technician_id}")
         return jsonify(response), 200
@@ -242,11 +715,47 @@ def evaluate_technician():
         return jsonify({"error": str(e)}), 500
 
 
+@app.route("/api/evaluate-technician/bulk", methods=["POST"])
+def evaluate_technician_bulk():
+    """
+    Re-score technicians from many resolved tickets in one request.
+    Body: NDJSON, one resolved ticket per line (`{"ticket": {...}}` or the bare ticket).
+    Results are streamed back as NDJSON, one consolidated skill update per technician,
+    then a summary line.
+    """
+    lines = [line for line in request.get_data().splitlines() if line.strip()]
+    if not lines:
+        return jsonify({"error": "Request body must contain NDJSON tickets, one per line"}), 400
+    if len(lines) > bulk_evaluation_settings.max_tickets:
+        return jsonify({"error": f"At most {bulk_evaluation_settings.max_tickets} tickets per request"}), 400
+
+    logger.info(f"Received bulk technician evaluation request for {len(lines)} tickets")
+
+    def generate():
+        try:
+            for result in iter_bulk_evaluations(
+                lines=lines,
+                evaluation_service=evaluation_service,
+                settings=bulk_evaluation_settings
+            ):
+                yield json.dumps(result) + "\n"
+        except Exception as e:
+            logger.error(f"Error in bulk technician evaluation: {str(e)}", exc_info=True)
+            yield json.dumps({"error": str(e)}) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+
 if __name__ == "__main__":
-    logger.info("Starting NeuroDesk LLM Wrapper API")
+    # Development server; production runs under gunicorn (gunicorn -c gunicorn.conf.py)
+    logger.info("Starting NeuroDesk LLM Wrapper API (development server)")
+    debug = os.environ.get("DEBUG", "False").lower() == "true"
+    # With the reloader, only the reloaded child process serves (and runs background work)
+    if not debug or os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        start_background_workers()
     app.run(
-        use_reloader=True,
+        use_reloader=debug,
         host='0.0.0.0',
         port=int(os.environ.get("PORT", 5000)),
-        debug=os.environ.get("DEBUG", "False").lower() == "true"
+        debug=debug
     )
\ No newline at end of file
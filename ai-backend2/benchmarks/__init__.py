@@ -0,0 +1,4 @@
+"""
+Benchmarks - Load tests of the assignment and evaluation routes against a fake LLM and a
+fake backend, so throughput can be measured without Gemini quota or the Next.js server
+"""
@@ -0,0 +1,204 @@
+"""
+Fake backend - Local stand-in for the Next.js API serving a seeded synthetic roster of
+skills and technicians in the same shapes as the real `/api/v1` endpoints
+"""
+import argparse
+import hashlib
+import json
+import random
+import threading
+from typing import Any, Dict, List, Optional
+from flask import Flask, Response, jsonify, request
+from werkzeug.serving import make_server
+
+MIN_TECHNICIANS, MAX_TECHNICIANS = 10, 10000
+MIN_SKILLS, MAX_SKILLS = 50, 5000
+
+# Skill names are "<area> <topic>" so larger catalogs stay readable and distinct
+SKILL_AREAS = [
+    "VPN", "Networking", "Active Directory", "Email", "Printer", "Database", "Firewall", "Windows",
+    "macOS", "Linux", "Office 365", "SharePoint", "Teams", "Azure", "AWS", "Kubernetes", "Docker",
+    "Backup", "Storage", "DNS", "DHCP", "Wi-Fi", "Mobile Device", "Antivirus", "SSO", "MFA",
+    "Password", "ERP", "CRM", "VoIP", "Video Conferencing", "Laptop Hardware", "Monitor", "Browser",
+    "Java", "Python", "SQL Server", "PostgreSQL", "Oracle", "Citrix", "VMware", "Load Balancer",
+    "Certificate", "Git", "Jenkins", "Jira", "Salesforce", "SAP", "Intune", "Exchange"
+]
+SKILL_TOPICS = [
+    "Troubleshooting", "Configuration", "Administration", "Migration", "Security", "Performance",
+    "Installation", "Monitoring", "Integration", "Support", "Automation", "Recovery", "Licensing",
+    "Compliance", "Patching", "Networking", "Access Management", "Upgrades", "Scripting", "Auditing",
+    "Capacity Planning", "Incident Response", "Hardening", "Provisioning", "Reporting", "Training",
+    "Optimization", "Deployment", "Replication", "Architecture", "Diagnostics", "Onboarding",
+    "Offboarding", "Policy Management", "Vendor Escalation", "Documentation", "Testing", "Tuning",
+    "Failover", "Clustering", "Encryption", "Logging", "Alerting", "Inventory", "Imaging",
+    "Remote Support", "Data Cleanup", "Sync", "Quotas", "Retention"
+]
+DEPARTMENTS = ["Infrastructure", "Service Desk", "Applications", "Security", "Field Support"]
+LEVELS = ["junior", "mid", "senior", "expert"]
+AVAILABILITY = ["available"] * 6 + ["busy", "in_meeting", "on_break", "focus_mode"]
+
+
+class SyntheticRoster:
+    """Deterministic skills and technicians for a given size and seed"""
+
+    def __init__(self, technicians: int = 100, skills: int = 200, skills_per_technician: int = 6, seed: int = 42):
+        if not MIN_TECHNICIANS <= technicians <= MAX_TECHNICIANS:
+            raise ValueError(f"technicians must be between {MIN_TECHNICIANS} and {MAX_TECHNICIANS}")
+        if not MIN_SKILLS <= skills <= MAX_SKILLS:
+            raise ValueError(f"skills must be between {MIN_SKILLS} and {MAX_SKILLS}")
+
+        rng = random.Random(seed)
+        # Areas first so the first len(SKILL_AREAS) skills cover every area
+        names = [(area, topic) for topic in SKILL_TOPICS for area in SKILL_AREAS][:skills]
+        self.skills: List[Dict[str, Any]] = [
+            {
+                "id": i,
+                "name": f"{area} {topic}",
+                "category": area,
+                "description": f"{area} {topic} for end-user and infrastructure tickets"
+            }
+            for i, (area, topic) in enumerate(names, start=1)
+        ]
+
+        self.technicians: List[Dict[str, Any]] = []
+        for i in range(1, technicians + 1):
+            owned = rng.sample(self.skills, min(skills_per_technician, len(self.skills)))
+            self.technicians.append({
+                "id": i,
+                "name": f"Technician {i:05d}",
+                "email": f"technician{i}@example.com",
+                "department": rng.choice(DEPARTMENTS),
+                "currentTickets": rng.randint(0, 12),
+                "resolvedTickets": rng.randint(0, 900),
+                "totalTickets": rng.randint(900, 1000),
+                "workload": rng.randint(0, 100),
+                "technicianLevel": rng.choice(LEVELS),
+                "availabilityStatus": rng.choice(AVAILABILITY),
+                "isActive": True,
+                "experience": round(rng.uniform(0, 15), 1),
+                "technicianSkills": [
+                    {"score": rng.randint(30, 100), "skill": {"id": skill["id"], "name": skill["name"]}}
+                    for skill in owned
+                ]
+            })
+        self._by_id = {t["id"]: t for t in self.technicians}
+
+    def technician(self, technician_id: int) -> Optional[Dict[str, Any]]:
+        return self._by_id.get(technician_id)
+
+    def ticket(self, n: int, technician_id: Optional[int] = None) -> Dict[str, Any]:
+        """A synthetic ticket naming one or two catalog skills; resolved and assigned when a technician is given"""
+        rng = random.Random(n)
+        skills = rng.sample(self.skills, 2)
+        ticket: Dict[str, Any] = {
+            "id": n,
+            "subject": f"{skills[0]['name']} issue reported by user {n}",
+            "description": (
+                f"User reports a problem that needs {skills[0]['name']} and possibly {skills[1]['name']}. "
+                f"It started this morning and blocks their work."
+            ),
+            "priority": rng.choice(["low", "normal", "high", "critical"]),
+            "tags": [skills[0]["category"].lower()]
+        }
+        if technician_id is not None:
+            ticket.update({
+                "assigned_technician_id": technician_id,
+                "created_at": "2025-01-06T09:00:00",
+                "resolved_at": f"2025-01-06T{10 + n % 8:02d}:30:00",
+                "feedback": rng.choice([
+                    "Thanks, quick and helpful!",
+                    "Great support, resolved right away.",
+                    "It works now but the fix was slow and I had to follow up twice, which was frustrating.",
+                    "ok",
+                    "Still not working after the visit."
+                ]),
+                "required_skills": [{"id": s["id"], "name": s["name"]} for s in skills],
+                "work_logs": [{"description": f"Investigated {skills[0]['name']} configuration and applied the fix"}]
+            })
+        return ticket
+
+
+def create_app(roster: SyntheticRoster) -> Flask:
+    app = Flask("fake_backend")
+
+    skills_body = json.dumps({"data": {"skills": roster.skills}})
+    technicians_body = json.dumps({"data": {"technicians": roster.technicians}})
+    etags = {
+        "skills": f'"{hashlib.sha1(skills_body.encode("utf-8")).hexdigest()}"',
+        "technicians": f'"{hashlib.sha1(technicians_body.encode("utf-8")).hexdigest()}"'
+    }
+
+    def catalog(name: str, body: str) -> Response:
+        if request.headers.get("If-None-Match") == etags[name]:
+            return Response(status=304, headers={"ETag": etags[name]})
+        return Response(body, mimetype="application/json", headers={"ETag": etags[name]})
+
+    @app.get("/api/v1/skills/all")
+    def all_skills():
+        return catalog("skills", skills_body)
+
+    @app.get("/api/v1/technicians/all")
+    def all_technicians():
+        return catalog("technicians", technicians_body)
+
+    @app.get("/api/v1/technicians/<int:technician_id>")
+    def technician(technician_id: int):
+        record = roster.technician(technician_id)
+        if record is None:
+            return jsonify({"error": "Technician not found"}), 404
+        return jsonify({"data": {"technician": {
+            **record,
+            "technician_skills": [
+                {"id": ts["skill"]["id"], "score": ts["score"]} for ts in record["technicianSkills"]
+            ]
+        }}})
+
+    @app.post("/api/v1/tickets/process-skills")
+    def process_skills():
+        return jsonify({"success": True})
+
+    return app
+
+
+class FakeBackend:
+    """Serves a roster from a background thread; use as a context manager"""
+
+    def __init__(self, roster: SyntheticRoster, host: str = "127.0.0.1", port: int = 0):
+        self.roster = roster
+        self._server = make_server(host, port, create_app(roster), threaded=True)
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-backend", daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://{self._server.host}:{self._server.port}"
+
+    def start(self) -> "FakeBackend":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._thread.join()
+
+    def __enter__(self) -> "FakeBackend":
+        return self.start()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve a synthetic roster in place of the Next.js backend")
+    parser.add_argument("--technicians", type=int, default=100)
+    parser.add_argument("--skills", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--port", type=int, default=4010)
+    args = parser.parse_args()
+
+    roster = SyntheticRoster(technicians=args.technicians, skills=args.skills, seed=args.seed)
+    print(f"Serving {len(roster.technicians)} technicians and {len(roster.skills)} skills on port {args.port}")
+    create_app(roster).run(port=args.port, threaded=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""
+Fake LLM - Deterministic stand-in for ChatGoogleGenerativeAI that recognizes the service's
+prompts and answers them with canned, well-formed responses after a configurable latency
+"""
+import asyncio
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, Iterator, List, Tuple
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+# Same estimate the scheduler uses when a provider reports no usage
+_CHARS_PER_TOKEN = 4
+
+_LIST_ITEM = re.compile(r"^\s*- (.+?)\s*$", re.M)
+_TECHNICIAN_ID = re.compile(r"^\s*- ID: (\d+),", re.M)
+_BATCH_TICKET = re.compile(r"^\s*### Ticket (\d+)", re.M)
+_BATCH_FEEDBACK = re.compile(r"^FEEDBACK (\d+): (.*)$", re.M)
+_REQUIRED_SKILLS = re.compile(r"For each required skill \[(.*?)\]")
+_SENTIMENT_WORDS = {"great": 30, "thanks": 20, "quick": 15, "helpful": 20, "slow": -30, "rude": -40, "still": -15}
+
+
+def _estimate_tokens(text: str) -> int:
+    return max(1, len(text) // _CHARS_PER_TOKEN)
+
+
+def _section(prompt: str, heading: str) -> str:
+    """Text between a `**Heading**` marker and the next `---` separator"""
+    start = prompt.find(heading)
+    if start == -1:
+        return ""
+    end = prompt.find("---", start)
+    return prompt[start + len(heading):end if end != -1 else None]
+
+
+class FakeChatModel:
+    """
+    Answers the extraction, selection, one-shot assignment, justification, sentiment and skill
+    evaluation prompts with the same content for the same prompt. Latency is `latency` seconds per call, spread
+    by +/- `jitter` (a fraction) from a seeded generator. Calls and token counts are tallied
+    per prompt kind, and responses carry `usage_metadata` like the real client's.
+    """
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, seed: int = 0, stream_chunk_words: int = 3):
+        self.latency = latency
+        self.jitter = jitter
+        self.stream_chunk_words = stream_chunk_words
+
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._calls: Dict[str, int] = defaultdict(int)
+        self._prompt_tokens: Dict[str, int] = defaultdict(int)
+        self._response_tokens: Dict[str, int] = defaultdict(int)
+
+    # --- langchain surface used by the service ---
+
+    def invoke(self, prompt: Any, *args: Any, **kwargs: Any) -> AIMessage:
+        text = str(prompt)
+        time.sleep(self._delay())
+        return self._message(AIMessage, *self._answer(text), text)
+
+    async def ainvoke(self, prompt: Any, *args: Any, **kwargs: Any) -> AIMessage:
+        text = str(prompt)
+        await asyncio.sleep(self._delay())
+        return self._message(AIMessage, *self._answer(text), text)
+
+    def stream(self, prompt: Any, *args: Any, **kwargs: Any) -> Iterator[AIMessageChunk]:
+        text = str(prompt)
+        kind, content = self._answer(text)
+        words = content.split(" ")
+        chunks = [" ".join(words[i:i + self.stream_chunk_words]) for i in range(0, len(words), self.stream_chunk_words)]
+        # First chunk pays the call latency, the rest arrive evenly spread over a tenth of it
+        time.sleep(self._delay())
+        for i, chunk in enumerate(chunks):
+            if i:
+                time.sleep(self.latency / 10 / max(len(chunks), 1))
+            last = i == len(chunks) - 1
+            suffix = "" if last else " "
+            yield self._message(AIMessageChunk, kind, chunk + suffix, text, with_usage=last)
+
+    # --- statistics ---
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Calls, prompt tokens and response tokens per prompt kind"""
+        with self._lock:
+            return {
+                kind: {
+                    "calls": self._calls[kind],
+                    "prompt_tokens": self._prompt_tokens[kind],
+                    "response_tokens": self._response_tokens[kind]
+                }
+                for kind in sorted(self._calls)
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._calls.clear()
+            self._prompt_tokens.clear()
+            self._response_tokens.clear()
+
+    # --- internals ---
+
+    def _delay(self) -> float:
+        if not self.jitter:
+            return self.latency
+        with self._lock:
+            spread = self._random.uniform(-self.jitter, self.jitter)
+        return max(0.0, self.latency * (1 + spread))
+
+    def _message(self, message_class: type, kind: str, content: str, prompt: str, with_usage: bool = True) -> Any:
+        usage = None
+        if with_usage:
+            input_tokens = _estimate_tokens(prompt)
+            output_tokens = _estimate_tokens(content)
+            usage = {"input_tokens": input_tokens, "output_tokens": output_tokens, "total_tokens": input_tokens + output_tokens}
+            with self._lock:
+                self._calls[kind] += 1
+                self._prompt_tokens[kind] += input_tokens
+                self._response_tokens[kind] += output_tokens
+        return message_class(content=content, usage_metadata=usage)
+
+    def _answer(self, prompt: str) -> Tuple[str, str]:
+        if "justification writer" in prompt:
+            return "justification", self._justification(prompt)
+        if "**Shortlisted Technicians**" in prompt:
+            return "one_shot", self._one_shot(prompt)
+        if "ticket_index" in prompt:
+            return "batch_extraction", self._batch_extraction(prompt)
+        if "**technical skills**" in prompt:
+            return "extraction", self._extraction(prompt)
+        if "selected_technician_id" in prompt:
+            return "selection", self._selection(prompt)
+        if _BATCH_FEEDBACK.search(prompt):
+            return "sentiment_batch", self._sentiment_batch(prompt)
+        if '"skill": "<skill_name>"' in prompt:
+            return "skill_evaluation", self._skill_evaluation(prompt)
+        if "sentiment" in prompt.lower():
+            return "sentiment", self._sentiment(prompt.rsplit("User Feedback:", 1)[-1])
+        return "other", "OK"
+
+    @staticmethod
+    def _pick_skills(text: str, available: List[str]) -> List[str]:
+        """Available skills named in the ticket text, else one chosen from the text's hash"""
+        lowered = text.lower()
+        named = [skill for skill in available if skill.lower() in lowered]
+        if named:
+            return named[:3]
+        if not available:
+            return []
+        digest = int(hashlib.md5(text.encode("utf-8")).hexdigest(), 16)
+        return [available[digest % len(available)]]
+
+    def _extraction(self, prompt: str) -> str:
+        available = _LIST_ITEM.findall(_section(prompt, "**Available Skills**:"))
+        ticket = _section(prompt, "**Ticket Details**")
+        return json.dumps({"existing_skills": self._pick_skills(ticket, available), "new_skills": []})
+
+    def _batch_extraction(self, prompt: str) -> str:
+        available = _LIST_ITEM.findall(_section(prompt, "**Available Skills**:"))
+        tickets = _section(prompt, "**Tickets**")
+        starts = list(_BATCH_TICKET.finditer(tickets))
+        results = []
+        for i, match in enumerate(starts):
+            end = starts[i + 1].start() if i + 1 < len(starts) else len(tickets)
+            results.append({
+                "ticket_index": int(match.group(1)),
+                "existing_skills": self._pick_skills(tickets[match.end():end], available),
+                "new_skills": []
+            })
+        return json.dumps({"results": results})
+
+    def _selection(self, prompt: str) -> str:
+        ids = _TECHNICIAN_ID.findall(prompt)
+        return json.dumps({
+            "selected_technician_id": int(ids[0]) if ids else None,
+            "justification": "• Strongest match for the required skills\n• Available with a manageable workload"
+        })
+
+    def _one_shot(self, prompt: str) -> str:
+        return json.dumps({**json.loads(self._extraction(prompt)), **json.loads(self._selection(prompt))})
+
+    @staticmethod
+    def _justification(prompt: str) -> str:
+        return (
+            "• Holds the skills this ticket requires at a high proficiency\n"
+            "• Currently available with a manageable workload\n"
+            "• Experience level matches the ticket's priority"
+        )
+
+    @staticmethod
+    def _sentiment_score(feedback: str) -> int:
+        lowered = feedback.lower()
+        return max(-100, min(100, sum(score for word, score in _SENTIMENT_WORDS.items() if word in lowered)))
+
+    def _sentiment(self, feedback: str) -> str:
+        return json.dumps({"score": self._sentiment_score(feedback), "reasoning": "Canned benchmark sentiment"})
+
+    def _sentiment_batch(self, prompt: str) -> str:
+        return json.dumps({"results": [
+            {"feedback": int(number), "score": self._sentiment_score(feedback), "reasoning": "Canned benchmark sentiment"}
+            for number, feedback in _BATCH_FEEDBACK.findall(prompt)
+        ]})
+
+    @staticmethod
+    def _skill_evaluation(prompt: str) -> str:
+        match = _REQUIRED_SKILLS.search(prompt)
+        skills = [s.strip() for s in match.group(1).split(",") if s.strip()] if match else []
+        return json.dumps({"skills": [
+            {"skill": skill, "score": 60 + (i * 7) % 35, "reasoning": "Demonstrated during resolution"}
+            for i, skill in enumerate(skills)
+        ]})
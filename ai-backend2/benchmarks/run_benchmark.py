@@ -0,0 +1,202 @@
+"""
+Benchmark runner - Serves the Flask app against the fake LLM and fake backend and drives
+/api/ticket-assignment and /api/evaluate-technician with concurrent clients, reporting
+throughput, latency percentiles and LLM prompt tokens per route
+
+Run from ai-backend2:  python -m benchmarks.run_benchmark --technicians 1000 --skills 500
+"""
+import argparse
+import json
+import logging
+import math
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+import requests
+from werkzeug.serving import make_server
+from benchmarks.fake_backend import FakeBackend, SyntheticRoster
+from benchmarks.fake_llm import FakeChatModel
+
+ROUTES = {
+    "assignment": "/api/ticket-assignment",
+    "evaluation": "/api/evaluate-technician",
+}
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank percentile of an ascending list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(q / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def load_service(backend_url: str, fake_llm: FakeChatModel) -> Any:
+    """Import the app configured for the fake backend, with the fake LLM behind its scheduler"""
+    os.environ["BACKEND_SERVER_URL"] = backend_url
+    os.environ.setdefault("GOOGLE_API_KEY", "benchmark")
+    os.environ["JOB_WORKERS_ENABLED"] = "false"
+    os.environ["JOB_QUEUE_PATH"] = os.path.join(tempfile.mkdtemp(prefix="neurodesk-bench-"), "jobs.sqlite3")
+
+    import app as service
+
+    service.llm.llm = fake_llm
+    service.background_llm.llm = fake_llm
+    # Per-request INFO logging would dominate both the output and the measurement
+    logging.disable(logging.INFO)
+    return service
+
+
+def run_route(
+    base_url: str,
+    path: str,
+    payloads: Callable[[int], Dict[str, Any]],
+    requests_count: int,
+    concurrency: int,
+    fake_llm: FakeChatModel,
+    warmup: int
+) -> Dict[str, Any]:
+    local = threading.local()
+
+    def session() -> requests.Session:
+        if not hasattr(local, "session"):
+            local.session = requests.Session()
+        return local.session
+
+    def send(n: int) -> tuple:
+        started = time.perf_counter()
+        try:
+            status = session().post(base_url + path, json=payloads(n), timeout=300).status_code
+        except requests.RequestException:
+            status = 0
+        return time.perf_counter() - started, status
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        # Warm-up fills the catalog and extraction caches and is left out of the results
+        list(pool.map(send, range(-warmup, 0)))
+        fake_llm.reset()
+
+        started = time.perf_counter()
+        results = list(pool.map(send, range(requests_count)))
+        elapsed = time.perf_counter() - started
+
+    latencies = sorted(seconds for seconds, status in results if 200 <= status < 300)
+    errors = sum(1 for _, status in results if not 200 <= status < 300)
+    llm_stats = fake_llm.stats()
+    prompt_tokens = sum(s["prompt_tokens"] for s in llm_stats.values())
+    return {
+        "requests": requests_count,
+        "errors": errors,
+        "elapsed_seconds": round(elapsed, 3),
+        "rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50) * 1000, 1),
+            "p95": round(percentile(latencies, 95) * 1000, 1),
+            "p99": round(percentile(latencies, 99) * 1000, 1),
+            "max": round(latencies[-1] * 1000, 1) if latencies else 0.0
+        },
+        "llm_calls": sum(s["calls"] for s in llm_stats.values()),
+        "prompt_tokens": prompt_tokens,
+        "prompt_tokens_per_request": round(prompt_tokens / requests_count, 1) if requests_count else 0.0,
+        "llm_by_prompt": llm_stats
+    }
+
+
+def print_report(config: Dict[str, Any], results: Dict[str, Dict[str, Any]]) -> None:
+    print(
+        f"\n{config['technicians']} technicians, {config['skills']} skills, "
+        f"{config['concurrency']} clients, LLM latency {config['llm_latency'] * 1000:.0f}ms"
+    )
+    header = f"{'route':<12}{'reqs':>7}{'errors':>8}{'rps':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'LLM calls':>11}{'tokens/req':>12}"
+    print(header)
+    print("-" * len(header))
+    for route, result in results.items():
+        latency = result["latency_ms"]
+        print(
+            f"{route:<12}{result['requests']:>7}{result['errors']:>8}{result['rps']:>9.2f}"
+            f"{latency['p50']:>10.1f}{latency['p95']:>10.1f}{latency['p99']:>10.1f}"
+            f"{result['llm_calls']:>11}{result['prompt_tokens_per_request']:>12.1f}"
+        )
+    for route, result in results.items():
+        print(f"\n{route} prompt tokens by prompt kind:")
+        for kind, stats in result["llm_by_prompt"].items():
+            print(f"  {kind:<18}{stats['calls']:>6} calls {stats['prompt_tokens']:>10} prompt tokens")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the assignment and evaluation routes offline")
+    parser.add_argument("--technicians", type=int, default=100, help="Roster size (10 to 10000)")
+    parser.add_argument("--skills", type=int, default=200, help="Skill catalog size (50 to 5000)")
+    parser.add_argument("--requests", type=int, default=200, help="Measured requests per route")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent clients")
+    parser.add_argument("--warmup", type=int, default=5, help="Unmeasured requests per route")
+    parser.add_argument("--distinct-tickets", type=int, default=0,
+                        help="Cycle over this many distinct tickets to exercise caches (0: all distinct)")
+    parser.add_argument("--routes", default="assignment,evaluation", help=f"Comma-separated: {', '.join(ROUTES)}")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="Fake LLM seconds per call")
+    parser.add_argument("--llm-jitter", type=float, default=0.1, help="Fake LLM latency spread, as a fraction")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", dest="json_path", help="Also write the results to this file")
+    args = parser.parse_args(argv)
+
+    routes = [route.strip() for route in args.routes.split(",") if route.strip()]
+    unknown = [route for route in routes if route not in ROUTES]
+    if unknown:
+        parser.error(f"unknown route(s): {', '.join(unknown)}")
+
+    roster = SyntheticRoster(technicians=args.technicians, skills=args.skills, seed=args.seed)
+    fake_llm = FakeChatModel(latency=args.llm_latency, jitter=args.llm_jitter, seed=args.seed)
+
+    def ticket_number(n: int) -> int:
+        return n % args.distinct_tickets if args.distinct_tickets else n
+
+    payloads = {
+        "assignment": lambda n: {"ticket": roster.ticket(ticket_number(n))},
+        "evaluation": lambda n: {
+            "ticket": roster.ticket(ticket_number(n), technician_id=ticket_number(n) % len(roster.technicians) + 1)
+        },
+    }
+
+    with FakeBackend(roster) as backend:
+        service = load_service(backend.url, fake_llm)
+        server = make_server("127.0.0.1", 0, service.app, threaded=True)
+        server_thread = threading.Thread(target=server.serve_forever, name="benchmark-app", daemon=True)
+        server_thread.start()
+        base_url = f"http://127.0.0.1:{server.port}"
+
+        try:
+            results = {
+                route: run_route(
+                    base_url, ROUTES[route], payloads[route], args.requests,
+                    args.concurrency, fake_llm, args.warmup
+                )
+                for route in routes
+            }
+        finally:
+            server.shutdown()
+            server_thread.join()
+            service.evaluation_service.shutdown()
+
+    config = {
+        "technicians": args.technicians,
+        "skills": args.skills,
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "distinct_tickets": args.distinct_tickets,
+        "llm_latency": args.llm_latency,
+        "llm_jitter": args.llm_jitter,
+        "seed": args.seed
+    }
+    print_report(config, results)
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump({"config": config, "results": results}, f, indent=2)
+    return 1 if any(result["errors"] for result in results.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
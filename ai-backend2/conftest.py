@@ -0,0 +1,3 @@
+"""
+Pytest root - Keeps the service packages (models, services) importable from the tests
+"""
@@ -0,0 +1,60 @@
+"""
+Gunicorn configuration - Production server for the API, started from this directory with
+`gunicorn -c gunicorn.conf.py`. The app is imported once in the master (LLM clients, prompt
+registry, caches) and its catalogs are loaded before the workers are forked; each worker then
+starts its own background threads and drains its in-flight LLM calls before exiting.
+"""
+import multiprocessing
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# gRPC channels opened before a fork do not work in the children; REST connections are per process
+os.environ.setdefault("GOOGLE_TRANSPORT", "rest")
+
+wsgi_app = "app:app"
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+
+# Requests mostly wait on the LLM and the backend, so each process serves many of them on
+# threads; processes scale with the cores for the CPU-bound parts (scoring, parsing, prompts)
+workers = int(os.environ.get("GUNICORN_WORKERS") or multiprocessing.cpu_count())
+worker_class = "gthread"
+threads = int(os.environ.get("GUNICORN_THREADS", 8))
+preload_app = True
+
+# Every process has its own LLM scheduler; they split the provider budgets between them
+os.environ["LLM_SCHEDULER_PROCESSES"] = str(workers)
+
+# Limit: assignment reservations and the technician state store are in-memory and per
+# process. Concurrent tickets served by different workers do not see each other's
+# reservations, and can pick the same technician, until the backend records the assignments
+# and the state stores sync. Where spreading concurrent tickets matters more than CPU
+# parallelism, run one worker (GUNICORN_WORKERS=1) and scale with GUNICORN_THREADS.
+# The job queue is shared through its SQLite file; each process opens its own connection.
+
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 120))
+graceful_timeout = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", 60))
+keepalive = int(os.environ.get("GUNICORN_KEEPALIVE", 5))
+# Time a stopping worker waits for LLM calls after its last request; kept below the graceful
+# timeout, after which the master kills the worker
+drain_timeout = min(float(os.environ.get("SHUTDOWN_DRAIN_TIMEOUT", 30)), graceful_timeout * 0.9)
+
+accesslog = "-" if os.environ.get("GUNICORN_ACCESS_LOG", "false").lower() == "true" else None
+loglevel = os.environ.get("LOG_LEVEL", "info").lower()
+
+
+def when_ready(server):
+    import app
+    app.warm_up()
+
+
+def post_fork(server, worker):
+    # Threads started in the master are not carried over by fork
+    import app
+    app.start_background_workers()
+
+
+def worker_exit(server, worker):
+    import app
+    app.drain(drain_timeout)
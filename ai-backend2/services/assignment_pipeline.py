@@ -0,0 +1,431 @@
+"""
+Ticket assignment pipeline - Async end-to-end flow for a single ticket assignment
+(catalog lookups, skill extraction, shortlisting and technician selection)
+"""
+import asyncio
+import json
+import logging
+import os
+from typing import Any, Dict, Iterator, List, Mapping, Optional
+from langchain_google_genai import ChatGoogleGenerativeAI
+from pydantic import BaseModel
+from models.ticket import Ticket
+from models.skill import Skill
+from services.assignment_reservations import AssignmentReservations
+from services.catalog_cache import CatalogCache
+from services import deadline
+from services.extraction_cache import SkillExtractionCache
+from services.llm_scheduler import lane_for_priority, llm_lane
+from services.metrics import timed
+from services.one_shot_assignment import aassign_one_shot
+from services.prompts import ONE_SHOT_ASSIGNMENT_PROMPT, SKILL_EXTRACTION_PROMPT, registry as prompt_registry
+from models.technician import Technician
+from services.skill_extraction import SkillExtractionResponse, aextract_skills_from_ticket, extraction_cache_version
+from services.skill_matcher import SkillMatcher
+from services.technician_selection import (
+    TechnicianShortlist,
+    aselect_best_technician_for_ticket,
+    iter_technician_selection,
+    selection_mode,
+    selection_prompt_names,
+    shortlist_technicians,
+)
+
+logger = logging.getLogger(__name__)
+
+ASSIGNMENT_MODES = ("two_step", "one_shot")
+
+
+class PipelineSettings(BaseModel):
+    """Tunables of the assignment pipeline"""
+    # Catalog skills offered to the extraction LLM (0 = whole catalog)
+    skill_candidates: int = 25
+    # Seconds to wait for LLM skill extraction before using the local matcher
+    extraction_timeout: float = 20.0
+    # End-to-end budget of an assignment request in seconds, unless the caller sends
+    # its own in the deadline header (0 = no deadline)
+    deadline: float = 30.0
+    # "two_step": skill extraction and technician selection are separate LLM calls
+    # "one_shot": one LLM call answers both, over a shortlist ranked on locally matched skills
+    assignment_mode: str = "two_step"
+    # Seconds to wait for the one-shot LLM call before assigning locally
+    one_shot_timeout: float = 30.0
+
+    @classmethod
+    def from_env(cls, env: Mapping[str, str]) -> "PipelineSettings":
+        mode = env.get("ASSIGNMENT_MODE", "two_step").lower()
+        if mode not in ASSIGNMENT_MODES:
+            logger.warning(f"Unknown assignment mode '{mode}', falling back to 'two_step'")
+            mode = "two_step"
+        return cls(
+            skill_candidates=int(env.get("SKILL_PREMATCH_TOP_N", 25)),
+            extraction_timeout=float(env.get("SKILL_EXTRACTION_TIMEOUT", 20)),
+            deadline=float(env.get("ASSIGNMENT_DEADLINE_SECONDS", 30)),
+            assignment_mode=mode,
+            one_shot_timeout=float(env.get("ASSIGNMENT_ONE_SHOT_TIMEOUT", 30))
+        )
+
+
+class PreparedAssignment(BaseModel):
+    """Pipeline state once skills are extracted and candidates shortlisted"""
+    ticket: Ticket
+    extraction: SkillExtractionResponse
+    extraction_source: str
+    required_skills: List[Skill]
+    shortlist: TechnicianShortlist
+
+
+class AssignmentError(Exception):
+    """Assignment failure that maps onto an HTTP error response"""
+
+    def __init__(self, message: str, status_code: int = 500):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+
+async def run_ticket_assignment(
+    ticket: Ticket,
+    llm: ChatGoogleGenerativeAI,
+    catalog_cache: CatalogCache,
+    extraction_cache: Optional[SkillExtractionCache] = None,
+    settings: Optional[PipelineSettings] = None,
+    reservations: Optional[AssignmentReservations] = None
+) -> Dict[str, Any]:
+    """
+    Run the assignment pipeline for one ticket.
+    The technicians lookup does not depend on skill extraction, so it runs
+    concurrently with the extraction LLM call instead of after it.
+    LLM calls are scheduled in the lane of the ticket's priority.
+    With `reservations`, the chosen technician is reserved for the ticket so
+    concurrent assignments see their increased workload.
+    In "one_shot" assignment mode, extraction and selection share a single LLM call
+    (see `_run_one_shot_assignment`).
+    """
+    with llm_lane(lane_for_priority(ticket.priority)):
+        return await _run_ticket_assignment(ticket, llm, catalog_cache, extraction_cache, settings, reservations)
+
+
+async def _run_ticket_assignment(
+    ticket: Ticket,
+    llm: ChatGoogleGenerativeAI,
+    catalog_cache: CatalogCache,
+    extraction_cache: Optional[SkillExtractionCache],
+    settings: Optional[PipelineSettings],
+    reservations: Optional[AssignmentReservations]
+) -> Dict[str, Any]:
+    settings = settings or PipelineSettings.from_env(os.environ)
+    if settings.assignment_mode == "one_shot":
+        return await _run_one_shot_assignment(ticket, llm, catalog_cache, extraction_cache, settings, reservations)
+
+    prepared = await _prepare_assignment(ticket, llm, catalog_cache, extraction_cache, settings)
+    return await _select_for_prepared(prepared, llm, reservations)
+
+
+async def _select_for_prepared(
+    prepared: PreparedAssignment,
+    llm: ChatGoogleGenerativeAI,
+    reservations: Optional[AssignmentReservations]
+) -> Dict[str, Any]:
+    ticket = prepared.ticket
+    # Resolved once so the reported prompt versions match the prompts actually sent
+    mode = selection_mode(None, llm)
+
+    # --- Step 4: Select best technician ---
+    selected_technician, justification = await aselect_best_technician_for_ticket(
+        ticket=ticket,
+        available_technicians=prepared.shortlist.candidates,
+        required_skills=prepared.required_skills,
+        llm=llm,
+        mode=mode,
+        reservations=reservations
+    )
+
+    if not selected_technician:
+        raise AssignmentError("No suitable technician found", status_code=404)
+
+    return build_assignment_response(
+        ticket=ticket,
+        extraction=prepared.extraction,
+        extraction_source=prepared.extraction_source,
+        technician=selected_technician,
+        justification=justification,
+        shortlist=prepared.shortlist,
+        prompt_versions=prompt_registry.versions(SKILL_EXTRACTION_PROMPT.name, *selection_prompt_names(mode))
+    )
+
+
+async def _run_one_shot_assignment(
+    ticket: Ticket,
+    llm: ChatGoogleGenerativeAI,
+    catalog_cache: CatalogCache,
+    extraction_cache: Optional[SkillExtractionCache],
+    settings: PipelineSettings,
+    reservations: Optional[AssignmentReservations]
+) -> Dict[str, Any]:
+    """
+    Assignment with one LLM call for extraction and selection. The shortlist cannot wait for
+    the LLM's skills, so it is ranked on the skills the local matcher finds. Falls back to:
+    - the two-step selection alone when the ticket's skills are already in the extraction cache
+    - local selection over a shortlist ranked on the LLM's skills when the LLM picked no candidate
+    - local extraction and selection when the call fails or its answer is invalid
+    """
+    with timed("catalog.skills"):
+        skills_entry = await _within_deadline(asyncio.to_thread(catalog_cache.get, "skills"))
+    skill_matcher: SkillMatcher = skills_entry.value
+    if not len(skill_matcher):
+        raise AssignmentError("Failed to fetch skills from backend")
+
+    cache_version = extraction_cache_version(skills_entry.version)
+    if extraction_cache is not None:
+        with timed("extraction.cache_lookup"):
+            cached, _ = extraction_cache.get(ticket, cache_version)
+        if cached is not None:
+            prepared = await _prepare_assignment(ticket, llm, catalog_cache, None, settings, extraction=cached)
+            return await _select_for_prepared(prepared, llm, reservations)
+
+    technicians_task = asyncio.create_task(_timed_catalog_get(catalog_cache, "technicians"))
+    with timed("extraction.prematch"):
+        available_skills = skill_matcher.candidate_names(ticket, settings.skill_candidates)
+        local_extraction = skill_matcher.extract(ticket)
+
+    technician_index = (await _within_deadline(technicians_task)).value
+    if not len(technician_index):
+        raise AssignmentError("Failed to fetch technicians from backend")
+
+    shortlist = shortlist_technicians(
+        ticket=ticket,
+        available_technicians=technician_index,
+        required_skills=_required_skills(local_extraction)
+    )
+    if not shortlist.candidates:
+        raise AssignmentError("No suitable technician found", status_code=404)
+
+    technician: Optional[Technician] = None
+    justification = ""
+    try:
+        extraction, technician, justification = await asyncio.wait_for(
+            aassign_one_shot(ticket, available_skills, shortlist.candidates, llm, reservations),
+            timeout=deadline.budget(settings.one_shot_timeout)
+        )
+        extraction_source = "llm"
+        if extraction_cache is not None:
+            extraction_cache.put(ticket, cache_version, extraction)
+    except Exception as e:
+        logger.warning(f"One-shot LLM assignment failed ({e.__class__.__name__}: {e}), assigning locally")
+        extraction, extraction_source = local_extraction, "local"
+
+    required_skills = _required_skills(extraction)
+    if technician is None:
+        if extraction_source == "llm":
+            shortlist = shortlist_technicians(
+                ticket=ticket,
+                available_technicians=technician_index,
+                required_skills=required_skills
+            )
+        technician, justification = await aselect_best_technician_for_ticket(
+            ticket=ticket,
+            available_technicians=shortlist.candidates,
+            required_skills=required_skills,
+            llm=llm,
+            mode="fast",
+            reservations=reservations
+        )
+        if not technician:
+            raise AssignmentError("No suitable technician found", status_code=404)
+
+    return build_assignment_response(
+        ticket=ticket,
+        extraction=extraction,
+        extraction_source=extraction_source,
+        technician=technician,
+        justification=justification,
+        shortlist=shortlist,
+        prompt_versions=prompt_registry.versions(ONE_SHOT_ASSIGNMENT_PROMPT.name)
+    )
+
+
+async def prepare_ticket_assignment(
+    ticket: Ticket,
+    llm: ChatGoogleGenerativeAI,
+    catalog_cache: CatalogCache,
+    extraction_cache: Optional[SkillExtractionCache] = None,
+    settings: Optional[PipelineSettings] = None
+) -> PreparedAssignment:
+    """Run the pipeline up to technician selection (see `iter_ticket_assignment_events`)"""
+    with llm_lane(lane_for_priority(ticket.priority)):
+        return await _prepare_assignment(ticket, llm, catalog_cache, extraction_cache, settings)
+
+
+async def _prepare_assignment(
+    ticket: Ticket,
+    llm: ChatGoogleGenerativeAI,
+    catalog_cache: CatalogCache,
+    extraction_cache: Optional[SkillExtractionCache],
+    settings: Optional[PipelineSettings],
+    extraction: Optional[SkillExtractionResponse] = None
+) -> PreparedAssignment:
+    """Steps 1-3; an `extraction` already known (e.g. from the cache) skips the extraction LLM call"""
+    settings = settings or PipelineSettings.from_env(os.environ)
+
+    # --- Step 1: Skills catalog (needed to build the extraction prompt) ---
+    with timed("catalog.skills"):
+        skills_entry = await _within_deadline(asyncio.to_thread(catalog_cache.get, "skills"))
+    skill_matcher: SkillMatcher = skills_entry.value
+    if not len(skill_matcher):
+        raise AssignmentError("Failed to fetch skills from backend")
+
+    # Only the locally best-matching catalog skills are offered to the LLM
+    with timed("extraction.prematch"):
+        available_skills = skill_matcher.candidate_names(ticket, settings.skill_candidates)
+
+    # --- Step 2: Extract skills while the technicians catalog loads ---
+    technicians_task = asyncio.create_task(_timed_catalog_get(catalog_cache, "technicians"))
+    skill_extraction_source = "llm"
+    try:
+        skill_extraction_result = extraction or await asyncio.wait_for(
+            aextract_skills_from_ticket(
+                ticket=ticket,
+                available_skills=available_skills,
+                llm=llm,
+                cache=extraction_cache,
+                catalog_version=skills_entry.version
+            ),
+            # Whatever the deadline leaves after extraction goes to selection
+            timeout=deadline.budget(settings.extraction_timeout)
+        )
+    except Exception as e:
+        # Gemini slow or down: fall back to the local keyword matcher
+        logger.warning(f"LLM skill extraction failed ({e.__class__.__name__}: {e}), using local matcher")
+        with timed("extraction.local_fallback"):
+            skill_extraction_result = skill_matcher.extract(ticket)
+        skill_extraction_source = "local"
+
+    existing_skills = skill_extraction_result.existing_skills
+    logger.debug(f"Extracted skills: {json.dumps(existing_skills)}")
+
+    technician_index = (await _within_deadline(technicians_task)).value
+    if not len(technician_index):
+        raise AssignmentError("Failed to fetch technicians from backend")
+
+    required_skills = _required_skills(skill_extraction_result)
+
+    # --- Step 3: Shortlist candidates locally so the selection only sees the top K ---
+    shortlist = shortlist_technicians(
+        ticket=ticket,
+        available_technicians=technician_index,
+        required_skills=required_skills
+    )
+
+    return PreparedAssignment(
+        ticket=ticket,
+        extraction=skill_extraction_result,
+        extraction_source=skill_extraction_source,
+        required_skills=required_skills,
+        shortlist=shortlist
+    )
+
+
+def _required_skills(extraction: SkillExtractionResponse) -> List[Skill]:
+    return [Skill(id=None, name=s, category=None, description=None) for s in extraction.existing_skills]
+
+
+async def _within_deadline(awaitable):
+    """Await a stage that has no local fallback, failing the request once its deadline passes"""
+    try:
+        return await asyncio.wait_for(awaitable, deadline.budget())
+    except (asyncio.TimeoutError, deadline.DeadlineExceeded) as e:
+        raise AssignmentError("Request deadline exceeded", status_code=504) from e
+
+
+async def _timed_catalog_get(catalog_cache: CatalogCache, name: str):
+    with timed(f"catalog.{name}"):
+        return await asyncio.to_thread(catalog_cache.get, name)
+
+
+def build_assignment_response(
+    ticket: Ticket,
+    extraction: SkillExtractionResponse,
+    extraction_source: str,
+    technician: Technician,
+    justification: str,
+    shortlist: TechnicianShortlist,
+    prompt_versions: Dict[str, str]
+) -> Dict[str, Any]:
+    """Shape of a successful assignment as returned to the frontend"""
+    return {
+        "ticket_subject": ticket.subject,
+        "existing_skills": extraction.existing_skills,
+        "new_skills": [ns.model_dump() for ns in extraction.new_skills],
+        "assigned_technician_id": technician.id,
+        "selected_technician_id": technician.id,  # Alternative field name
+        "technician_name": technician.name,
+        "justification": justification,
+        "skill_extraction_source": extraction_source,
+        "shortlist": shortlist.summary(),
+        "prompt_versions": prompt_versions
+    }
+
+
+def iter_ticket_assignment_events(
+    prepared: PreparedAssignment,
+    llm: ChatGoogleGenerativeAI,
+    mode: Optional[str] = None,
+    reservations: Optional[AssignmentReservations] = None
+) -> Iterator[Dict[str, Any]]:
+    """
+    Technician selection for a prepared assignment as a stream of events:
+    - {"event": "technician", ...} as soon as the technician is chosen
+    - {"event": "justification", "delta": ...} pieces of the justification as the LLM writes it
+    - {"event": "justification_reset"} when a broken-off justification is replaced by a local one
+    - {"event": "summary", ...} with the full assignment response, closing the stream
+    A failure closes the stream with {"event": "error", "error": ..., "status_code": ...} instead.
+    """
+    ticket = prepared.ticket
+    mode = selection_mode(mode, llm)
+    with llm_lane(lane_for_priority(ticket.priority)):
+        try:
+            technician: Optional[Technician] = None
+            for event, value in iter_technician_selection(
+                ticket=ticket,
+                available_technicians=prepared.shortlist.candidates,
+                required_skills=prepared.required_skills,
+                llm=llm,
+                mode=mode,
+                reservations=reservations
+            ):
+                if event == "technician":
+                    if value is None:
+                        yield {"event": "error", "error": "No suitable technician found", "status_code": 404}
+                        return
+                    technician = value
+                    yield {
+                        "event": "technician",
+                        "assigned_technician_id": technician.id,
+                        "technician_name": technician.name,
+                        "existing_skills": prepared.extraction.existing_skills
+                    }
+                elif event == "justification":
+                    yield {"event": "justification", "delta": value}
+                elif event == "justification_reset":
+                    yield {"event": "justification_reset"}
+                elif event == "done":
+                    justification, justification_source = value
+                    yield {
+                        "event": "summary",
+                        **build_assignment_response(
+                            ticket=ticket,
+                            extraction=prepared.extraction,
+                            extraction_source=prepared.extraction_source,
+                            technician=technician,
+                            justification=justification,
+                            shortlist=prepared.shortlist,
+                            prompt_versions=prompt_registry.versions(
+                                SKILL_EXTRACTION_PROMPT.name, *selection_prompt_names(mode)
+                            )
+                        ),
+                        "justification_source": justification_source
+                    }
+        except Exception as e:
+            logger.error(f"Error in streamed technician selection: {str(e)}", exc_info=True)
+            yield {"event": "error", "error": str(e), "status_code": 500}
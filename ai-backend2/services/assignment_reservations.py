@@ -0,0 +1,178 @@
+"""
+Assignment reservations - Tentative workload held for technicians between being picked for a
+ticket and the backend recording the assignment, so concurrent assignments do not all pick
+the same technician from the same roster snapshot
+"""
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Mapping, Optional, TypeVar
+from pydantic import BaseModel
+from models.technician import Technician
+from services.technician_index import TechnicianSkillIndex
+
+logger = logging.getLogger(__name__)
+
+Roster = TypeVar("Roster", List[Technician], TechnicianSkillIndex)
+
+
+class Reservation(BaseModel):
+    """Workload and one ticket tentatively added to a technician"""
+    technician_id: int
+    ticket_id: Optional[int] = None
+    workload: int
+    # currentTickets the backend reports once this assignment is recorded
+    expected_tickets: int
+    expires_at: float
+
+
+class AssignmentReservations:
+    """
+    Reservations by technician. Picking a technician reserves `workload_increment` workload
+    points and one current ticket; selections then see the technician's effective workload
+    (roster value plus outstanding reservations) until the reservation is reconciled or expires.
+
+    Reconciliation is driven by the roster itself: a reservation is dropped once a fresher
+    record of the technician (from the state store or a catalog refresh) reports the
+    `currentTickets` the assignment brings it to. Reservations the backend never confirms
+    (assignment abandoned or failed) expire after `ttl` seconds.
+    """
+
+    def __init__(self, ttl: float = 300.0, workload_increment: int = 10):
+        self.ttl = ttl
+        self.workload_increment = workload_increment
+        # Held across a local pick and its reservation so concurrent picks see each other
+        self.lock = threading.RLock()
+        self._by_technician: Dict[int, List[Reservation]] = {}
+        self._stats = {"reserved": 0, "reconciled": 0, "expired": 0, "released": 0}
+
+    @classmethod
+    def from_env(cls, env: Mapping[str, str]) -> "AssignmentReservations":
+        return cls(
+            ttl=float(env.get("ASSIGNMENT_RESERVATION_TTL", 300)),
+            workload_increment=int(env.get("ASSIGNMENT_RESERVATION_WORKLOAD", 10))
+        )
+
+    def reserve(self, technician: Technician, ticket_id: Optional[int] = None) -> Optional[Reservation]:
+        """
+        Reserve a ticket's worth of workload for a technician, given the technician's roster
+        record (not an effective copy). A ticket reserved again moves its reservation.
+        """
+        if technician.id is None:
+            return None
+        with self.lock:
+            self._prune_expired()
+            if ticket_id is not None:
+                self._release(ticket_id)
+            outstanding = self._outstanding(technician)
+            reservation = Reservation(
+                technician_id=technician.id,
+                ticket_id=ticket_id,
+                workload=self.workload_increment,
+                expected_tickets=technician.currentTickets + len(outstanding) + 1,
+                expires_at=time.monotonic() + self.ttl
+            )
+            outstanding.append(reservation)
+            self._by_technician[technician.id] = outstanding
+            self._stats["reserved"] += 1
+        logger.debug(f"Reserved technician {technician.id} for ticket {ticket_id}")
+        return reservation
+
+    def release(self, ticket_id: int) -> bool:
+        """Drop a ticket's reservation, e.g. when its assignment is abandoned"""
+        with self.lock:
+            return self._release(ticket_id)
+
+    def effective(self, roster: Roster) -> Roster:
+        """
+        The roster with outstanding reservations added to workloads and current tickets.
+        Returns copies; technicians without reservations are passed through unchanged.
+        """
+        with self.lock:
+            if not self._by_technician:
+                return roster
+            if isinstance(roster, TechnicianSkillIndex):
+                reserved = [t for t in roster.technicians if t.id in self._by_technician]
+                if not reserved:
+                    return roster
+                roster = roster.copy()
+                self._apply(roster, reserved)
+                return roster
+            return [self._effective_technician(technician) for technician in roster]
+
+    def apply(self, index: TechnicianSkillIndex) -> None:
+        """Add outstanding reservations to an index in place (e.g. a batch's private copy)"""
+        with self.lock:
+            if self._by_technician:
+                self._apply(index, [t for t in index.technicians if t.id in self._by_technician])
+
+    def status(self) -> Dict[str, Any]:
+        with self.lock:
+            now = time.monotonic()
+            active = [r for reservations in self._by_technician.values() for r in reservations if r.expires_at > now]
+            return {
+                "active": len(active),
+                "technicians": len({r.technician_id for r in active}),
+                "ttl_seconds": self.ttl,
+                "workload_increment": self.workload_increment,
+                **self._stats,
+            }
+
+    def _apply(self, index: TechnicianSkillIndex, technicians: List[Technician]) -> None:
+        for technician in technicians:
+            outstanding = self._outstanding(technician)
+            if outstanding:
+                index.adjust_workload(technician.id, sum(r.workload for r in outstanding), ticket_delta=len(outstanding))
+
+    def _effective_technician(self, technician: Technician) -> Technician:
+        if technician.id not in self._by_technician:
+            return technician
+        outstanding = self._outstanding(technician)
+        if not outstanding:
+            return technician
+        return technician.model_copy(update={
+            "workload": min(technician.workload + sum(r.workload for r in outstanding), 100),
+            "currentTickets": technician.currentTickets + len(outstanding),
+        })
+
+    def _outstanding(self, technician: Technician) -> List[Reservation]:
+        """Reservations of a technician still pending against its roster record. Call with the lock held."""
+        reservations = self._by_technician.get(technician.id, [])
+        now = time.monotonic()
+        outstanding = []
+        for reservation in reservations:
+            if reservation.expires_at <= now:
+                self._stats["expired"] += 1
+            elif technician.currentTickets >= reservation.expected_tickets:
+                self._stats["reconciled"] += 1
+            else:
+                outstanding.append(reservation)
+        if len(outstanding) != len(reservations):
+            if outstanding:
+                self._by_technician[technician.id] = outstanding
+            else:
+                self._by_technician.pop(technician.id, None)
+        return outstanding
+
+    def _prune_expired(self) -> None:
+        now = time.monotonic()
+        for technician_id, reservations in list(self._by_technician.items()):
+            kept = [r for r in reservations if r.expires_at > now]
+            self._stats["expired"] += len(reservations) - len(kept)
+            if not kept:
+                del self._by_technician[technician_id]
+            elif len(kept) != len(reservations):
+                self._by_technician[technician_id] = kept
+
+    def _release(self, ticket_id: int) -> bool:
+        for technician_id, reservations in list(self._by_technician.items()):
+            kept = [r for r in reservations if r.ticket_id != ticket_id]
+            if len(kept) == len(reservations):
+                continue
+            self._stats["released"] += 1
+            if kept:
+                self._by_technician[technician_id] = kept
+            else:
+                del self._by_technician[technician_id]
+            return True
+        return False
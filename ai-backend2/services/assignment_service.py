@@ -3,18 +3,21 @@ Main assignment service - Step 1: Extract skills from ticket using provided skil
 """
 from datetime import datetime
 import logging
-import requests
-import os
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from langchain_google_genai import ChatGoogleGenerativeAI
 from models.ticket import Ticket, TicketAssignmentResponse
 from models.skill import Skill
+from services.backend_client import BackendClient, get_backend_client
 from services.skill_extraction import extract_skills_from_ticket  # ✅ using the single-function version above
 
 logger = logging.getLogger(__name__)
 
 
-def process_ticket_assignment(request_data: Dict[str, Any], llm: ChatGoogleGenerativeAI) -> TicketAssignmentResponse:
+def process_ticket_assignment(
+    request_data: Dict[str, Any],
+    llm: ChatGoogleGenerativeAI,
+    backend_client: Optional[BackendClient] = None
+) -> TicketAssignmentResponse:
     """
     Single-function implementation of the ticket assignment process (Step 1 only):
     Extract skills from the ticket using the provided skills list and LLM.
@@ -56,12 +59,10 @@ def process_ticket_assignment(request_data: Dict[str, Any], llm: ChatGoogleGener
         logger.info(f"Validated ticket: {ticket.subject}")
 
         # --- STEP 2: Fetch available skills from backend ---
-        backend_url = os.environ.get("BACKEND_SERVER_URL", "http://localhost:5001")
-        logger.info(f"Fetching available skills from {backend_url}/api/v1/skills/all")
+        backend_client = backend_client or get_backend_client()
+        logger.info(f"Fetching available skills from {backend_client.base_url}/api/v1/skills/all")
 
-        response = requests.get(f"{backend_url}/api/v1/skills/all", timeout=10)
-        response.raise_for_status()
-        skills_data = response.json()
+        skills_data = backend_client.get_skills().payload
 
         available_skills = []
         for skill_item in skills_data["data"]["skills"]:
@@ -90,13 +91,7 @@ def process_ticket_assignment(request_data: Dict[str, Any], llm: ChatGoogleGener
             notify_data.append({"name": s.name, "description": s.description})
 
         try:
-            notify_resp = requests.post(
-                f"{backend_url}/api/v1/tickets/process-skills",
-                json={"ticket_id": ticket.id, "skills": notify_data},
-                timeout=10
-            )
-            notify_resp.raise_for_status()
-            if not notify_resp.json().get("success", False):
+            if not backend_client.process_skills(ticket.id, notify_data):
                 logger.warning("Backend did not acknowledge skill processing successfully.")
         except Exception as e:
             logger.error(f"Failed to notify backend of extracted skills: {str(e)}")
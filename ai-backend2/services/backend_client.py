@@ -0,0 +1,219 @@
+"""
+Backend client - Pooled HTTP client for all calls to the NeuroDesk backend server
+"""
+import hashlib
+import logging
+import os
+import random
+import threading
+import time
+from typing import Any, Dict, List, Mapping, Optional
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+from pydantic import BaseModel
+from services import deadline
+from services.metrics import timed
+
+logger = logging.getLogger(__name__)
+
+# Read timeouts in seconds per endpoint, overridable with BACKEND_TIMEOUT_<ENDPOINT>
+DEFAULT_TIMEOUTS = {
+    "skills_all": 10.0,
+    "technicians_all": 15.0,
+    "technicians_delta": 10.0,
+    "technician": 5.0,
+    "process_skills": 10.0,
+}
+
+RETRYABLE_STATUS_CODES = {429, 502, 503, 504}
+
+
+class CatalogPayload(BaseModel):
+    """Result of a conditional catalog fetch"""
+    not_modified: bool = False
+    payload: Dict[str, Any] = {}
+    etag: Optional[str] = None
+    content_hash: Optional[str] = None
+
+
+class BackendClient:
+    """
+    Thin wrapper over a pooled `requests.Session` with keep-alive connections,
+    per-endpoint timeouts and bounded retries with full jitter.
+    """
+
+    def __init__(
+        self,
+        base_url: Optional[str],
+        pool_size: int = 20,
+        connect_timeout: float = 3.0,
+        timeouts: Optional[Mapping[str, float]] = None,
+        max_retries: int = 2,
+        backoff: float = 0.2
+    ):
+        self.base_url = (base_url or "").rstrip("/")
+        self.connect_timeout = connect_timeout
+        self.timeouts = {**DEFAULT_TIMEOUTS, **(timeouts or {})}
+        self.max_retries = max_retries
+        self.backoff = backoff
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    @classmethod
+    def from_env(cls, env: Mapping[str, str]) -> "BackendClient":
+        timeouts = {
+            endpoint: float(env[f"BACKEND_TIMEOUT_{endpoint.upper()}"])
+            for endpoint in DEFAULT_TIMEOUTS
+            if f"BACKEND_TIMEOUT_{endpoint.upper()}" in env
+        }
+        return cls(
+            base_url=env.get("BACKEND_SERVER_URL"),
+            pool_size=int(env.get("BACKEND_POOL_SIZE", 20)),
+            connect_timeout=float(env.get("BACKEND_CONNECT_TIMEOUT", 3)),
+            timeouts=timeouts,
+            max_retries=int(env.get("BACKEND_MAX_RETRIES", 2)),
+            backoff=float(env.get("BACKEND_RETRY_BACKOFF", 0.2))
+        )
+
+    def close(self) -> None:
+        self.session.close()
+
+    def request(
+        self,
+        method: str,
+        path: str,
+        endpoint: str,
+        idempotent: bool = True,
+        **kwargs: Any
+    ) -> requests.Response:
+        """
+        Send a request to the backend, retrying up to `max_retries` times.
+        Non-idempotent requests are only retried when the connection could not be
+        established (connect timeout, refused or unresolvable host), never once they may
+        have been sent; idempotent ones on any connection error, read timeouts and
+        retryable status codes.
+        Under a request deadline, each attempt first checks it, cuts the read timeout to the
+        remaining budget and forwards that budget in the deadline header; a retry whose
+        backoff would end past the deadline is not made.
+        """
+        url = f"{self.base_url}{path}"
+        with timed(f"backend.{endpoint}"):
+            return self._request_with_retries(method, path, url, endpoint, idempotent, kwargs)
+
+    def _request_with_retries(self, method: str, path: str, url: str, endpoint: str, idempotent: bool,
+                              kwargs: Dict[str, Any]) -> requests.Response:
+        # A timeout given by the caller is kept as is; the default one follows the deadline
+        fixed_timeout = kwargs.pop("timeout", None)
+        headers = kwargs.pop("headers", None) or {}
+        attempt = 0
+        while True:
+            deadline.check()
+            timeout = fixed_timeout or (self.connect_timeout, deadline.budget(self.timeouts.get(endpoint, 10.0)))
+            deadline_header = deadline.header_value()
+            attempt_headers = {deadline.DEADLINE_HEADER: deadline_header, **headers} if deadline_header is not None else headers
+
+            error: Optional[Exception] = None
+            try:
+                response = self.session.request(method, url, timeout=timeout, headers=attempt_headers, **kwargs)
+                if not (idempotent and response.status_code in RETRYABLE_STATUS_CODES) \
+                        or attempt >= self.max_retries:
+                    return response
+                logger.warning(f"Backend {method} {path} returned {response.status_code}, retrying")
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                if attempt >= self.max_retries or not (idempotent or _not_sent(e)):
+                    raise
+                logger.warning(f"Backend {method} {path} failed ({e.__class__.__name__}), retrying")
+                error = e
+
+            attempt += 1
+            delay = random.uniform(0, self.backoff * (2 ** attempt))
+            left = deadline.remaining()
+            if left is not None and delay >= left:
+                # The retry would start after the deadline: give up with what this attempt
+                # got, unless the deadline already passed during it
+                deadline.check()
+                if error is not None:
+                    raise error
+                return response
+            time.sleep(delay)
+
+    # =====================
+    # TYPED ENDPOINT HELPERS
+    # =====================
+
+    def _get_catalog(self, path: str, endpoint: str, etag: Optional[str]) -> CatalogPayload:
+        headers = {"If-None-Match": etag} if etag else {}
+        response = self.request("GET", path, endpoint, headers=headers)
+        if response.status_code == 304:
+            return CatalogPayload(not_modified=True, etag=etag)
+        response.raise_for_status()
+        return CatalogPayload(
+            payload=response.json(),
+            etag=response.headers.get("ETag"),
+            content_hash=hashlib.sha1(response.content).hexdigest()
+        )
+
+    def get_skills(self, etag: Optional[str] = None) -> CatalogPayload:
+        """GET /api/v1/skills/all (conditional when an ETag is given)"""
+        return self._get_catalog("/api/v1/skills/all", "skills_all", etag)
+
+    def get_technicians(self, etag: Optional[str] = None) -> CatalogPayload:
+        """GET /api/v1/technicians/all (conditional when an ETag is given)"""
+        return self._get_catalog("/api/v1/technicians/all", "technicians_all", etag)
+
+    def get_technicians_changed(self, since: str) -> Dict[str, Any]:
+        """GET /api/v1/technicians/all?since=..., returning the data of technicians changed after `since`"""
+        response = self.request("GET", "/api/v1/technicians/all", "technicians_delta", params={"since": since})
+        response.raise_for_status()
+        return response.json().get("data", {})
+
+    def get_technician(self, technician_id: int) -> Dict[str, Any]:
+        """GET /api/v1/technicians/{id}, returning the technician record"""
+        response = self.request("GET", f"/api/v1/technicians/{technician_id}", "technician")
+        response.raise_for_status()
+        return response.json().get("data", {}).get("technician", {})
+
+    def process_skills(self, ticket_id: Optional[int], skills: List[Dict[str, Any]]) -> bool:
+        """POST /api/v1/tickets/process-skills, returning whether the backend acknowledged it"""
+        response = self.request(
+            "POST",
+            "/api/v1/tickets/process-skills",
+            "process_skills",
+            idempotent=False,
+            json={"ticket_id": ticket_id, "skills": skills}
+        )
+        response.raise_for_status()
+        return bool(response.json().get("success", False))
+
+
+def _not_sent(error: requests.exceptions.RequestException) -> bool:
+    """
+    Whether a failed request never reached the backend. Resets and disconnects on a
+    pooled keep-alive connection also surface as ConnectionError, after the request
+    may have been received, so only connect timeouts and failures to open a new
+    connection qualify.
+    """
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    if not isinstance(error, requests.exceptions.ConnectionError):
+        return False
+    cause = error.args[0] if error.args else None
+    return isinstance(getattr(cause, "reason", cause), NewConnectionError)
+
+
+_default_client: Optional[BackendClient] = None
+_default_client_lock = threading.Lock()
+
+
+def get_backend_client() -> BackendClient:
+    """Return the process-wide shared backend client, creating it from the environment"""
+    global _default_client
+    if _default_client is None:
+        with _default_client_lock:
+            if _default_client is None:
+                _default_client = BackendClient.from_env(os.environ)
+    return _default_client
@@ -0,0 +1,168 @@
+"""
+Batch assignment service - Assign many tickets at once with multi-ticket extraction
+prompts and a running workload model, streaming one result per ticket
+"""
+import logging
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Tuple
+from langchain_google_genai import ChatGoogleGenerativeAI
+from pydantic import BaseModel, ValidationError
+from models.ticket import Ticket
+from models.skill import Skill
+from services.assignment_pipeline import build_assignment_response
+from services.assignment_reservations import AssignmentReservations
+from services.catalog_cache import CatalogCache
+from services.extraction_cache import SkillExtractionCache
+from services.prompts import BATCH_SKILL_EXTRACTION_PROMPT, registry as prompt_registry
+from services.skill_extraction import SkillExtractionResponse, extract_skills_from_tickets, extraction_cache_version
+from services.skill_matcher import SkillMatcher
+from services.technician_selection import (
+    select_best_technician_for_ticket,
+    selection_mode,
+    selection_prompt_names,
+    shortlist_technicians,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class BatchSettings(BaseModel):
+    """Tunables of the batch assignment endpoint"""
+    # Tickets packed into one skill-extraction prompt
+    chunk_size: int = 8
+    # Workload points (0-100 scale) added to a technician for each ticket assigned in the batch
+    workload_increment: int = 10
+    # Technician selection mode for batch tickets ("llm", "hybrid" or "fast")
+    selection_mode: str = "fast"
+    # Catalog skills offered per ticket to the extraction LLM (0 = whole catalog)
+    skill_candidates: int = 25
+    max_tickets: int = 1000
+
+    @classmethod
+    def from_env(cls, env: Mapping[str, str]) -> "BatchSettings":
+        return cls(
+            chunk_size=int(env.get("BATCH_EXTRACTION_CHUNK_SIZE", 8)),
+            workload_increment=int(env.get("BATCH_WORKLOAD_INCREMENT", 10)),
+            selection_mode=env.get("BATCH_SELECTION_MODE", "fast"),
+            skill_candidates=int(env.get("SKILL_PREMATCH_TOP_N", 25)),
+            max_tickets=int(env.get("BATCH_MAX_TICKETS", 1000))
+        )
+
+
+def iter_batch_assignments(
+    raw_tickets: List[Dict[str, Any]],
+    llm: ChatGoogleGenerativeAI,
+    catalog_cache: CatalogCache,
+    extraction_cache: Optional[SkillExtractionCache],
+    settings: BatchSettings,
+    reservations: Optional[AssignmentReservations] = None
+) -> Iterator[Dict[str, Any]]:
+    """
+    Assign a batch of tickets, yielding one result per ticket as soon as it is done,
+    followed by a final summary. Catalogs are read once for the whole batch, and each
+    assignment raises the chosen technician's workload in a batch-local copy of the
+    roster so later tickets in the batch spread across the pool. With `reservations`,
+    the copy starts from effective workloads and every assignment is reserved, so
+    concurrent single-ticket assignments account for the batch and vice versa.
+    """
+    skills_entry = catalog_cache.get("skills")
+    skill_matcher: SkillMatcher = skills_entry.value
+    roster = catalog_cache.get("technicians").value
+    technician_index = roster.copy()
+    if reservations is not None:
+        reservations.apply(technician_index)
+    cache_version = extraction_cache_version(skills_entry.version)
+
+    assigned = failed = 0
+    tickets: List[Tuple[int, Ticket]] = []
+    for position, raw_ticket in enumerate(raw_tickets):
+        try:
+            tickets.append((position, Ticket.model_validate(raw_ticket)))
+        except ValidationError as e:
+            failed += 1
+            yield {"index": position, "status": "error", "error": f"Invalid ticket: {e}"}
+
+    for start in range(0, len(tickets), max(settings.chunk_size, 1)):
+        chunk = tickets[start:start + max(settings.chunk_size, 1)]
+        extractions = _extract_chunk(chunk, llm, skill_matcher, extraction_cache, cache_version, settings)
+
+        for position, ticket in chunk:
+            extraction, source = extractions[position]
+            try:
+                required_skills = [Skill(id=None, name=s, category=None, description=None) for s in extraction.existing_skills]
+                shortlist = shortlist_technicians(ticket, technician_index, required_skills)
+                # Per ticket: the circuit breaker may open (or close) during a batch
+                mode = selection_mode(settings.selection_mode, llm)
+                technician, justification = select_best_technician_for_ticket(
+                    ticket=ticket,
+                    available_technicians=shortlist.candidates,
+                    required_skills=required_skills,
+                    llm=llm,
+                    mode=mode
+                )
+                if not technician:
+                    raise ValueError(justification or "No suitable technician found")
+
+                technician_index.adjust_workload(technician.id, settings.workload_increment, ticket_delta=1)
+                if reservations is not None:
+                    reservations.reserve(roster.get(technician.id) or technician, ticket.id)
+                assigned += 1
+                yield {
+                    "index": position,
+                    "ticket_id": ticket.id,
+                    "status": "assigned",
+                    **build_assignment_response(
+                        ticket, extraction, source, technician, justification, shortlist,
+                        prompt_registry.versions(BATCH_SKILL_EXTRACTION_PROMPT.name, *selection_prompt_names(mode))
+                    )
+                }
+            except Exception as e:
+                logger.error(f"Batch assignment failed for ticket {ticket.id}: {e}")
+                failed += 1
+                yield {"index": position, "ticket_id": ticket.id, "status": "error", "error": str(e)}
+
+    yield {"summary": {"total": len(raw_tickets), "assigned": assigned, "failed": failed}}
+
+
+def _extract_chunk(
+    chunk: List[Tuple[int, Ticket]],
+    llm: ChatGoogleGenerativeAI,
+    skill_matcher: SkillMatcher,
+    extraction_cache: Optional[SkillExtractionCache],
+    catalog_version: str,
+    settings: BatchSettings
+) -> Dict[int, Tuple[SkillExtractionResponse, str]]:
+    """Extract skills for a chunk of tickets: cache first, then one LLM call, then the local matcher"""
+    results: Dict[int, Tuple[SkillExtractionResponse, str]] = {}
+    pending: List[Tuple[int, Ticket]] = []
+
+    for position, ticket in chunk:
+        cached = extraction_cache.get(ticket, catalog_version)[0] if extraction_cache is not None else None
+        if cached is not None:
+            results[position] = (cached, "cache")
+        else:
+            pending.append((position, ticket))
+
+    if not pending:
+        return results
+
+    # Union of each ticket's candidate skills, in first-seen order
+    available_skills = list(dict.fromkeys(
+        name for _, ticket in pending for name in skill_matcher.candidate_names(ticket, settings.skill_candidates)
+    ))
+
+    try:
+        extracted = extract_skills_from_tickets([ticket for _, ticket in pending], available_skills, llm)
+    except Exception as e:
+        logger.warning(f"Batch skill extraction failed ({e.__class__.__name__}: {e}), using local matcher")
+        extracted = {}
+
+    for offset, (position, ticket) in enumerate(pending):
+        extraction = extracted.get(offset)
+        if extraction is not None:
+            if extraction_cache is not None:
+                extraction_cache.put(ticket, catalog_version, extraction)
+            results[position] = (extraction, "llm")
+        else:
+            results[position] = (skill_matcher.extract(ticket), "local")
+
+    return results
@@ -0,0 +1,137 @@
+"""
+Bulk evaluation service - Re-score technicians from a stream of resolved tickets, grouping
+them per technician so each technician is fetched once and gets one consolidated skill update
+"""
+import json
+import logging
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Tuple, Union
+from pydantic import BaseModel
+from services.evaluation_service import EvaluationService
+
+logger = logging.getLogger(__name__)
+
+
+class BulkEvaluationSettings(BaseModel):
+    """Tunables of the bulk evaluation endpoint"""
+    # Feedback strings packed into one sentiment prompt
+    sentiment_batch_size: int = 20
+    # Sentiment prompts, and tickets of one technician, evaluated in parallel
+    concurrency: int = 4
+    max_tickets: int = 50000
+
+    @classmethod
+    def from_env(cls, env: Mapping[str, str]) -> "BulkEvaluationSettings":
+        return cls(
+            sentiment_batch_size=int(env.get("BULK_EVALUATION_SENTIMENT_BATCH_SIZE", 20)),
+            concurrency=int(env.get("BULK_EVALUATION_CONCURRENCY", 4)),
+            max_tickets=int(env.get("BULK_EVALUATION_MAX_TICKETS", 50000))
+        )
+
+
+def iter_bulk_evaluations(
+    lines: Iterable[Union[str, bytes]],
+    evaluation_service: EvaluationService,
+    settings: BulkEvaluationSettings
+) -> Iterator[Dict[str, Any]]:
+    """
+    Evaluate NDJSON lines of resolved tickets (`{"ticket": {...}}` or a bare ticket object),
+    yielding one consolidated skill update per technician, then a final summary.
+    Each technician's tickets are folded through `update_technician_skills` in the order
+    they appear in the stream, starting from the technician's current skills.
+    """
+    groups: "OrderedDict[Any, List[Tuple[int, Dict[str, Any]]]]" = OrderedDict()
+    invalid = 0
+
+    for line_number, line in enumerate(lines, start=1):
+        if isinstance(line, bytes):
+            line = line.decode("utf-8")
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+            ticket_data = record.get("ticket", record)
+            technician_id = ticket_data.get("assigned_technician_id") or ticket_data.get("assignedTechnicianId")
+            if not technician_id:
+                raise ValueError("No technician assigned to this ticket")
+        except (ValueError, AttributeError) as e:
+            invalid += 1
+            yield {"line": line_number, "status": "error", "error": f"Invalid ticket: {e}"}
+            continue
+        groups.setdefault(technician_id, []).append((line_number, ticket_data))
+
+    # Feedback of all tickets, technician by technician, packed into fixed-size prompts;
+    # prompts are submitted up front so later technicians' sentiment is ready when reached
+    ordered = [ticket_data for tickets in groups.values() for _, ticket_data in tickets]
+    batch_size = max(settings.sentiment_batch_size, 1)
+    sentiment_pool = ThreadPoolExecutor(max_workers=settings.concurrency, thread_name_prefix="bulk-sentiment")
+    metrics_pool = ThreadPoolExecutor(max_workers=settings.concurrency, thread_name_prefix="bulk-metrics")
+    sentiment_batches: List[Future] = [
+        sentiment_pool.submit(
+            evaluation_service.analyze_feedback_batch,
+            [ticket_data.get("feedback") for ticket_data in ordered[start:start + batch_size]]
+        )
+        for start in range(0, len(ordered), batch_size)
+    ]
+
+    updated = failed = 0
+    position = 0
+    try:
+        for technician_id, tickets in groups.items():
+            sentiments = [
+                sentiment_batches[(position + offset) // batch_size].result()[(position + offset) % batch_size]
+                for offset in range(len(tickets))
+            ]
+            position += len(tickets)
+
+            try:
+                current_skills = evaluation_service.fetch_current_skills(technician_id)
+                metrics_list = list(metrics_pool.map(
+                    lambda item: evaluation_service.calculate_metrics(item[0][1], feedback_sentiment=item[1]),
+                    zip(tickets, sentiments)
+                ))
+
+                skill_updates = {"technician_id": technician_id, "skills": current_skills}
+                for metrics in metrics_list:
+                    skill_updates = evaluation_service.update_technician_skills(
+                        technician_id=technician_id,
+                        current_skills=skill_updates["skills"],
+                        ticket_metrics=metrics
+                    )
+                evaluation_service.publish_skill_updates(skill_updates)
+
+                updated += 1
+                yield {
+                    "technician_id": technician_id,
+                    "status": "updated",
+                    "tickets_evaluated": len(tickets),
+                    "ticket_ids": [ticket_data.get("id") for _, ticket_data in tickets],
+                    "sla_adherence_rate": round(sum(m.sla_adherence for m in metrics_list) / len(metrics_list), 4),
+                    "average_sentiment": round(
+                        sum(m.feedback_sentiment.score for m in metrics_list) / len(metrics_list), 2
+                    ),
+                    "degraded_analyses": sum(len(m.degraded_analyses) for m in metrics_list),
+                    "skill_updates": skill_updates
+                }
+            except Exception as e:
+                logger.error(f"Bulk evaluation failed for technician {technician_id}: {e}")
+                failed += 1
+                yield {
+                    "technician_id": technician_id,
+                    "status": "error",
+                    "ticket_lines": [line_number for line_number, _ in tickets],
+                    "error": str(e)
+                }
+    finally:
+        sentiment_pool.shutdown(wait=False, cancel_futures=True)
+        metrics_pool.shutdown(wait=False, cancel_futures=True)
+
+    yield {"summary": {
+        "tickets": len(ordered) + invalid,
+        "invalid_tickets": invalid,
+        "technicians": len(groups),
+        "updated": updated,
+        "failed": failed,
+        "sentiment_batches": len(sentiment_batches)
+    }}
@@ -0,0 +1,232 @@
+"""
+Catalog cache service - In-process TTL cache for the skills and technicians catalogs
+with stale-while-revalidate refresh and ETag support. A catalog kept current by other
+means (such as the technician state store) can be attached in place of a cached one.
+"""
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Mapping, Optional, Protocol
+from pydantic import ValidationError
+from models.skill import Skill
+from services.backend_client import BackendClient, CatalogPayload
+from services.metrics import timed
+from services.skill_matcher import SkillMatcher
+from services.technician_index import TechnicianSkillIndex
+
+logger = logging.getLogger(__name__)
+
+
+class CatalogEntry:
+    """A parsed catalog together with its version (ETag or content hash)"""
+
+    def __init__(self, value: Any, version: str, etag: Optional[str], fetched_at: float):
+        self.value = value
+        self.version = version
+        self.etag = etag
+        self.fetched_at = fetched_at
+
+    def age(self) -> float:
+        return time.monotonic() - self.fetched_at
+
+
+class CachedResource:
+    """
+    A single backend catalog. Within `ttl` seconds the cached value is served as-is;
+    between `ttl` and `stale_ttl` it is served stale while a background refresh runs;
+    after `stale_ttl` (or when empty) the caller blocks on a fresh fetch.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        fetch: Callable[[Optional[str]], CatalogPayload],
+        parse: Callable[[Dict[str, Any]], Any],
+        ttl: float,
+        stale_ttl: float
+    ):
+        self.name = name
+        self.fetch = fetch
+        self.parse = parse
+        self.ttl = ttl
+        self.stale_ttl = max(stale_ttl, ttl)
+        self.entry: Optional[CatalogEntry] = None
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        self.not_modified = 0
+        self._lock = threading.Lock()
+        self._state_lock = threading.Lock()
+        self._refreshing = False
+
+    def status(self) -> Dict[str, Any]:
+        entry = self.entry
+        return {
+            "cached": entry is not None,
+            "version": entry.version if entry else None,
+            "age_seconds": round(entry.age(), 1) if entry else None,
+            "ttl_seconds": self.ttl,
+            "stale_ttl_seconds": self.stale_ttl,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified,
+        }
+
+
+class LiveCatalog(Protocol):
+    """A catalog that keeps itself current and is read without TTL handling"""
+
+    def get(self) -> CatalogEntry: ...
+
+    def invalidate(self) -> None: ...
+
+    def status(self) -> Dict[str, Any]: ...
+
+
+class CatalogCache:
+    """In-process cache holding already-validated catalog objects"""
+
+    def __init__(self):
+        self._resources: Dict[str, CachedResource] = {}
+        self._live: Dict[str, LiveCatalog] = {}
+
+    def register(self, resource: CachedResource) -> None:
+        self._resources[resource.name] = resource
+
+    def attach(self, name: str, catalog: LiveCatalog) -> None:
+        """Serve `name` from a live catalog instead of the TTL cache"""
+        self._live[name] = catalog
+        self._resources.pop(name, None)
+
+    def get(self, name: str) -> CatalogEntry:
+        """Return the cached catalog, refreshing it according to its TTL"""
+        if name in self._live:
+            return self._live[name].get()
+        resource = self._resources[name]
+        entry = resource.entry
+
+        if entry is not None:
+            age = entry.age()
+            if age < resource.ttl:
+                resource.hits += 1
+                return entry
+            if age < resource.stale_ttl:
+                resource.stale_hits += 1
+                self._refresh_in_background(resource)
+                return entry
+
+        resource.misses += 1
+        with resource._lock:
+            # Another request may have refreshed the catalog while we were waiting
+            if resource.entry is not None and resource.entry.age() < resource.ttl:
+                return resource.entry
+            try:
+                return self._refresh(resource)
+            except Exception as e:
+                if resource.entry is None:
+                    raise
+                logger.warning(f"Refreshing {name} catalog failed, serving stale copy: {e}")
+                return resource.entry
+
+    def invalidate(self, name: Optional[str] = None) -> List[str]:
+        """Drop one catalog (or all of them) so the next read fetches from the backend"""
+        names = [name] if name else [*self._resources, *self._live]
+        for n in names:
+            if n in self._live:
+                self._live[n].invalidate()
+            elif n in self._resources:
+                self._resources[n].entry = None
+            else:
+                raise KeyError(f"Unknown catalog: {n}")
+            logger.info(f"Invalidated {n} catalog cache")
+        return names
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            **{name: resource.status() for name, resource in self._resources.items()},
+            **{name: catalog.status() for name, catalog in self._live.items()}
+        }
+
+    def _refresh_in_background(self, resource: CachedResource) -> None:
+        with resource._state_lock:
+            if resource._refreshing:
+                return
+            resource._refreshing = True
+
+        def _run():
+            try:
+                with resource._lock:
+                    self._refresh(resource)
+            except Exception as e:
+                logger.warning(f"Background refresh of {resource.name} catalog failed: {e}")
+            finally:
+                resource._refreshing = False
+
+        threading.Thread(target=_run, name=f"catalog-refresh-{resource.name}", daemon=True).start()
+
+    def _refresh(self, resource: CachedResource) -> CatalogEntry:
+        """Fetch and parse a catalog. Must be called with the resource lock held."""
+        current = resource.entry
+        fetched = resource.fetch(current.etag if current is not None else None)
+        if fetched.not_modified and current is not None:
+            resource.not_modified += 1
+            current.fetched_at = time.monotonic()
+            return current
+
+        etag = fetched.etag
+        version = etag or fetched.content_hash or ""
+
+        if current is not None and current.version == version:
+            current.fetched_at = time.monotonic()
+            return current
+
+        with timed(f"catalog.parse_{resource.name}"):
+            value = resource.parse(fetched.payload)
+        entry = CatalogEntry(
+            value=value,
+            version=version,
+            etag=etag,
+            fetched_at=time.monotonic()
+        )
+        resource.entry = entry
+        logger.info(f"Refreshed {resource.name} catalog (version {version})")
+        return entry
+
+
+# =====================
+# CATALOG PARSERS
+# =====================
+
+def parse_skills(payload: Dict[str, Any]) -> SkillMatcher:
+    skills = []
+    for skill_item in payload.get("data", {}).get("skills", []):
+        try:
+            skills.append(Skill.model_validate(skill_item))
+        except ValidationError as e:
+            logger.warning(f"Skipping invalid skill record: {skill_item}, error: {str(e)}")
+    return SkillMatcher(skills)
+
+
+def parse_technicians(payload: Dict[str, Any]) -> TechnicianSkillIndex:
+    return TechnicianSkillIndex.from_payload(payload.get("data", {}).get("technicians", []))
+
+
+def build_catalog_cache(client: BackendClient, env: Mapping[str, str]) -> CatalogCache:
+    """Create the cache for the skills and technicians catalogs from environment settings"""
+    cache = CatalogCache()
+    cache.register(CachedResource(
+        name="skills",
+        fetch=client.get_skills,
+        parse=parse_skills,
+        ttl=float(env.get("SKILLS_CACHE_TTL", 3600)),
+        stale_ttl=float(env.get("SKILLS_CACHE_STALE_TTL", 86400))
+    ))
+    cache.register(CachedResource(
+        name="technicians",
+        fetch=client.get_technicians,
+        parse=parse_technicians,
+        ttl=float(env.get("TECHNICIANS_CACHE_TTL", 30)),
+        stale_ttl=float(env.get("TECHNICIANS_CACHE_STALE_TTL", 300))
+    ))
+    return cache
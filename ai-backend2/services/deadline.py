@@ -0,0 +1,74 @@
+"""
+Request deadlines - End-to-end time budget of a request, carried in a context variable so every
+stage (catalog fetches, LLM admission and calls, backend requests) sees what is left of it
+"""
+import contextlib
+import contextvars
+import time
+from typing import Iterator, Mapping, Optional
+
+# Remaining budget in milliseconds, accepted from callers and forwarded to the backend
+DEADLINE_HEADER = "X-Request-Deadline-Ms"
+
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("request_deadline", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    """The request's deadline passed before a stage could finish"""
+
+
+@contextlib.contextmanager
+def deadline_scope(seconds: Optional[float]) -> Iterator[None]:
+    """
+    Run the block (and threads and tasks started from it) under a deadline `seconds` from now.
+    An enclosing, earlier deadline stays in force; None leaves the current deadline as is.
+    """
+    if seconds is None:
+        yield
+        return
+    deadline = time.monotonic() + max(seconds, 0.0)
+    current = _deadline.get()
+    token = _deadline.set(deadline if current is None else min(current, deadline))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """Seconds left until the current deadline (may be negative), or None without one"""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def budget(cap: Optional[float] = None) -> Optional[float]:
+    """Time a stage may take: its own cap, shortened to what is left of the deadline"""
+    left = remaining()
+    if left is None:
+        return cap
+    left = max(left, 0.0)
+    return left if cap is None else min(cap, left)
+
+
+def check() -> None:
+    """Raise DeadlineExceeded if the current deadline has passed"""
+    left = remaining()
+    if left is not None and left <= 0:
+        raise DeadlineExceeded("Request deadline exceeded")
+
+
+def from_headers(headers: Mapping[str, str], default: Optional[float] = None) -> Optional[float]:
+    """Budget in seconds from the deadline header, else `default`; invalid values are ignored"""
+    value = headers.get(DEADLINE_HEADER)
+    if value:
+        try:
+            return max(float(value), 0.0) / 1000.0
+        except ValueError:
+            pass
+    return default
+
+
+def header_value() -> Optional[str]:
+    """Deadline header value for an outgoing request, or None without a deadline"""
+    left = remaining()
+    return None if left is None else str(max(int(left * 1000), 0))
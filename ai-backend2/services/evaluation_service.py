@@ -1,7 +1,23 @@
+import contextvars
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime
-from typing import Dict, List, Any, Union
+from typing import Callable, Dict, List, Any, Optional, Union
 from pydantic import BaseModel
-import requests
+from services import deadline
+from services.backend_client import BackendClient, get_backend_client
+from services.metrics import timed
+from services.prompts import (
+    FEEDBACK_SENTIMENT_BATCH_PROMPT,
+    FEEDBACK_SENTIMENT_PROMPT,
+    SKILL_EVALUATION_PROMPT,
+    registry as prompt_registry,
+)
+from services.sentiment_scorer import LexiconSentimentScorer
+from services.structured_output import StructuredOutputError, invoke_structured
+
+logger = logging.getLogger(__name__)
 
 
 class SkillEvaluation(BaseModel):
@@ -18,6 +34,31 @@ class SkillMetric(BaseModel):
 class SentimentResult(BaseModel):
     score: float
     reasoning: str
+    source: str = "llm"  # "local", "llm", "none" (no feedback) or "fallback"
+
+
+class SentimentAnalysis(BaseModel):
+    """LLM answer of the feedback sentiment prompt"""
+    score: float
+    reasoning: str
+
+
+class FeedbackSentimentAnalysis(SentimentAnalysis):
+    feedback: int  # Number of the feedback in the batch prompt
+
+
+class SentimentBatchAnalysis(BaseModel):
+    """LLM answer of the batch feedback sentiment prompt"""
+    results: List[FeedbackSentimentAnalysis]
+
+
+class SkillAssessment(SkillMetric):
+    skill: str
+
+
+class SkillEvaluationAnalysis(BaseModel):
+    """LLM answer of the skill evaluation prompt"""
+    skills: List[SkillAssessment]
 
 
 class MetricsResult(BaseModel):
@@ -25,28 +66,125 @@ class MetricsResult(BaseModel):
     sla_adherence: bool
     skill_metrics: Dict[str, SkillMetric]  # Format: {"skill_id": {"score": float, "reasoning": str}}
     feedback_sentiment: SentimentResult  # Format: {"score": float, "reasoning": str}
+    degraded_analyses: List[str] = []  # Analyses that failed or timed out and used a fallback
 
     class Config:
         arbitrary_types_allowed = True
 
 
 class EvaluationService:
-    def __init__(self, llm, technician_api_url="http://localhost:3000/api"):
+    def __init__(self, llm, technician_api_url="http://localhost:3000/api",
+                 backend_client: Optional[BackendClient] = None,
+                 llm_timeout: float = 30.0, max_workers: int = 8,
+                 sentiment_scorer: Optional[LexiconSentimentScorer] = None,
+                 local_sentiment_min_confidence: float = 0.75,
+                 local_sentiment_max_words: int = 40,
+                 on_skills_updated: Optional[Callable[[int, List[Dict]], Any]] = None):
         self.llm = llm
         self.technician_api_url = technician_api_url
+        self.backend_client = backend_client or get_backend_client()
+        self.llm_timeout = llm_timeout
+        # Shared by all requests; each evaluation runs its two LLM analyses side by side
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="evaluation-llm")
+
+        # Short, unambiguous feedback is scored locally; the rest escalates to the LLM
+        self.sentiment_scorer = sentiment_scorer
+        self.local_sentiment_min_confidence = local_sentiment_min_confidence
+        self.local_sentiment_max_words = local_sentiment_max_words
+        self._routing_lock = threading.Lock()
+        self._sentiment_routing = {"local": 0, "llm": 0, "no_feedback": 0}
+        self._sentiment_escalations = {"low_confidence": 0, "long_feedback": 0}
+
+        # Receives (technician_id, skills) whenever updated skill scores are computed,
+        # e.g. to apply them to the technician state store right away
+        self.on_skills_updated = on_skills_updated
+
+    def fetch_current_skills(self, technician_id: int) -> List[Dict]:
+        """Fetch the technician's current skill scores from the backend"""
+        technician_data = self.backend_client.get_technician(technician_id)
+        return technician_data.get("technician_skills", [])
+
+    def evaluate_ticket(self, ticket_data: Dict, technician_id: int) -> Dict[str, Any]:
+        """Evaluate one resolved ticket and compute the technician's updated skills"""
+        metrics = self.calculate_metrics(ticket_data)
+        current_skills = self.fetch_current_skills(technician_id)
+        skill_updates = self.update_technician_skills(
+            technician_id=technician_id,
+            current_skills=current_skills,
+            ticket_metrics=metrics
+        )
+        self.publish_skill_updates(skill_updates)
+
+        return {
+            "ticket_id": ticket_data.get("id"),
+            "technician_id": technician_id,
+            "evaluation": {
+                "resolution_time_minutes": metrics.resolution_time,
+                "sla_adherence": metrics.sla_adherence,
+                "feedback_sentiment": {
+                    "score": metrics.feedback_sentiment.score,
+                    "reasoning": metrics.feedback_sentiment.reasoning,
+                    "source": metrics.feedback_sentiment.source
+                },
+                "skill_performance": {
+                    skill_id: {
+                        "score": metric.score,
+                        "reasoning": metric.reasoning
+                    }
+                    for skill_id, metric in metrics.skill_metrics.items()
+                },
+                "degraded_analyses": metrics.degraded_analyses
+            },
+            "skill_updates": skill_updates,
+            "prompt_versions": prompt_registry.versions(FEEDBACK_SENTIMENT_PROMPT.name, SKILL_EVALUATION_PROMPT.name)
+        }
+
+    def publish_skill_updates(self, skill_updates: Dict) -> None:
+        """Hand computed skill scores to the `on_skills_updated` listener, if any"""
+        if self.on_skills_updated is None:
+            return
+        try:
+            self.on_skills_updated(skill_updates["technician_id"], skill_updates["skills"])
+        except Exception as e:
+            logger.warning(f"Skill update listener failed for technician {skill_updates['technician_id']}: {e}")
 
-    def calculate_metrics(self, ticket_data: Dict) -> MetricsResult:
-        """Calculate all metrics for a resolved ticket"""
+    def calculate_metrics(self, ticket_data: Dict,
+                          feedback_sentiment: Optional[Dict[str, Union[float, str]]] = None) -> MetricsResult:
+        """Calculate all metrics for a resolved ticket.
+        A precomputed `feedback_sentiment` (e.g. from analyze_feedback_batch) skips the sentiment LLM call"""
         resolution_time = self._calculate_resolution_time(ticket_data)
         sla_target = self._get_sla_target(ticket_data.get('priority', 'medium'))
         sla_adherence = resolution_time <= sla_target if resolution_time else True
 
-        skill_metrics_raw = self._analyze_skill_performance(ticket_data)
-        feedback_sentiment_dict = self._analyze_feedback_sentiment(ticket_data)
+        # The two LLM analyses are independent, so run them concurrently under one shared
+        # deadline: whatever is not done when the LLM timeout passes degrades, and their
+        # LLM calls are not admitted after it
+        # (run in a copy of the caller's context so their stage timings reach the request breakdown)
+        with deadline.deadline_scope(self.llm_timeout):
+            skill_future = self._executor.submit(contextvars.copy_context().run, self._analyze_skill_performance, ticket_data)
+            sentiment_future = None
+            if feedback_sentiment is None:
+                sentiment_future = self._executor.submit(
+                    contextvars.copy_context().run, self._analyze_feedback_sentiment, ticket_data
+                )
+            timeout = deadline.budget()
+        wait([future for future in (skill_future, sentiment_future) if future is not None], timeout=timeout)
+
+        degraded_analyses = []
+        skill_metrics_raw = self._analysis_result(
+            skill_future, "skill_performance", degraded_analyses, fallback=dict
+        )
+        feedback_sentiment_dict = feedback_sentiment
+        if sentiment_future is not None:
+            feedback_sentiment_dict = self._analysis_result(
+                sentiment_future, "feedback_sentiment", degraded_analyses,
+                fallback=lambda: {"score": 0.0, "reasoning": "Sentiment analysis unavailable", "source": "fallback"}
+            )
 
         feedback_sentiment = SentimentResult(
             score=float(feedback_sentiment_dict["score"]),
-            reasoning=str(feedback_sentiment_dict["reasoning"])
+            reasoning=str(feedback_sentiment_dict["reasoning"]),
+            source=str(feedback_sentiment_dict.get("source", "llm"))
         )
 
         # Convert dict values to SkillMetric objects
@@ -59,9 +197,67 @@ class EvaluationService:
             resolution_time=resolution_time,
             sla_adherence=sla_adherence,
             skill_metrics=skill_metrics,
-            feedback_sentiment=feedback_sentiment
+            feedback_sentiment=feedback_sentiment,
+            degraded_analyses=degraded_analyses
         )
 
+    def _analysis_result(self, future, name: str, degraded_analyses: List[str], fallback: Callable[[], Any]) -> Any:
+        """Result of an analysis that was waited for, degrading to `fallback()` when it failed or is not done"""
+        if not future.done():
+            logger.warning(f"{name} analysis timed out after {self.llm_timeout}s")
+            # Drops it if it has not started yet; a running LLM call cannot be interrupted
+            future.cancel()
+        else:
+            try:
+                return future.result()
+            except Exception as e:
+                logger.warning(f"{name} analysis failed: {e}")
+        degraded_analyses.append(name)
+        return fallback()
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait)
+
+    def _route_sentiment(self, feedback: Optional[str]) -> Optional[Dict[str, Union[float, str]]]:
+        """Score feedback locally when the scorer is confident enough.
+        Returns None when the feedback has to go to the LLM"""
+        if not feedback:
+            self._record_routing("no_feedback")
+            return {"score": 0.0, "reasoning": "No feedback provided", "source": "none"}
+        if self.sentiment_scorer is None:
+            self._record_routing("llm")
+            return None
+
+        with timed("evaluation.sentiment_local"):
+            local = self.sentiment_scorer.score(str(feedback))
+        if local.word_count > self.local_sentiment_max_words:
+            self._record_routing("llm", escalation="long_feedback")
+            return None
+        if local.confidence < self.local_sentiment_min_confidence:
+            self._record_routing("llm", escalation="low_confidence")
+            return None
+
+        self._record_routing("local")
+        return {"score": local.score, "reasoning": local.reasoning, "source": "local"}
+
+    def _record_routing(self, route: str, escalation: Optional[str] = None) -> None:
+        with self._routing_lock:
+            self._sentiment_routing[route] += 1
+            if escalation:
+                self._sentiment_escalations[escalation] += 1
+
+    def sentiment_routing_stats(self) -> Dict[str, Any]:
+        """Where feedback sentiment was scored, and the share of LLM calls avoided"""
+        with self._routing_lock:
+            routing = dict(self._sentiment_routing)
+            escalations = dict(self._sentiment_escalations)
+        scored = routing["local"] + routing["llm"]
+        return {
+            **routing,
+            "escalations": escalations,
+            "llm_calls_avoided_rate": round(routing["local"] / scored, 4) if scored else 0.0
+        }
+
     def _calculate_resolution_time(self, ticket_data: Dict) -> int:
         """Calculate resolution time in minutes"""
         try:
@@ -83,7 +279,7 @@ class EvaluationService:
                 return int((end_time - start_time).total_seconds() / 60)
             return 0
         except (ValueError, KeyError, AttributeError) as e:
-            print(f"Error calculating resolution time: {e}")
+            logger.warning(f"Error calculating resolution time: {e}")
             return 0
 
     def _get_sla_target(self, priority: str) -> int:
@@ -98,54 +294,63 @@ class EvaluationService:
         return sla_targets.get(priority.lower(), 480)
 
     def _analyze_feedback_sentiment(self, ticket_data: Dict) -> Dict[str, Union[float, str]]:
-        """Analyze user feedback sentiment using LLM
-        Returns dict with score (-100 to 100) and reasoning"""
+        """Analyze user feedback sentiment, locally when confident and otherwise using LLM
+        Returns dict with score (-100 to 100), reasoning and source"""
         feedback = ticket_data.get('feedback')
-        if not feedback:
-            return {"score": 0.0, "reasoning": "No feedback provided"}
-
-        prompt = f"""Analyze the sentiment of this user feedback and provide:
-1. A score from -100 to 100:
-   -100: Extremely negative
-   -50: Moderately negative
-   0: Neutral
-   50: Moderately positive
-   100: Extremely positive
-
-2. A brief explanation for the score (max 50 words)
-
-User Feedback: {feedback}
+        routed = self._route_sentiment(feedback)
+        if routed is not None:
+            return routed
 
-Format your response as:
-SCORE: <number>
-REASON: <explanation>"""
+        prompt = FEEDBACK_SENTIMENT_PROMPT.format(feedback=feedback)
 
         try:
-            response = self.llm.invoke(prompt).content
-            lines = [line.strip() for line in response.split('\n') if line.strip()]
-            
-            score_line = None
-            reason_line = None
-            
-            for line in lines:
-                if line.startswith('SCORE:'):
-                    score_line = line
-                elif line.startswith('REASON:'):
-                    reason_line = line
-            
-            if not score_line or not reason_line:
-                return {"score": 0.0, "reasoning": "Unable to parse LLM response"}
-            
-            sentiment_score = float(score_line.replace('SCORE:', '').strip())
-            reasoning = reason_line.replace('REASON:', '').strip()
-            
+            analysis = invoke_structured(self.llm, prompt, SentimentAnalysis, "evaluation.sentiment")
             return {
-                "score": max(-100, min(100, sentiment_score)),
-                "reasoning": reasoning
+                "score": max(-100, min(100, analysis.score)),
+                "reasoning": analysis.reasoning,
+                "source": "llm"
             }
+        except StructuredOutputError as e:
+            logger.warning(f"Unparseable feedback sentiment from LLM: {e}")
+            return {"score": 0.0, "reasoning": "Unable to parse LLM response", "source": "fallback"}
         except (ValueError, TypeError, IndexError, AttributeError) as e:
-            print(f"Error analyzing feedback sentiment: {e}")
-            return {"score": 0.0, "reasoning": "Error analyzing feedback"}
+            logger.error(f"Error analyzing feedback sentiment: {e}")
+            return {"score": 0.0, "reasoning": "Error analyzing feedback", "source": "fallback"}
+
+    def analyze_feedback_batch(self, feedbacks: List[Optional[str]]) -> List[Dict[str, Union[float, str]]]:
+        """Analyze many feedback strings, escalating those not scored locally in a single LLM call
+        Returns one dict with score (-100 to 100), reasoning and source per feedback, in input order"""
+        results: List[Optional[Dict[str, Union[float, str]]]] = [
+            self._route_sentiment(feedback) for feedback in feedbacks
+        ]
+        numbered = [(i, feedback) for i, feedback in enumerate(feedbacks) if results[i] is None]
+        if not numbered:
+            return results
+
+        feedback_block = '\n'.join(
+            f"FEEDBACK {n}: {' '.join(str(feedback).split())}" for n, (_, feedback) in enumerate(numbered, start=1)
+        )
+        prompt = FEEDBACK_SENTIMENT_BATCH_PROMPT.format(feedback_block=feedback_block)
+
+        try:
+            analysis = invoke_structured(self.llm, prompt, SentimentBatchAnalysis, "evaluation.sentiment_batch")
+        except StructuredOutputError as e:
+            logger.warning(f"Unparseable feedback batch sentiment from LLM: {e}")
+            analysis = SentimentBatchAnalysis(results=[])
+        except Exception as e:
+            logger.error(f"Error analyzing feedback batch: {e}")
+            for i, _ in numbered:
+                results[i] = {"score": 0.0, "reasoning": "Error analyzing feedback", "source": "fallback"}
+            return results
+
+        parsed = {entry.feedback: entry for entry in analysis.results}
+        for n, (i, _) in enumerate(numbered, start=1):
+            entry = parsed.get(n)
+            if entry is not None:
+                results[i] = {"score": max(-100, min(100, entry.score)), "reasoning": entry.reasoning, "source": "llm"}
+            else:
+                results[i] = {"score": 0.0, "reasoning": "Unable to parse LLM response", "source": "fallback"}
+        return results
 
     def _analyze_skill_performance(self, ticket_data: Dict) -> Dict[str, Dict[str, Union[float, str]]]:
         """Analyze skill performance using LLM"""
@@ -159,54 +364,21 @@ REASON: <explanation>"""
         work_logs = ticket_data.get('work_logs', [])
         work_logs_text = '\n'.join([f"- {log.get('description', '')}" for log in work_logs]) if work_logs else "No work logs"
 
-        prompt = f"""Analyze this ticket resolution and rate the demonstrated skill levels:
-
-Ticket Subject: {ticket_data.get('subject', '')}
-Description: {ticket_data.get('description', '')}
-Work Logs: 
-{work_logs_text}
-
-For each required skill [{skills_list}], provide:
-1. Skill proficiency score (0-100)
-2. Brief justification (max 50 words)
-
-Format each skill as:
-SKILL: <skill_name>
-SCORE: <number>
-REASON: <justification>
-"""
+        prompt = SKILL_EVALUATION_PROMPT.format(
+            subject=ticket_data.get('subject', ''),
+            description=ticket_data.get('description', ''),
+            work_logs=work_logs_text,
+            skills=skills_list
+        )
 
         try:
-            analysis = self.llm.invoke(prompt).content
-            skill_evaluations = {}
-            current_skill = None
-            current_data = {}
-
-            for line in analysis.split('\n'):
-                line = line.strip()
-                if not line:
-                    continue
-
-                if line.startswith('SKILL:'):
-                    if current_skill and current_data:
-                        skill_evaluations[current_skill] = current_data
-                    current_skill = line.replace('SKILL:', '').strip()
-                    current_data = {}
-                elif line.startswith('SCORE:'):
-                    try:
-                        current_data['score'] = float(line.replace('SCORE:', '').strip())
-                    except ValueError:
-                        current_data['score'] = 50.0
-                elif line.startswith('REASON:'):
-                    current_data['reasoning'] = line.replace('REASON:', '').strip()
-
-            # Add the last skill if exists
-            if current_skill and current_data:
-                skill_evaluations[current_skill] = current_data
-
-            return skill_evaluations
+            analysis = invoke_structured(self.llm, prompt, SkillEvaluationAnalysis, "evaluation.skill")
+            return {
+                assessment.skill: {"score": assessment.score, "reasoning": assessment.reasoning}
+                for assessment in analysis.skills
+            }
         except Exception as e:
-            print(f"Error analyzing skill performance: {e}")
+            logger.error(f"Error analyzing skill performance: {e}")
             return {}
 
     def update_technician_skills(self, technician_id: int,
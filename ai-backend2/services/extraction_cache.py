@@ -0,0 +1,243 @@
+"""
+Skill extraction cache - Two-tier response cache in front of the skill-extraction LLM call.
+The exact tier is keyed on a normalized hash of the ticket content; the similarity tier
+matches near-identical tickets through MinHash signatures with LSH banding.
+"""
+import hashlib
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Dict, List, Mapping, Optional, Set, Tuple
+import numpy as np
+from models.ticket import Ticket
+
+if TYPE_CHECKING:
+    from services.skill_extraction import SkillExtractionResponse
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+_MAX_HASH = np.uint64(0xFFFFFFFFFFFFFFFF)
+
+
+def normalize_text(text: Optional[str]) -> str:
+    return " ".join(_TOKEN_PATTERN.findall((text or "").lower()))
+
+
+def catalog_fingerprint(available_skills: List[str]) -> str:
+    """Version of a skills catalog derived from its contents"""
+    return hashlib.sha1("\n".join(sorted(available_skills)).encode("utf-8")).hexdigest()
+
+
+class _CacheEntry:
+    __slots__ = ("key", "catalog_version", "result", "signature", "bands", "stored_at")
+
+    def __init__(self, key: str, catalog_version: str, result: "SkillExtractionResponse",
+                 signature: np.ndarray, bands: List[Tuple], stored_at: float):
+        self.key = key
+        self.catalog_version = catalog_version
+        self.result = result
+        self.signature = signature
+        self.bands = bands
+        self.stored_at = stored_at
+
+
+class SkillExtractionCache:
+    """
+    LRU + TTL cache of skill extraction results.
+
+    - exact tier: sha256 of the normalized subject, description, tags and catalog version
+    - similarity tier: MinHash over word unigrams and bigrams; a cached result is reused
+      when the estimated Jaccard similarity reaches `similarity_threshold`
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 5000,
+        ttl: float = 3600,
+        similarity_threshold: float = 0.8,
+        num_permutations: int = 64,
+        band_size: int = 4,
+        similarity_enabled: bool = True
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.similarity_threshold = similarity_threshold
+        self.similarity_enabled = similarity_enabled
+        self.band_size = band_size
+        self.num_permutations = num_permutations - num_permutations % band_size
+
+        rng = np.random.default_rng(0x5EED)
+        self._perm_a = rng.integers(1, _MAX_HASH, size=self.num_permutations, dtype=np.uint64) | np.uint64(1)
+        self._perm_b = rng.integers(0, _MAX_HASH, size=self.num_permutations, dtype=np.uint64)
+
+        self._entries: "OrderedDict[str, _CacheEntry]" = OrderedDict()
+        self._buckets: Dict[Tuple, Set[str]] = {}
+        self._lock = threading.Lock()
+
+        self.exact_hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @classmethod
+    def from_env(cls, env: Mapping[str, str]) -> "SkillExtractionCache":
+        return cls(
+            max_entries=int(env.get("EXTRACTION_CACHE_MAX_ENTRIES", 5000)),
+            ttl=float(env.get("EXTRACTION_CACHE_TTL", 3600)),
+            similarity_threshold=float(env.get("EXTRACTION_CACHE_SIMILARITY_THRESHOLD", 0.8)),
+            similarity_enabled=env.get("EXTRACTION_CACHE_SIMILARITY", "true").lower() == "true"
+        )
+
+    # =====================
+    # KEYS AND SIGNATURES
+    # =====================
+
+    def exact_key(self, ticket: Ticket, catalog_version: str) -> str:
+        tags = ",".join(sorted(normalize_text(tag) for tag in ticket.tags or []))
+        material = "\x1f".join([
+            catalog_version,
+            normalize_text(ticket.subject),
+            normalize_text(ticket.description),
+            tags
+        ])
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def shingles(self, ticket: Ticket) -> Set[str]:
+        words = normalize_text(f"{ticket.subject} {ticket.description} {' '.join(ticket.tags or [])}").split()
+        return set(words) | {f"{a} {b}" for a, b in zip(words, words[1:])}
+
+    def signature(self, ticket: Ticket, shingles: Optional[Set[str]] = None) -> np.ndarray:
+        shingles = self.shingles(ticket) if shingles is None else shingles
+        if not shingles:
+            return np.full(self.num_permutations, _MAX_HASH, dtype=np.uint64)
+
+        hashes = np.fromiter(
+            (int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "little") for s in shingles),
+            dtype=np.uint64,
+            count=len(shingles)
+        )
+        # Universal hashing modulo 2^64 (uint64 wrap-around is intentional)
+        with np.errstate(over="ignore"):
+            permuted = self._perm_a[:, None] * hashes[None, :] + self._perm_b[:, None]
+        return permuted.min(axis=1)
+
+    def _bands(self, signature: np.ndarray, catalog_version: str) -> List[Tuple]:
+        return [
+            (catalog_version, i, signature[i:i + self.band_size].tobytes())
+            for i in range(0, self.num_permutations, self.band_size)
+        ]
+
+    # =====================
+    # LOOKUP AND STORE
+    # =====================
+
+    def get(self, ticket: Ticket, catalog_version: str) -> Tuple[Optional["SkillExtractionResponse"], str]:
+        """Look a ticket up; returns (result, tier) where tier is 'exact', 'similar' or 'miss'"""
+        shingles = self.shingles(ticket)
+        if not shingles:
+            # Tickets without any words all look alike; never serve them from the cache
+            with self._lock:
+                self.misses += 1
+            return None, "miss"
+
+        key = self.exact_key(ticket, catalog_version)
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry.stored_at >= self.ttl:
+                self._remove(key)
+            elif entry is not None:
+                self._entries.move_to_end(key)
+                self.exact_hits += 1
+                return entry.result.model_copy(deep=True), "exact"
+
+        if self.similarity_enabled:
+            signature = self.signature(ticket, shingles)
+            with self._lock:
+                best, best_similarity = None, 0.0
+                candidates = set()
+                for band in self._bands(signature, catalog_version):
+                    candidates |= self._buckets.get(band, set())
+                for candidate_key in candidates:
+                    candidate = self._entries.get(candidate_key)
+                    if candidate is None:
+                        continue
+                    if now - candidate.stored_at >= self.ttl:
+                        self._remove(candidate_key)
+                        continue
+                    similarity = float(np.mean(candidate.signature == signature))
+                    if similarity > best_similarity:
+                        best, best_similarity = candidate, similarity
+
+                if best is not None and best_similarity >= self.similarity_threshold:
+                    self._entries.move_to_end(best.key)
+                    self.similar_hits += 1
+                    logger.info(f"Skill extraction cache similarity hit ({best_similarity:.2f})")
+                    return best.result.model_copy(deep=True), "similar"
+
+        with self._lock:
+            self.misses += 1
+        return None, "miss"
+
+    def put(self, ticket: Ticket, catalog_version: str, result: "SkillExtractionResponse") -> None:
+        shingles = self.shingles(ticket)
+        if not shingles:
+            return
+
+        key = self.exact_key(ticket, catalog_version)
+        signature = self.signature(ticket, shingles) if self.similarity_enabled else np.empty(0, dtype=np.uint64)
+        bands = self._bands(signature, catalog_version) if self.similarity_enabled else []
+        now = time.monotonic()
+
+        with self._lock:
+            self._remove(key)
+            self._sweep(now)
+            self._entries[key] = _CacheEntry(
+                key, catalog_version, result.model_copy(deep=True), signature, bands, now
+            )
+            for band in bands:
+                self._buckets.setdefault(band, set()).add(key)
+
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._buckets.clear()
+
+    def _sweep(self, now: float) -> None:
+        """Drop expired entries from the least recently used end (caller holds the lock)"""
+        while self._entries:
+            oldest = next(iter(self._entries.values()))
+            if now - oldest.stored_at < self.ttl:
+                break
+            self._remove(oldest.key)
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for band in entry.bands:
+            bucket = self._buckets.get(band)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._buckets[band]
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.exact_hits + self.similar_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "exact_hits": self.exact_hits,
+            "similar_hits": self.similar_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round((self.exact_hits + self.similar_hits) / lookups, 4) if lookups else 0.0,
+        }
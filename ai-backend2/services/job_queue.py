@@ -0,0 +1,433 @@
+"""
+Job queue - SQLite-backed persistent queue and worker pool so assignment and evaluation
+requests can be submitted, processed in the background and polled for their result
+"""
+import hashlib
+import json
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+JOB_STATUSES = ("queued", "running", "succeeded", "failed")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    idempotency_key TEXT UNIQUE,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    result TEXT,
+    error TEXT,
+    callback_url TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    available_at REAL NOT NULL,
+    lease_until REAL,
+    lease_owner TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_claim ON jobs (status, available_at);
+"""
+
+
+def payload_idempotency_key(kind: str, ticket_id: Any, payload: Dict[str, Any]) -> str:
+    """
+    Default idempotency key of a submission: the same ticket with the same payload. A ticket
+    submitted again with changed content (new feedback, reopened) gets a job of its own.
+    """
+    digest = hashlib.sha1(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()[:16]
+    return f"{kind}:{ticket_id}:{digest}"
+
+
+class PermanentJobError(Exception):
+    """Job failure that retrying cannot fix (invalid input, nothing to assign, ...)"""
+
+
+class Job(BaseModel):
+    id: str
+    kind: str
+    status: str
+    attempts: int
+    max_attempts: int
+    idempotency_key: Optional[str] = None
+    payload: Dict[str, Any]
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    callback_url: Optional[str] = None
+    created_at: float
+    updated_at: float
+    lease_owner: Optional[str] = None
+
+    @classmethod
+    def from_row(cls, row: sqlite3.Row) -> "Job":
+        return cls(
+            id=row["id"],
+            kind=row["kind"],
+            status=row["status"],
+            attempts=row["attempts"],
+            max_attempts=row["max_attempts"],
+            idempotency_key=row["idempotency_key"],
+            payload=json.loads(row["payload"]),
+            result=json.loads(row["result"]) if row["result"] else None,
+            error=row["error"],
+            callback_url=row["callback_url"],
+            created_at=row["created_at"],
+            updated_at=row["updated_at"],
+            lease_owner=row["lease_owner"]
+        )
+
+    def public(self) -> Dict[str, Any]:
+        """Job as returned to API clients"""
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "attempts": self.attempts,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at
+        }
+
+
+class JobQueue:
+    """
+    Persistent job queue in a single SQLite file (WAL mode), safe to share between threads
+    and processes; each process opens its own connection on first use. Jobs are claimed
+    with a lease: a job whose worker died is handed out again once its lease expires, and
+    only the current lease owner can record the outcome of an attempt.
+    """
+
+    def __init__(self, path: str, max_attempts: int = 3, lease_seconds: float = 600, retention_seconds: float = 7 * 86400):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.lease_seconds = lease_seconds
+        self.retention_seconds = retention_seconds
+
+        # Opened on first use in each process: a SQLite connection must not cross a fork()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._conn_pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, env: Mapping[str, str]) -> "JobQueue":
+        return cls(
+            path=env.get("JOB_QUEUE_PATH", "jobs.sqlite3"),
+            max_attempts=int(env.get("JOB_MAX_ATTEMPTS", 3)),
+            lease_seconds=float(env.get("JOB_LEASE_SECONDS", 600)),
+            retention_seconds=float(env.get("JOB_RETENTION_SECONDS", 7 * 86400))
+        )
+
+    def submit(
+        self,
+        kind: str,
+        payload: Dict[str, Any],
+        idempotency_key: Optional[str] = None,
+        callback_url: Optional[str] = None
+    ) -> Tuple[Job, bool]:
+        """
+        Enqueue a job; returns (job, created). A job with the same idempotency key is
+        returned as is instead of enqueuing a duplicate, unless it failed permanently,
+        in which case it is queued again.
+        """
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                existing = None
+                if idempotency_key is not None:
+                    existing = conn.execute(
+                        "SELECT * FROM jobs WHERE idempotency_key = ?", (idempotency_key,)
+                    ).fetchone()
+                    if existing is not None and existing["status"] != "failed":
+                        conn.execute("COMMIT")
+                        return Job.from_row(existing), False
+
+                if existing is not None:
+                    job_id = existing["id"]
+                    conn.execute(
+                        "UPDATE jobs SET payload = ?, status = 'queued', attempts = 0, result = NULL, error = NULL, "
+                        "callback_url = ?, updated_at = ?, available_at = ?, lease_until = NULL, lease_owner = NULL WHERE id = ?",
+                        (json.dumps(payload), callback_url, now, now, job_id)
+                    )
+                else:
+                    job_id = uuid.uuid4().hex
+                    conn.execute(
+                        "INSERT INTO jobs (id, kind, idempotency_key, payload, status, max_attempts, callback_url, "
+                        "created_at, updated_at, available_at) VALUES (?, ?, ?, ?, 'queued', ?, ?, ?, ?, ?)",
+                        (job_id, kind, idempotency_key, json.dumps(payload), self.max_attempts, callback_url, now, now, now)
+                    )
+                row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return Job.from_row(row), True
+
+    def claim(self, kinds: Optional[List[str]] = None) -> Optional[Job]:
+        """
+        Atomically take the oldest runnable job (or one whose lease expired) and lease it.
+        A job whose lease expired on its last attempt is failed instead of handed out again,
+        so a job that keeps killing its worker is not retried forever.
+        """
+        now = time.time()
+        kind_filter = f" AND kind IN ({','.join('?' * len(kinds))})" if kinds else ""
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                exhausted = conn.execute(
+                    "UPDATE jobs SET status = 'failed', updated_at = ?, lease_until = NULL, lease_owner = NULL, "
+                    "error = 'Lease expired on attempt ' || attempts || ' of ' || max_attempts || ' (worker lost)' "
+                    "WHERE status = 'running' AND lease_until < ? AND attempts >= max_attempts" + kind_filter,
+                    (now, now, *(kinds or []))
+                ).rowcount
+                if exhausted:
+                    logger.error(f"Failed {exhausted} job(s) whose worker was lost on their last attempt")
+                row = conn.execute(
+                    "SELECT id FROM jobs WHERE ((status = 'queued' AND available_at <= ?) "
+                    "OR (status = 'running' AND lease_until < ? AND attempts < max_attempts))" + kind_filter +
+                    " ORDER BY available_at LIMIT 1",
+                    (now, now, *(kinds or []))
+                ).fetchone()
+                if row is None:
+                    conn.execute("COMMIT")
+                    return None
+                conn.execute(
+                    "UPDATE jobs SET status = 'running', attempts = attempts + 1, updated_at = ?, lease_until = ?, "
+                    "lease_owner = ? WHERE id = ?",
+                    (now, now + self.lease_seconds, uuid.uuid4().hex, row["id"])
+                )
+                claimed = conn.execute("SELECT * FROM jobs WHERE id = ?", (row["id"],)).fetchone()
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return Job.from_row(claimed)
+
+    def complete(self, job: Job, result: Dict[str, Any]) -> bool:
+        """
+        Record the result of the attempt holding `job`'s lease. Returns False when the lease
+        was lost in the meantime (expired and claimed again), in which case nothing is written.
+        """
+        encoded = json.dumps(result)
+        cursor = self._execute(
+            "UPDATE jobs SET status = 'succeeded', result = ?, error = NULL, updated_at = ?, lease_until = NULL, "
+            "lease_owner = NULL WHERE id = ? AND status = 'running' AND lease_owner = ?",
+            (encoded, time.time(), job.id, job.lease_owner)
+        )
+        return cursor.rowcount == 1
+
+    def fail(self, job: Job, error: str, retry_delay: Optional[float] = None) -> bool:
+        """
+        Record a failed attempt: requeue after `retry_delay` seconds, or fail for good when None.
+        Like complete(), only the attempt holding the lease can do so.
+        """
+        now = time.time()
+        if retry_delay is None:
+            cursor = self._execute(
+                "UPDATE jobs SET status = 'failed', error = ?, updated_at = ?, lease_until = NULL, lease_owner = NULL "
+                "WHERE id = ? AND status = 'running' AND lease_owner = ?",
+                (error, now, job.id, job.lease_owner)
+            )
+        else:
+            cursor = self._execute(
+                "UPDATE jobs SET status = 'queued', error = ?, updated_at = ?, available_at = ?, lease_until = NULL, "
+                "lease_owner = NULL WHERE id = ? AND status = 'running' AND lease_owner = ?",
+                (error, now, now + retry_delay, job.id, job.lease_owner)
+            )
+        return cursor.rowcount == 1
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            row = self._connection().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return Job.from_row(row) if row is not None else None
+
+    def purge(self) -> int:
+        """Delete finished jobs older than the retention period"""
+        cursor = self._execute(
+            "DELETE FROM jobs WHERE status IN ('succeeded', 'failed') AND updated_at < ?",
+            (time.time() - self.retention_seconds,)
+        )
+        return cursor.rowcount
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._connection().execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        counts = {status: 0 for status in JOB_STATUSES}
+        counts.update({row["status"]: row["n"] for row in rows})
+        return counts
+
+    def _connection(self) -> sqlite3.Connection:
+        """This process's connection, opened (and the schema created) on first use. Call with the lock held."""
+        if self._conn is None or self._conn_pid != os.getpid():
+            # A connection inherited from the parent process is abandoned, never used or closed
+            self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+            self._conn.row_factory = sqlite3.Row
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+            self._migrate(self._conn)
+            self._conn_pid = os.getpid()
+        return self._conn
+
+    @staticmethod
+    def _migrate(conn: sqlite3.Connection) -> None:
+        """Add the columns introduced after a queue file was first created"""
+        columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+        if "lease_owner" not in columns:
+            try:
+                conn.execute("ALTER TABLE jobs ADD COLUMN lease_owner TEXT")
+            except sqlite3.OperationalError as e:
+                # Another process migrated the file first
+                if "duplicate column" not in str(e):
+                    raise
+
+    def _execute(self, sql: str, params: Tuple) -> sqlite3.Cursor:
+        with self._lock:
+            return self._connection().execute(sql, params)
+
+
+JobHandler = Callable[[Dict[str, Any]], Dict[str, Any]]
+
+
+class JobWorkerPool:
+    """
+    Worker threads draining a JobQueue. Each job kind has a handler taking the job payload
+    and returning its result; failures are retried with jittered exponential backoff up to
+    the job's max attempts, except PermanentJobError which fails the job immediately.
+    """
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        handlers: Dict[str, JobHandler],
+        concurrency: int = 4,
+        poll_interval: float = 0.5,
+        retry_backoff: float = 2.0,
+        callback: Optional[Callable[[Job], None]] = None
+    ):
+        self.queue = queue
+        self.handlers = handlers
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.retry_backoff = retry_backoff
+        self.callback = callback
+
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._last_purge = 0.0
+
+    @property
+    def running(self) -> bool:
+        return any(thread.is_alive() for thread in self._threads)
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._stop.clear()
+        self._threads = [
+            threading.Thread(target=self._run, name=f"job-worker-{i}", daemon=True)
+            for i in range(self.concurrency)
+        ]
+        for thread in self._threads:
+            thread.start()
+        logger.info(f"Started {self.concurrency} job workers")
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop claiming new jobs and wait (up to `timeout` seconds in all) for in-flight ones to finish"""
+        self._stop.set()
+        self._wakeup.set()
+        stop_by = None if timeout is None else time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(None if stop_by is None else max(stop_by - time.monotonic(), 0))
+
+    def notify(self) -> None:
+        """Wake idle workers after a submit instead of waiting for the next poll"""
+        self._wakeup.set()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                job = self.queue.claim(list(self.handlers))
+            except sqlite3.Error as e:
+                logger.error(f"Failed to claim job: {e}")
+                job = None
+
+            if job is None:
+                self._maybe_purge()
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+                continue
+            self._process(job)
+
+    def _process(self, job: Job) -> None:
+        started = time.monotonic()
+        try:
+            result = self.handlers[job.kind](job.payload)
+        except Exception as e:
+            self._record_failure(job, e)
+            return
+
+        # The handler succeeded: from here on nothing may send the job back for another attempt
+        try:
+            completed = self.queue.complete(job, result)
+        except (TypeError, ValueError) as e:
+            self._record_failure(job, PermanentJobError(f"Result is not JSON serializable: {e}"))
+            return
+        except sqlite3.Error as e:
+            logger.error(f"Job {job.id} ({job.kind}) succeeded but its result could not be stored: {e}")
+            return
+        if not completed:
+            logger.warning(f"Job {job.id} ({job.kind}) finished after its lease was lost; result discarded")
+            return
+        logger.info(f"Job {job.id} ({job.kind}) succeeded in {time.monotonic() - started:.2f}s")
+        self._notify(job)
+
+    def _record_failure(self, job: Job, e: Exception) -> None:
+        error = f"{e.__class__.__name__}: {e}"
+        permanent = isinstance(e, PermanentJobError) or job.attempts >= job.max_attempts
+        delay = None if permanent else random.uniform(0, self.retry_backoff * (2 ** job.attempts))
+        try:
+            recorded = self.queue.fail(job, error, retry_delay=delay)
+        except sqlite3.Error as db_error:
+            logger.error(f"Failed to record the failure of job {job.id} ({job.kind}): {db_error}")
+            return
+        if not recorded:
+            logger.warning(f"Job {job.id} ({job.kind}) failed after its lease was lost: {error}")
+        elif permanent:
+            logger.error(f"Job {job.id} ({job.kind}) failed after {job.attempts} attempt(s): {error}")
+            self._notify(job)
+        else:
+            logger.warning(f"Job {job.id} ({job.kind}) attempt {job.attempts} failed ({error}), retrying in {delay:.1f}s")
+
+    def _notify(self, job: Job) -> None:
+        if self.callback is None or not job.callback_url:
+            return
+        try:
+            self.callback(self.queue.get(job.id))
+        except Exception as e:
+            logger.warning(f"Callback for job {job.id} to {job.callback_url} failed: {e}")
+
+    def _maybe_purge(self) -> None:
+        now = time.monotonic()
+        if now - self._last_purge < 600:
+            return
+        self._last_purge = now
+        try:
+            purged = self.queue.purge()
+            if purged:
+                logger.info(f"Purged {purged} finished jobs")
+        except sqlite3.Error as e:
+            logger.warning(f"Failed to purge finished jobs: {e}")
@@ -0,0 +1,160 @@
+"""
+LLM circuit breaker - Stops sending calls to the LLM provider while it is failing or slow, so
+callers fall back to their local paths right away instead of each waiting out the provider
+"""
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Mapping, Tuple
+
+logger = logging.getLogger(__name__)
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+STATE_CODES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class LLMCircuitOpen(RuntimeError):
+    """An LLM call was refused because the circuit breaker is open"""
+
+
+class CircuitBreaker:
+    """
+    Closed: calls go through and their outcomes are kept for `window` seconds. Once the
+    window holds at least `min_calls` outcomes and the share of failed calls (errors and
+    calls slower than `slow_call_seconds`) reaches `failure_rate`, the breaker opens.
+
+    Open: calls are refused with LLMCircuitOpen for `open_seconds`.
+
+    Half-open: up to `half_open_probes` calls at a time are let through as probes; a
+    successful probe closes the breaker, a failed one opens it again.
+    """
+
+    def __init__(
+        self,
+        failure_rate: float = 0.5,
+        min_calls: int = 10,
+        window: float = 60.0,
+        slow_call_seconds: float = 15.0,
+        open_seconds: float = 30.0,
+        half_open_probes: int = 1
+    ):
+        self.failure_rate = failure_rate
+        self.min_calls = max(1, min_calls)
+        self.window = window
+        self.slow_call_seconds = slow_call_seconds
+        self.open_seconds = open_seconds
+        self.half_open_probes = max(1, half_open_probes)
+
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probes = 0
+        self._outcomes: Deque[Tuple[float, bool]] = deque()
+        self._stats = {"rejected": 0, "opened": 0, "closed": 0}
+
+    @classmethod
+    def from_env(cls, env: Mapping[str, str]) -> "CircuitBreaker":
+        return cls(
+            failure_rate=float(env.get("LLM_CIRCUIT_FAILURE_RATE", 0.5)),
+            min_calls=int(env.get("LLM_CIRCUIT_MIN_CALLS", 10)),
+            window=float(env.get("LLM_CIRCUIT_WINDOW", 60)),
+            slow_call_seconds=float(env.get("LLM_CIRCUIT_SLOW_CALL_SECONDS", 15)),
+            open_seconds=float(env.get("LLM_CIRCUIT_OPEN_SECONDS", 30)),
+            half_open_probes=int(env.get("LLM_CIRCUIT_HALF_OPEN_PROBES", 1))
+        )
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state(time.monotonic())
+
+    @property
+    def is_open(self) -> bool:
+        """Whether calls are currently refused (open, or half-open with all probe slots taken)"""
+        with self._lock:
+            state = self._current_state(time.monotonic())
+            return state == OPEN or (state == HALF_OPEN and self._probes >= self.half_open_probes)
+
+    def before_call(self) -> bool:
+        """
+        Admit a call or raise LLMCircuitOpen. Returns whether the call is a half-open probe;
+        hand that flag back to `record` with the call's outcome.
+        """
+        with self._lock:
+            state = self._current_state(time.monotonic())
+            if state == CLOSED:
+                return False
+            if state == HALF_OPEN and self._probes < self.half_open_probes:
+                self._probes += 1
+                return True
+            self._stats["rejected"] += 1
+            remaining = max(self._opened_at + self.open_seconds - time.monotonic(), 0.0)
+        raise LLMCircuitOpen(f"LLM circuit breaker is {state}, retry in {remaining:.1f}s")
+
+    def record(self, ok: bool, seconds: float, probe: bool = False) -> None:
+        """Record the outcome of an admitted call; calls slower than the SLO count as failures"""
+        failed = not ok or seconds >= self.slow_call_seconds
+        now = time.monotonic()
+        with self._lock:
+            if probe:
+                self._probes = max(self._probes - 1, 0)
+                if failed:
+                    self._open(now, "half-open probe failed")
+                else:
+                    self._close()
+                return
+            if self._state != CLOSED:
+                # Late result of a call admitted before the breaker opened
+                return
+
+            self._outcomes.append((now, failed))
+            while self._outcomes and self._outcomes[0][0] < now - self.window:
+                self._outcomes.popleft()
+            if len(self._outcomes) >= self.min_calls:
+                failures = sum(1 for _, f in self._outcomes if f)
+                if failures / len(self._outcomes) >= self.failure_rate:
+                    self._open(now, f"{failures} of the last {len(self._outcomes)} calls failed or were slow")
+
+    def release_probe(self) -> None:
+        """Return a probe slot for a call that ended without an outcome (e.g. cancelled early)"""
+        with self._lock:
+            self._probes = max(self._probes - 1, 0)
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            now = time.monotonic()
+            state = self._current_state(now)
+            failures = sum(1 for t, f in self._outcomes if f and t >= now - self.window)
+            calls = sum(1 for t, _ in self._outcomes if t >= now - self.window)
+            return {
+                "state": state,
+                "window_calls": calls,
+                "window_failures": failures,
+                "failure_rate_threshold": self.failure_rate,
+                "slow_call_seconds": self.slow_call_seconds,
+                "open_seconds": self.open_seconds,
+                "seconds_until_half_open": round(max(self._opened_at + self.open_seconds - now, 0.0), 1)
+                if state == OPEN else None,
+                **self._stats,
+            }
+
+    def _current_state(self, now: float) -> str:
+        if self._state == OPEN and now - self._opened_at >= self.open_seconds:
+            self._state = HALF_OPEN
+            self._probes = 0
+            logger.info("LLM circuit breaker half-open, probing the provider")
+        return self._state
+
+    def _open(self, now: float, reason: str) -> None:
+        self._state = OPEN
+        self._opened_at = now
+        self._outcomes.clear()
+        self._stats["opened"] += 1
+        logger.warning(f"LLM circuit breaker opened ({reason}); using local fallbacks for {self.open_seconds}s")
+
+    def _close(self) -> None:
+        self._state = CLOSED
+        self._outcomes.clear()
+        self._stats["closed"] += 1
+        logger.info("LLM circuit breaker closed, provider recovered")
@@ -0,0 +1,86 @@
+"""
+LLM request hedging - Latency tracking and bookkeeping for hedged LLM calls: when a call has not
+answered within the observed latency quantile, a duplicate is sent and the first valid answer wins
+"""
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, Mapping, Optional, Tuple
+from services.metrics import LLM_HEDGES
+
+_LATENCY_SAMPLES = 500
+
+
+class HedgePolicy:
+    """
+    When to send a hedge and how hedges fare. The hedge delay is the `quantile` of recent
+    answer latencies (clamped to [`min_delay`, `max_delay`]); until `min_samples` latencies
+    are known, calls are not hedged. Only calls in `lanes` are hedged, so background work
+    does not double its load on the provider.
+    """
+
+    def __init__(
+        self,
+        quantile: float = 0.9,
+        min_samples: int = 20,
+        min_delay: float = 0.5,
+        max_delay: float = 30.0,
+        lanes: Tuple[str, ...] = ("critical", "interactive")
+    ):
+        self.quantile = quantile
+        self.min_samples = max(1, min_samples)
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.lanes = lanes
+
+        self._lock = threading.Lock()
+        self._latencies: Deque[float] = deque(maxlen=_LATENCY_SAMPLES)
+        self._stats = {"calls": 0, "hedged": 0, "hedge_won": 0, "primary_won": 0, "both_failed": 0}
+
+    @classmethod
+    def from_env(cls, env: Mapping[str, str]) -> "HedgePolicy":
+        return cls(
+            quantile=float(env.get("LLM_HEDGE_QUANTILE", 0.9)),
+            min_samples=int(env.get("LLM_HEDGE_MIN_SAMPLES", 20)),
+            min_delay=float(env.get("LLM_HEDGE_MIN_DELAY", 0.5)),
+            max_delay=float(env.get("LLM_HEDGE_MAX_DELAY", 30)),
+            lanes=tuple(lane.strip() for lane in env.get("LLM_HEDGE_LANES", "critical,interactive").split(",") if lane.strip())
+        )
+
+    def delay(self, lane: str) -> Optional[float]:
+        """Seconds to wait for an answer before hedging, or None to not hedge this call"""
+        if lane not in self.lanes:
+            return None
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return None
+            ordered = sorted(self._latencies)
+        observed = ordered[min(len(ordered) - 1, int(self.quantile * len(ordered)))]
+        return min(max(observed, self.min_delay), self.max_delay)
+
+    def observe(self, seconds: float) -> None:
+        """Latency until a call's first valid answer"""
+        with self._lock:
+            self._latencies.append(seconds)
+
+    def record(self, lane: str, outcome: Optional[str]) -> None:
+        """Count a call; `outcome` is None when it was not hedged, else hedge_won, primary_won or both_failed"""
+        with self._lock:
+            self._stats["calls"] += 1
+            if outcome is not None:
+                self._stats["hedged"] += 1
+                self._stats[outcome] += 1
+        if outcome is not None:
+            LLM_HEDGES.inc(lane=lane, outcome=outcome)
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            samples = len(self._latencies)
+        calls, hedged = stats["calls"], stats["hedged"]
+        return {
+            "hedge_delay_seconds": self.delay(self.lanes[0]) if self.lanes else None,
+            "latency_samples": samples,
+            "hedge_rate": round(hedged / calls, 4) if calls else 0.0,
+            "hedge_win_rate": round(stats["hedge_won"] / hedged, 4) if hedged else 0.0,
+            **stats,
+        }
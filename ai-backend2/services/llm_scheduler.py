@@ -0,0 +1,555 @@
+"""
+LLM scheduler - Process-wide admission control in front of the Gemini client: token buckets
+for requests/min and tokens/min, a bounded number of in-flight calls, and priority lanes so
+critical tickets go ahead of background evaluation work
+"""
+import asyncio
+import bisect
+import contextlib
+import contextvars
+import itertools
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Tuple
+from langchain_google_genai import ChatGoogleGenerativeAI
+from services import deadline
+from services.deadline import DeadlineExceeded
+from services.llm_circuit import CircuitBreaker, LLMCircuitOpen
+from services.llm_hedging import HedgePolicy
+from services.metrics import LLM_CALLS, LLM_TOKENS, record_stage
+
+logger = logging.getLogger(__name__)
+
+# Lanes in precedence order: a waiting call is admitted before any call of a later lane
+LANES = ("critical", "interactive", "background")
+DEFAULT_LANE = "interactive"
+
+_current_lane: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("llm_lane", default=None)
+
+# Rough prompt size estimate used until the provider reports actual usage
+_CHARS_PER_TOKEN = 4
+_WAIT_SAMPLES = 500
+
+
+class LLMQueueTimeout(TimeoutError):
+    """An LLM call waited longer than the scheduler's queue timeout for admission"""
+
+
+def lane_for_priority(priority: Optional[str]) -> str:
+    return "critical" if (priority or "").lower() == "critical" else "interactive"
+
+
+@contextlib.contextmanager
+def llm_lane(lane: str) -> Iterator[None]:
+    """Run the LLM calls made inside the block (and tasks started from it) in `lane`"""
+    if lane not in LANES:
+        raise ValueError(f"Unknown LLM lane: {lane}")
+    token = _current_lane.set(lane)
+    try:
+        yield
+    finally:
+        _current_lane.reset(token)
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at `per_minute`; a rate of 0 disables it"""
+
+    def __init__(self, per_minute: float, capacity: Optional[float] = None):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity or per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, amount: float, now: float) -> float:
+        """Seconds until `amount` tokens are available (0 when they are)"""
+        if self.rate <= 0:
+            return 0.0
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        return 0.0 if self.tokens >= amount else (amount - self.tokens) / self.rate
+
+    def consume(self, amount: float) -> None:
+        """Take tokens; may go negative to settle usage above the estimate"""
+        if self.rate > 0:
+            self.tokens -= amount
+
+    def drain(self, now: float) -> None:
+        if self.rate > 0:
+            self._refill(now)
+            self.tokens = min(self.tokens, 0.0)
+
+
+class _Waiter:
+    __slots__ = ("rank", "seq", "lane", "tokens")
+
+    def __init__(self, lane: str, tokens: int, seq: int):
+        self.rank = LANES.index(lane)
+        self.seq = seq
+        self.lane = lane
+        self.tokens = tokens
+
+    def __lt__(self, other: "_Waiter") -> bool:
+        return (self.rank, self.seq) < (other.rank, other.seq)
+
+
+class LLMPermit:
+    """An admitted LLM call; hand it back to `LLMScheduler.release` when the call ends"""
+    __slots__ = ("lane", "tokens", "admitted_at")
+
+    def __init__(self, lane: str, tokens: int, admitted_at: float):
+        self.lane = lane
+        self.tokens = tokens
+        self.admitted_at = admitted_at
+
+
+class _PermitHandoff:
+    """
+    Passes a permit granted on a worker thread to the async caller waiting for it. If the
+    caller stops waiting first, the permit goes back to the scheduler as soon as it is granted.
+    """
+    __slots__ = ("scheduler", "lock", "abandoned", "permit")
+
+    def __init__(self, scheduler: "LLMScheduler"):
+        self.scheduler = scheduler
+        self.lock = threading.Lock()
+        self.abandoned = False
+        self.permit: Optional[LLMPermit] = None
+
+    def grant(self, permit: LLMPermit) -> Optional[LLMPermit]:
+        """Called on the worker thread once admitted; None if the caller already left"""
+        with self.lock:
+            if not self.abandoned:
+                self.permit = permit
+                return permit
+        self.scheduler.release(permit)
+        return None
+
+    def abandon(self) -> None:
+        """Called by the caller when it stops waiting, before or after the permit was granted"""
+        with self.lock:
+            self.abandoned = True
+            permit, self.permit = self.permit, None
+        if permit is not None:
+            self.scheduler.release(permit)
+
+
+class _LaneStats:
+    def __init__(self):
+        self.queued = 0
+        self.in_flight = 0
+        self.admitted = 0
+        self.timeouts = 0
+        self.waits: deque = deque(maxlen=_WAIT_SAMPLES)
+
+    def snapshot(self) -> Dict[str, Any]:
+        waits = sorted(self.waits)
+
+        def percentile(p: float) -> float:
+            return round(waits[min(len(waits) - 1, int(p * len(waits)))] * 1000, 1) if waits else 0.0
+
+        return {
+            "queued": self.queued,
+            "in_flight": self.in_flight,
+            "admitted": self.admitted,
+            "timeouts": self.timeouts,
+            "wait_ms_p50": percentile(0.5),
+            "wait_ms_p95": percentile(0.95),
+            "wait_ms_max": round(waits[-1] * 1000, 1) if waits else 0.0
+        }
+
+
+class LLMScheduler:
+    """
+    Admission control shared by every LLM caller in the process.
+
+    A call is admitted when it is the first waiter (in lane precedence, then arrival order)
+    whose lane is under its concurrency cap, a global slot is free, and both token buckets
+    can cover it. The background lane may only use `background_share` of the slots, so
+    interactive and critical calls always find headroom during backfills.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: float = 600,
+        tokens_per_minute: float = 1_000_000,
+        max_concurrency: int = 8,
+        background_share: float = 0.5,
+        queue_timeout: float = 60.0,
+        rate_limit_cooldown: float = 5.0
+    ):
+        self.max_concurrency = max(1, max_concurrency)
+        self.queue_timeout = queue_timeout
+        self.rate_limit_cooldown = rate_limit_cooldown
+        self.lane_limits = {
+            "critical": self.max_concurrency,
+            "interactive": self.max_concurrency,
+            "background": max(1, int(self.max_concurrency * background_share))
+        }
+
+        self._requests = TokenBucket(requests_per_minute)
+        self._tokens = TokenBucket(tokens_per_minute)
+        self._cond = threading.Condition()
+        self._waiting: List[_Waiter] = []
+        self._seq = itertools.count()
+        self._in_flight = 0
+        self._paused_until = 0.0
+        self._rate_limited = 0
+        self._lanes = {lane: _LaneStats() for lane in LANES}
+
+    @classmethod
+    def from_env(cls, env: Mapping[str, str]) -> "LLMScheduler":
+        # The provider's limits are shared by every server process, each with its own scheduler
+        processes = max(1, int(env.get("LLM_SCHEDULER_PROCESSES", 1)))
+        return cls(
+            requests_per_minute=float(env.get("LLM_REQUESTS_PER_MINUTE", 600)) / processes,
+            tokens_per_minute=float(env.get("LLM_TOKENS_PER_MINUTE", 1_000_000)) / processes,
+            max_concurrency=max(1, int(env.get("LLM_MAX_CONCURRENCY", 8)) // processes),
+            background_share=float(env.get("LLM_BACKGROUND_SHARE", 0.5)),
+            queue_timeout=float(env.get("LLM_QUEUE_TIMEOUT", 60)),
+            rate_limit_cooldown=float(env.get("LLM_RATE_LIMIT_COOLDOWN", 5))
+        )
+
+    def acquire(self, lane: str, tokens: int, timeout: Optional[float] = None) -> LLMPermit:
+        """Block until the call may run; raises LLMQueueTimeout after `timeout` seconds"""
+        timeout = self.queue_timeout if timeout is None else timeout
+        started = time.monotonic()
+        deadline = started + timeout
+
+        with self._cond:
+            waiter = _Waiter(lane, tokens, next(self._seq))
+            bisect.insort(self._waiting, waiter)
+            stats = self._lanes[lane]
+            stats.queued += 1
+            try:
+                while True:
+                    now = time.monotonic()
+                    delay = self._admission_delay(waiter, now)
+                    if delay == 0.0:
+                        self._waiting.remove(waiter)
+                        self._requests.consume(1)
+                        self._tokens.consume(tokens)
+                        self._in_flight += 1
+                        stats.in_flight += 1
+                        stats.admitted += 1
+                        stats.waits.append(now - started)
+                        # The next waiter may be admissible too (e.g. another lane)
+                        self._cond.notify_all()
+                        return LLMPermit(lane, tokens, now)
+
+                    if now >= deadline:
+                        self._waiting.remove(waiter)
+                        stats.timeouts += 1
+                        self._cond.notify_all()
+                        raise LLMQueueTimeout(f"LLM call waited {timeout:.1f}s in the {lane} lane without admission")
+                    self._cond.wait(min(deadline - now, delay) if delay is not None else deadline - now)
+            finally:
+                stats.queued -= 1
+
+    def _admission_delay(self, waiter: _Waiter, now: float) -> Optional[float]:
+        """0 to admit now, seconds to wait for rate budget, or None to wait for a release"""
+        if self._in_flight >= self.max_concurrency:
+            return None
+        head = next(
+            (w for w in self._waiting if self._lanes[w.lane].in_flight < self.lane_limits[w.lane]),
+            None
+        )
+        if head is not waiter:
+            return None
+        return max(
+            self._paused_until - now,
+            self._requests.delay(1, now),
+            self._tokens.delay(waiter.tokens, now),
+            0.0
+        )
+
+    def release(self, permit: LLMPermit, used_tokens: Optional[int] = None, rate_limited: bool = False) -> None:
+        with self._cond:
+            self._in_flight -= 1
+            self._lanes[permit.lane].in_flight -= 1
+            if used_tokens is not None:
+                # Settle the estimate against what the provider reported
+                self._tokens.consume(used_tokens - permit.tokens)
+            if rate_limited:
+                # The provider pushed back: stop admitting for a moment instead of failing every caller
+                now = time.monotonic()
+                self._rate_limited += 1
+                self._paused_until = max(self._paused_until, now + self.rate_limit_cooldown)
+                self._requests.drain(now)
+                logger.warning(f"LLM provider rate limit hit, pausing admissions for {self.rate_limit_cooldown}s")
+            self._cond.notify_all()
+
+    def drain(self, timeout: float) -> bool:
+        """Wait until no call is in flight or queued; returns whether that happened within `timeout`"""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self._in_flight or self._waiting:
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    return False
+                self._cond.wait(left)
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "in_flight": self._in_flight,
+                "max_concurrency": self.max_concurrency,
+                "queue_depth": len(self._waiting),
+                "rate_limited": self._rate_limited,
+                "lanes": {lane: stats.snapshot() for lane, stats in self._lanes.items()}
+            }
+
+
+def _is_rate_limit_error(error: Exception) -> bool:
+    text = f"{error.__class__.__name__} {error}"
+    return "ResourceExhausted" in text or "429" in text or "RESOURCE_EXHAUSTED" in text
+
+
+def _used_tokens(response: Any) -> Optional[int]:
+    usage = getattr(response, "usage_metadata", None)
+    if isinstance(usage, dict) and usage.get("total_tokens"):
+        return int(usage["total_tokens"])
+    return None
+
+
+class ScheduledLLM:
+    """
+    Drop-in proxy for the chat model whose `invoke`, `ainvoke` and `stream` go through an
+    LLMScheduler. The lane is taken from the surrounding `llm_lane(...)` block if any,
+    else from the proxy's own default lane. With a circuit breaker, calls are refused with
+    LLMCircuitOpen (before queueing) while the provider is failing.
+
+    Calls honour the request deadline (see `services.deadline`): admission waits and async
+    provider calls are cut off when it passes. With a hedge policy, an async call that has
+    not answered within the observed latency quantile is duplicated (to `fallback_llm` if
+    given) and the first valid answer is returned.
+    """
+
+    def __init__(
+        self,
+        llm: ChatGoogleGenerativeAI,
+        scheduler: LLMScheduler,
+        lane: str = DEFAULT_LANE,
+        expected_output_tokens: int = 256,
+        breaker: Optional[CircuitBreaker] = None,
+        hedging: Optional[HedgePolicy] = None,
+        fallback_llm: Optional[ChatGoogleGenerativeAI] = None
+    ):
+        if lane not in LANES:
+            raise ValueError(f"Unknown LLM lane: {lane}")
+        self.llm = llm
+        self.scheduler = scheduler
+        self.lane = lane
+        self.expected_output_tokens = expected_output_tokens
+        self.breaker = breaker
+        self.hedging = hedging
+        self.fallback_llm = fallback_llm
+
+    def with_lane(self, lane: str) -> "ScheduledLLM":
+        return ScheduledLLM(
+            self.llm, self.scheduler, lane, self.expected_output_tokens, self.breaker, self.hedging, self.fallback_llm
+        )
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.llm, name)
+
+    def _current_lane(self) -> str:
+        return _current_lane.get() or self.lane
+
+    def _estimate_tokens(self, prompt: Any) -> int:
+        return len(str(prompt)) // _CHARS_PER_TOKEN + self.expected_output_tokens
+
+    def _check_breaker(self, lane: str) -> bool:
+        """Raise LLMCircuitOpen while the breaker refuses calls; returns whether the call is a probe"""
+        if self.breaker is None:
+            return False
+        try:
+            return self.breaker.before_call()
+        except LLMCircuitOpen:
+            LLM_CALLS.inc(lane=lane, outcome="circuit_open")
+            raise
+
+    def _admit(self, lane: str, prompt: Any) -> Tuple[LLMPermit, bool]:
+        deadline.check()
+        probe = self._check_breaker(lane)
+        try:
+            return self._acquire(lane, prompt), probe
+        except BaseException:
+            if probe:
+                self.breaker.release_probe()
+            raise
+
+    def _acquire(self, lane: str, prompt: Any) -> LLMPermit:
+        started = time.monotonic()
+        permit = self.scheduler.acquire(
+            lane, self._estimate_tokens(prompt), timeout=deadline.budget(self.scheduler.queue_timeout)
+        )
+        record_stage("llm.queue_wait", time.monotonic() - started)
+        return permit
+
+    def _acquire_for(self, handoff: _PermitHandoff, lane: str, prompt: Any) -> Optional[LLMPermit]:
+        try:
+            permit = self._acquire(lane, prompt)
+        except Exception:
+            with handoff.lock:
+                if handoff.abandoned:
+                    # Nobody is left to see the error
+                    return None
+            raise
+        return handoff.grant(permit)
+
+    def _finish(
+        self,
+        permit: LLMPermit,
+        prompt: Any,
+        response: Any = None,
+        error: Optional[BaseException] = None,
+        probe: bool = False
+    ) -> None:
+        """Release the permit and record the call's outcome, latency and token counts"""
+        rate_limited = isinstance(error, Exception) and _is_rate_limit_error(error)
+        self.scheduler.release(permit, _used_tokens(response), rate_limited=rate_limited)
+        if self.breaker is not None:
+            self._record_breaker_outcome(permit, error, rate_limited, probe)
+
+        if error is None:
+            outcome = "ok"
+        elif not isinstance(error, Exception):
+            # Cancelled by the caller, or a stream closed before its end
+            outcome = "cancelled"
+        else:
+            outcome = "rate_limited" if rate_limited else "error"
+        LLM_CALLS.inc(lane=permit.lane, outcome=outcome)
+        usage = getattr(response, "usage_metadata", None) or {}
+        LLM_TOKENS.inc(usage.get("input_tokens") or len(str(prompt)) // _CHARS_PER_TOKEN, lane=permit.lane, direction="prompt")
+        if response is not None:
+            content = str(getattr(response, "content", ""))
+            LLM_TOKENS.inc(usage.get("output_tokens") or len(content) // _CHARS_PER_TOKEN, lane=permit.lane, direction="response")
+
+    def _record_breaker_outcome(
+        self,
+        permit: LLMPermit,
+        error: Optional[BaseException],
+        rate_limited: bool,
+        probe: bool
+    ) -> None:
+        seconds = time.monotonic() - permit.admitted_at
+        # Rate limits are the scheduler's business, and a call cancelled by its caller or cut
+        # off by the deadline says nothing about the provider unless it overran the latency SLO
+        cut_short = not isinstance(error, Exception) or isinstance(error, DeadlineExceeded)
+        no_outcome = rate_limited or (
+            error is not None and cut_short and seconds < self.breaker.slow_call_seconds
+        )
+        if no_outcome:
+            if probe:
+                self.breaker.release_probe()
+            return
+        self.breaker.record(error is None, seconds, probe)
+
+    def invoke(self, prompt: Any, *args: Any, **kwargs: Any) -> Any:
+        permit, probe = self._admit(self._current_lane(), prompt)
+        try:
+            response = self.llm.invoke(prompt, *args, **kwargs)
+        except Exception as e:
+            self._finish(permit, prompt, error=e, probe=probe)
+            raise
+        self._finish(permit, prompt, response, probe=probe)
+        return response
+
+    async def ainvoke(self, prompt: Any, *args: Any, **kwargs: Any) -> Any:
+        lane = self._current_lane()
+        if self.hedging is None:
+            return await self._ainvoke_once(self.llm, lane, prompt, *args, **kwargs)
+
+        started = time.monotonic()
+        delay = self.hedging.delay(lane)
+        left = deadline.remaining()
+        if delay is None or (left is not None and left <= delay):
+            response = await self._ainvoke_once(self.llm, lane, prompt, *args, **kwargs)
+            self.hedging.observe(time.monotonic() - started)
+            self.hedging.record(lane, None)
+            return response
+        return await self._ainvoke_hedged(lane, delay, started, prompt, *args, **kwargs)
+
+    async def _ainvoke_hedged(self, lane: str, delay: float, started: float, prompt: Any, *args: Any, **kwargs: Any) -> Any:
+        """Send the call, and a duplicate if it has not answered after `delay`; the first valid answer wins"""
+        primary = asyncio.ensure_future(self._ainvoke_once(self.llm, lane, prompt, *args, **kwargs))
+        pending = {primary}
+        try:
+            await asyncio.wait(pending, timeout=delay)
+            if primary.done():
+                # Answered in time, or failed outright (a duplicate would most likely fail too)
+                self.hedging.record(lane, None)
+                response = primary.result()
+                self.hedging.observe(time.monotonic() - started)
+                return response
+
+            hedge = asyncio.ensure_future(self._ainvoke_once(self.fallback_llm or self.llm, lane, prompt, *args, **kwargs))
+            pending.add(hedge)
+            first_error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, timeout=deadline.budget(), return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    raise DeadlineExceeded("Request deadline exceeded waiting for a hedged LLM call")
+                for task in done:
+                    if task.exception() is None and str(getattr(task.result(), "content", "")).strip():
+                        self.hedging.record(lane, "hedge_won" if task is hedge else "primary_won")
+                        self.hedging.observe(time.monotonic() - started)
+                        return task.result()
+                    first_error = first_error or task.exception() or ValueError("LLM returned an empty response")
+            self.hedging.record(lane, "both_failed")
+            raise first_error  # type: ignore[misc]
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _ainvoke_once(self, model: Any, lane: str, prompt: Any, *args: Any, **kwargs: Any) -> Any:
+        deadline.check()
+        probe = self._check_breaker(lane)
+        # Waiting happens on a worker thread so the event loop keeps serving other requests
+        handoff = _PermitHandoff(self.scheduler)
+        try:
+            permit = await asyncio.shield(asyncio.to_thread(self._acquire_for, handoff, lane, prompt))
+        except BaseException:
+            if probe:
+                self.breaker.release_probe()
+            # Caller gave up (e.g. wait_for timeout): the permit must not outlive it
+            handoff.abandon()
+            raise
+
+        try:
+            timeout = deadline.budget()
+            if timeout is None:
+                response = await model.ainvoke(prompt, *args, **kwargs)
+            else:
+                try:
+                    response = await asyncio.wait_for(model.ainvoke(prompt, *args, **kwargs), timeout)
+                except asyncio.TimeoutError as e:
+                    raise DeadlineExceeded("Request deadline exceeded waiting for the LLM") from e
+        except BaseException as e:
+            self._finish(permit, prompt, error=e, probe=probe)
+            raise
+        self._finish(permit, prompt, response, probe=probe)
+        return response
+
+    def stream(self, prompt: Any, *args: Any, **kwargs: Any) -> Iterator[Any]:
+        permit, probe = self._admit(self._current_lane(), prompt)
+        error: Optional[BaseException] = None
+        # Chunks are merged so the permit is released with the stream's full token usage
+        response: Any = None
+        try:
+            for chunk in self.llm.stream(prompt, *args, **kwargs):
+                response = chunk if response is None else response + chunk
+                yield chunk
+        except BaseException as e:
+            # Includes GeneratorExit: a consumer that disconnects mid-stream did not get an answer
+            error = e
+            raise
+        finally:
+            self._finish(permit, prompt, response, error=error, probe=probe)
@@ -0,0 +1,38 @@
+"""
+LLM steps - Logic around LLM calls written once, as a generator that yields each call it needs
+as (prompt, kwargs) and receives the LLM's response, then run with blocking or async calls
+"""
+from typing import Any, Dict, Generator, Tuple, TypeVar
+
+Result = TypeVar("Result")
+LLMCall = Tuple[str, Dict[str, Any]]
+# Yields the calls to make, is sent their responses (or thrown their errors), returns the result
+LLMSteps = Generator[LLMCall, Any, Result]
+
+
+def run_steps(steps: LLMSteps[Result], llm: Any) -> Result:
+    """Run `steps` with `llm.invoke`; an error raised by a call is thrown into the steps"""
+    response, error = None, None
+    while True:
+        try:
+            prompt, kwargs = steps.throw(error) if error is not None else steps.send(response)
+        except StopIteration as done:
+            return done.value
+        try:
+            response, error = llm.invoke(prompt, **kwargs), None
+        except Exception as e:
+            response, error = None, e
+
+
+async def arun_steps(steps: LLMSteps[Result], llm: Any) -> Result:
+    """Run `steps` with `llm.ainvoke`; an error raised by a call is thrown into the steps"""
+    response, error = None, None
+    while True:
+        try:
+            prompt, kwargs = steps.throw(error) if error is not None else steps.send(response)
+        except StopIteration as done:
+            return done.value
+        try:
+            response, error = await llm.ainvoke(prompt, **kwargs), None
+        except Exception as e:
+            response, error = None, e
@@ -0,0 +1,215 @@
+"""
+Metrics - In-process counters and histograms rendered in the Prometheus text format, plus
+per-request stage timings for the debug Server-Timing header
+"""
+import contextlib
+import contextvars
+import math
+import threading
+import time
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+# Seconds; spans cache hits (sub-millisecond) up to slow LLM calls
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_INF_BUCKET = 'le="+Inf"'
+
+# (metric name, metric type, help, labels, value) reported by collectors at scrape time
+Sample = Tuple[str, str, str, Dict[str, str], float]
+
+_request_timings: contextvars.ContextVar[Optional[List[Tuple[str, float]]]] = contextvars.ContextVar(
+    "request_timings", default=None
+)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = tuple(str(labels.get(name, "")) for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        # per label set: [bucket counts..., sum, count]
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(str(labels.get(name, "")) for name in self.labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0.0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                for bound, count in zip(self.buckets, series):
+                    le = f'le="{_format_value(bound)}"'
+                    lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, le)} {_format_value(count)}")
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, _INF_BUCKET)} {_format_value(series[-1])}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(series[-2])}")
+                lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {_format_value(series[-1])}")
+        return lines
+
+
+class MetricsRegistry:
+    """Owns the process's metrics and the collectors that report other components' stats"""
+
+    def __init__(self):
+        self._metrics: List = []
+        self._collectors: List[Callable[[], Iterable[Sample]]] = []
+
+    def counter(self, name: str, help_text: str, labels: Sequence[str] = ()) -> Counter:
+        metric = Counter(name, help_text, labels)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help_text: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        metric = Histogram(name, help_text, labels, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable[[], Iterable[Sample]]) -> None:
+        """Register a callable producing samples (e.g. cache stats) each time metrics are scraped"""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+
+        described = set()
+        for collector in self._collectors:
+            for name, metric_type, help_text, labels, value in collector():
+                if name not in described:
+                    described.add(name)
+                    lines.append(f"# HELP {name} {help_text}")
+                    lines.append(f"# TYPE {name} {metric_type}")
+                lines.append(f"{name}{_format_labels(list(labels), list(labels.values()))} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+STAGE_SECONDS = registry.histogram(
+    "neurodesk_stage_duration_seconds", "Duration of pipeline stages", labels=("stage",)
+)
+STAGE_ERRORS = registry.counter(
+    "neurodesk_stage_errors_total", "Exceptions raised by pipeline stages", labels=("stage", "error")
+)
+HTTP_REQUESTS = registry.counter(
+    "neurodesk_http_requests_total", "HTTP requests served", labels=("endpoint", "method", "status")
+)
+HTTP_SECONDS = registry.histogram(
+    "neurodesk_http_request_duration_seconds", "HTTP request latency", labels=("endpoint",)
+)
+LLM_TOKENS = registry.counter(
+    "neurodesk_llm_tokens_total", "LLM tokens (provider-reported, else estimated from characters)",
+    labels=("lane", "direction")
+)
+LLM_CALLS = registry.counter(
+    "neurodesk_llm_calls_total", "LLM calls by lane and outcome", labels=("lane", "outcome")
+)
+LLM_HEDGES = registry.counter(
+    "neurodesk_llm_hedges_total", "Hedged LLM calls by lane and which request answered first", labels=("lane", "outcome")
+)
+STRUCTURED_OUTPUTS = registry.counter(
+    "neurodesk_structured_outputs_total",
+    "Structured LLM answers by schema and how they were obtained (parsed, repaired, reasked, failed)",
+    labels=("schema", "outcome")
+)
+
+
+@contextlib.contextmanager
+def timed(stage: str) -> Iterator[None]:
+    """Time a stage into the stage histogram and the current request's breakdown"""
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        STAGE_ERRORS.inc(stage=stage, error=e.__class__.__name__)
+        raise
+    finally:
+        record_stage(stage, time.perf_counter() - started)
+
+
+def record_stage(stage: str, seconds: float) -> None:
+    STAGE_SECONDS.observe(seconds, stage=stage)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings.append((stage, seconds))
+
+
+def start_request_timings() -> List[Tuple[str, float]]:
+    """
+    Start collecting stage timings for the current request. Threads and tasks started from
+    here on share the returned list, since they copy the context that references it.
+    """
+    timings: List[Tuple[str, float]] = []
+    _request_timings.set(timings)
+    return timings
+
+
+def stop_request_timings() -> None:
+    _request_timings.set(None)
+
+
+def server_timing_header(timings: List[Tuple[str, float]], total: Optional[float] = None) -> str:
+    """Server-Timing header value: total milliseconds and call count per stage, in first-seen order"""
+    totals: Dict[str, List[float]] = {}
+    for stage, seconds in timings:
+        entry = totals.setdefault(stage, [0.0, 0])
+        entry[0] += seconds
+        entry[1] += 1
+
+    parts = [
+        f'{stage.replace(".", "-")};dur={seconds * 1000:.1f};desc="{stage} x{count}"'
+        for stage, (seconds, count) in totals.items()
+    ]
+    if total is not None:
+        parts.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(parts)
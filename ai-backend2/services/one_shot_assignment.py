@@ -0,0 +1,74 @@
+"""
+One-shot assignment - Skill extraction and technician selection answered by a single LLM call,
+over a technician shortlist prefiltered with the locally matched skills
+"""
+import logging
+from typing import List, Optional, Tuple
+from langchain_google_genai import ChatGoogleGenerativeAI
+from models.technician import Technician
+from models.ticket import Ticket
+from services.assignment_reservations import AssignmentReservations
+from services.metrics import timed
+from services.prompts import ONE_SHOT_ASSIGNMENT_PROMPT
+from services.skill_extraction import SkillExtractionResponse, normalize_extraction_data
+from services.structured_output import ainvoke_structured
+from services.technician_selection import format_technicians_for_prompt
+
+logger = logging.getLogger(__name__)
+
+
+class OneShotAssignmentResponse(SkillExtractionResponse):
+    """Combined answer: the extraction fields plus the selection fields"""
+    selected_technician_id: Optional[int] = None
+    justification: str = ""
+
+    @property
+    def extraction(self) -> SkillExtractionResponse:
+        return SkillExtractionResponse(existing_skills=self.existing_skills, new_skills=self.new_skills)
+
+
+async def aassign_one_shot(
+    ticket: Ticket,
+    available_skills: List[str],
+    candidates: List[Technician],
+    llm: ChatGoogleGenerativeAI,
+    reservations: Optional[AssignmentReservations] = None
+) -> Tuple[SkillExtractionResponse, Optional[Technician], str]:
+    """
+    Ask the LLM for the ticket's skills and its technician in one call.
+    Returns the extraction, the chosen candidate (None when the LLM picked no shortlisted
+    technician or did not justify its pick) and its justification; raises when the call fails or the answer is invalid.
+    With `reservations`, candidates are shown with their effective workload and the chosen
+    technician is reserved for the ticket.
+    """
+    logger.info(f"One-shot assignment for ticket: {ticket.subject} ({len(candidates)} candidates)")
+    shown = reservations.effective(candidates) if reservations is not None else candidates
+    with timed("one_shot.prompt_build"):
+        prompt = _build_one_shot_prompt(ticket, available_skills, shown)
+    result = await ainvoke_structured(llm, prompt, OneShotAssignmentResponse, "one_shot", normalize_extraction_data)
+
+    technician = next((t for t in candidates if t.id == result.selected_technician_id), None)
+    justification = result.justification.strip()
+    if technician is None:
+        logger.warning(f"One-shot LLM selected technician ID {result.selected_technician_id}, which is not shortlisted")
+    elif not justification:
+        logger.warning("One-shot LLM selected a technician without justification, ignoring the selection")
+        technician = None
+    else:
+        logger.info(f"Technician selected: {technician.name} (ID: {technician.id}) in one-shot mode")
+        if reservations is not None:
+            reservations.reserve(technician, ticket.id)
+
+    return result.extraction, technician, justification
+
+
+def _build_one_shot_prompt(ticket: Ticket, available_skills: List[str], technicians: List[Technician]) -> str:
+    return ONE_SHOT_ASSIGNMENT_PROMPT.format(
+        subject=ticket.subject,
+        description=ticket.description,
+        tags=", ".join(ticket.tags) if ticket.tags else "None",
+        priority=ticket.priority.value,
+        available_skills="\n".join(f"- {skill}" for skill in available_skills),
+        available_technicians=format_technicians_for_prompt(technicians)
+    )
+
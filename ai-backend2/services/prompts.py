@@ -0,0 +1,452 @@
+"""
+Prompt registry - Versioned LLM prompts, compiled once at import. Static blocks are rendered
+into the template text up front, so building a prompt on the hot path is a single join.
+Bump a prompt's version whenever its wording changes: versions are reported in responses
+and namespace cached LLM results.
+"""
+import string
+from typing import Dict, List, Mapping, Optional, Tuple
+
+_FORMATTER = string.Formatter()
+
+
+class CompiledPrompt:
+    """
+    A prompt template (str.format syntax) split once into literal text and variable slots.
+    `static` values are rendered into the literal text at compile time.
+    """
+
+    def __init__(self, name: str, version: str, template: str, static: Optional[Mapping[str, str]] = None):
+        self.name = name
+        self.version = version
+
+        static = static or {}
+        segments: List[Tuple[str, str]] = []
+        literal: List[str] = []
+        for text, field, format_spec, conversion in _FORMATTER.parse(template):
+            literal.append(text)
+            if field is None:
+                continue
+            if format_spec or conversion:
+                raise ValueError(f"Prompt {name}: format specs are not supported ({{{field}}})")
+            if field in static:
+                literal.append(str(static[field]))
+                continue
+            segments.append(("".join(literal), field))
+            literal = []
+
+        self._segments: Tuple[Tuple[str, str], ...] = tuple(segments)
+        self._tail = "".join(literal)
+        self.input_variables: Tuple[str, ...] = tuple(dict.fromkeys(field for _, field in segments))
+
+    @property
+    def id(self) -> str:
+        return f"{self.name}@{self.version}"
+
+    def format(self, **values: object) -> str:
+        missing = [name for name in self.input_variables if name not in values]
+        if missing:
+            raise KeyError(f"Prompt {self.id} is missing variables: {', '.join(missing)}")
+        parts: List[str] = []
+        for text, field in self._segments:
+            parts.append(text)
+            parts.append(format(values[field]))
+        parts.append(self._tail)
+        return "".join(parts)
+
+
+class PromptRegistry:
+    """Holds the prompt version in use for each prompt name"""
+
+    def __init__(self):
+        self._prompts: Dict[str, CompiledPrompt] = {}
+
+    def register(self, prompt: CompiledPrompt) -> CompiledPrompt:
+        if prompt.name in self._prompts:
+            raise ValueError(f"Prompt {prompt.name} is already registered as {self._prompts[prompt.name].id}")
+        self._prompts[prompt.name] = prompt
+        return prompt
+
+    def get(self, name: str) -> CompiledPrompt:
+        return self._prompts[name]
+
+    def versions(self, *names: str) -> Dict[str, str]:
+        """Versions of the named prompts (all prompts when none are named)"""
+        return {name: self._prompts[name].version for name in (names or self._prompts)}
+
+
+registry = PromptRegistry()
+
+
+# =====================
+# SKILL EXTRACTION
+# =====================
+
+SKILL_EXTRACTION_PROMPT = registry.register(CompiledPrompt(
+    "skill_extraction", "v1",
+    template="""You are a service desk assistant designed to analyze incoming support tickets and identify the relevant **technical skills** needed to resolve them.
+
+        You will be provided:
+        1. A support ticket with subject, description, and tags
+        2. A list of available skills (from which you must choose)
+
+        ---
+
+        **Ticket Details**
+        - **Subject**: {subject}
+        - **Description**: {description}
+        - **Tags**: {tags}
+
+        ---
+
+        **Available Skills**:  
+        {available_skills}
+
+        ---
+
+        **Instructions**:
+        - Analyze the subject and description to identify which skills are needed.
+        - Output the result as a valid JSON object that matches exactly the schema below.
+        - Do NOT include explanations, markdown code fences, or extra text.
+        - If no new skills are needed, return an empty list for `new_skills`.
+        - Each skill listed in `all_skills` must have the field `is_new` set correctly.
+
+        ---
+
+        **Output Format**:
+        {{
+            "existing_skills": [
+                "<existing_skill_name_1>",
+                "<existing_skill_name_2>"
+            ],
+            "new_skills": [
+                {{
+                    "name": "<new_skill_name>",
+                    "description": "<short_description_of_the_new_skill>"
+                }}
+            ]
+        }}
+        """
+))
+
+BATCH_SKILL_EXTRACTION_PROMPT = registry.register(CompiledPrompt(
+    "batch_skill_extraction", "v1",
+    template="""You are a service desk assistant designed to analyze incoming support tickets and identify the relevant **technical skills** needed to resolve them.
+
+        You will be provided:
+        1. Several support tickets, each with an index, subject, description, and tags
+        2. A list of available skills (from which you must choose)
+
+        ---
+
+        **Tickets**
+
+        {tickets}
+
+        ---
+
+        **Available Skills**:
+        {available_skills}
+
+        ---
+
+        **Instructions**:
+        - Analyze every ticket independently and identify which skills it needs.
+        - Return exactly one result per ticket, using the ticket's index as `ticket_index`.
+        - Output the result as a valid JSON object that matches exactly the schema below.
+        - Do NOT include explanations, markdown code fences, or extra text.
+        - If a ticket needs no new skills, return an empty list for its `new_skills`.
+
+        ---
+
+        **Output Format**:
+        {{
+            "results": [
+                {{
+                    "ticket_index": <ticket_index>,
+                    "existing_skills": [
+                        "<existing_skill_name_1>"
+                    ],
+                    "new_skills": [
+                        {{
+                            "name": "<new_skill_name>",
+                            "description": "<short_description_of_the_new_skill>"
+                        }}
+                    ]
+                }}
+            ]
+        }}
+        """
+))
+
+
+# =====================
+# TECHNICIAN SELECTION
+# =====================
+
+JUSTIFICATION_GUIDELINES = """CRITICAL INSTRUCTIONS FOR JUSTIFICATION:
+
+**STRICTLY PROHIBITED ELEMENTS - NEVER INCLUDE THESE:**
+- NO SKILL IDs (e.g., "Skill ID 42", "Skill ID 26") - Always use actual skill names
+- NO TECHNICIAN IDs in justification text (only in the selected_technician_id field)
+- NO TICKET IDs or internal reference numbers
+- NO RULE NUMBERS (e.g., "Rule 2", "High & Medium Priority Rule")
+- NO TECHNICAL METADATA or system-generated codes
+- NO PERCENTAGE VALUES IN PARENTHESES after skill names (e.g., "Access Control (92%)")
+- NO NUMERICAL SCORES or calculations in the justification text
+
+**REQUIRED JUSTIFICATION FORMAT:**
+- Each point must start on a new line with a bullet point or number
+- Use only human-readable skill names (e.g., "Network Security", "Database Management", "Active Directory")
+- Reference availability status in plain English (e.g., "currently available", "busy")
+- Mention skill level in descriptive terms (e.g., "experienced specialist", "mid-level technician")
+- Describe workload in general terms (e.g., "low current workload", "moderate workload")
+- Keep language professional and presentable to end-users
+- Focus on business rationale rather than technical calculations
+- Keep the justification detailed and pointwise considering every scenarios."""
+
+JUSTIFICATION_PROMPT = registry.register(CompiledPrompt(
+    "technician_justification", "v1",
+    template="""You are the justification writer of an Intelligent Ticket Assignment System.
+The assignment rules have already been applied and the technician below was selected for the ticket.
+Explain to the end-user why this technician is the right choice.
+
+{justification_guidelines}
+
+Output only the justification text, one point per line. Do NOT output JSON or markdown code fences.
+
+**Input:**
+
+Ticket Data
+Name: {ticket_name}
+Description: {ticket_description}
+Priority: {ticket_priority}
+
+Skills required for the ticket:
+{required_skills}
+
+Selected Technician
+Name: {technician_name}
+Skill Level: {technician_level}
+Availability: {technician_availability}
+Workload: {technician_workload}
+Skills: {technician_skills}
+Matching required skills: {matched_skills}
+""",
+    static={"justification_guidelines": JUSTIFICATION_GUIDELINES}
+))
+
+TECHNICIAN_SELECTION_PROMPT = registry.register(CompiledPrompt(
+    "technician_selection", "v1",
+    template="""
+                LLM Prompt: The Intelligent Ticket Assignment System
+
+                Your Role: You are an advanced AI-powered Ticket Assignment System. Your primary function is to analyze an incoming support ticket and a list of available technicians to determine the single best technician for the job. You must follow a strict set of rules to ensure efficiency, proper skill utilization, and timely resolution of issues.
+
+                Input Data Structure:  
+                You will be given two JSON objects: `technicians` and `ticket`.
+
+                - `technicians`: An array of objects, where each object represents a technician with the following structure.
+                - `ticket`: An object representing the ticket to be assigned.
+
+                Assignment Rules & Logic:  
+                You must follow these rules in order. The first rule that matches the ticket's priority dictates the assignment logic.
+
+                **Rule 1: Critical Priority Tickets**  
+                If `ticket.priority` is `"critical"`:
+                - **Identify Specialists**: Immediately filter the technician list to find those whose specialization matches the core issue described in the ticket's `name` and `description`.
+                - **Select the Expert**: From that filtered list, assign the ticket to a technician with a `skill_level` of `"experienced"`.
+                - **Override Other Factors**: For critical tickets, ignore both `workload` and `availability_status`. The urgency of the ticket is the only thing that matters. If multiple experienced specialists exist, select the one with the lower workload.
+
+                **Rule 2: High & Medium Priority Tickets**  
+                If `ticket.priority` is `"high"` or `"medium"`:
+                - **Filter by Availability**: First, filter the list to exclude all the technicians with `availability_status` of `"unavailable"`.
+                - **Calculate Suitability Score**: For each available technician, calculate a Suitability Score using the following weighted formula:  
+                `Score = (0.6 * Skill_Match_Score) + (0.4 * Workload_Score)`
+
+                - *Skill_Match_Score* (0 to 1 scale):  
+                    Count how many of the `ticket.required_skills` the technician possesses.  
+                    Calculate the average percentage of those matching skills.  
+                    Final `Skill_Match_Score` = (count_of_matching_skills / total_required_skills) * (average_percentage / 100).  
+                    A technician who has most of the required skills with a high percentage will score the highest.
+
+                - *Workload_Score* (0 to 1 scale):  
+                    This score is inversely related to the technician's workload. A lower workload is better.  
+                    Calculate it as: `1 - workload`.  
+                    A technician with a workload of 0.2 gets a score of 0.8.
+
+                - **Assign to Highest Score**: Assign the ticket to the technician with the highest final Suitability Score.
+
+                **Rule 3: Low Priority Tickets**  
+                If `ticket.priority` is `"low"`:
+                - **Training Opportunity**: These tickets are ideal for skill development. You should primarily consider technicians with a `skill_level` of `"junior"` or `"mid"`.
+                - **Apply Standard Scoring**: Use the same Suitability Score formula from Rule 2 to find the best fit among junior and mid-level technicians who are `"available"`. This ensures they are still qualified, but gives them the opportunity before it goes to an experienced technician.
+                - **Fallback**: If no junior or mid-level technicians are available or qualified, then evaluate experienced technicians using the same scoring logic.
+
+                Output Format Requirements:
+
+                Your final output must be a single JSON object containing the ID of the chosen technician and a clear, detailed, and pointwise justification for your choice.
+
+                {justification_guidelines}
+
+                Example Output:
+                {{
+                    "selected_technician_id": 10,
+                    "justification": "• Assigned to handle this critical network security incident\\n• Technician is an experienced specialist in Network Security with proven expertise\\n• Possesses all required skills including Firewall Management and Intrusion Detection\\n• Currently available and has low workload to ensure immediate response\\n• Strong track record in resolving similar high-impact security issues"
+                }}
+
+                **Input:**
+
+                Ticket Data  
+                Name: {ticket_name}  
+                Description: {ticket_description}  
+                Priority: {ticket_priority}  
+
+                Skills required for the ticket:  
+                {required_skills}
+
+                Technicians:  
+                {available_technicians}
+            """,
+    static={"justification_guidelines": JUSTIFICATION_GUIDELINES}
+))
+
+
+# =====================
+# ONE-SHOT ASSIGNMENT
+# =====================
+
+ONE_SHOT_ASSIGNMENT_PROMPT = registry.register(CompiledPrompt(
+    "one_shot_assignment", "v1",
+    template="""You are an Intelligent Ticket Assignment System. For the support ticket below you must, in a single answer:
+        1. Identify the **technical skills** needed to resolve it, choosing from the available skills
+        2. Select the single best technician for it from the shortlisted technicians
+
+        ---
+
+        **Ticket Details**
+        - **Subject**: {subject}
+        - **Description**: {description}
+        - **Tags**: {tags}
+        - **Priority**: {priority}
+
+        ---
+
+        **Available Skills**:
+        {available_skills}
+
+        ---
+
+        **Shortlisted Technicians**:
+        {available_technicians}
+
+        ---
+
+        **Skill Instructions**:
+        - List in `existing_skills` the available skills the ticket needs, using their exact names.
+        - List in `new_skills` the skills the ticket needs that are not available, with a short description; return an empty list if there are none.
+
+        **Assignment Rules** (apply the first rule matching the ticket's priority, judging skill match against the skills you identified):
+        - **Critical**: pick an experienced technician whose skills match the core issue, regardless of workload and availability; among several, pick the one with the lower workload.
+        - **High & Medium**: exclude unavailable technicians, then pick the highest `Score = 0.6 * Skill_Match_Score + 0.4 * (1 - workload)`, where Skill_Match_Score = (matching skills / required skills) * (average percentage of the matching skills / 100).
+        - **Low**: prefer available junior and mid-level technicians using the same score; consider experienced technicians only when none of them qualifies.
+
+        {justification_guidelines}
+
+        ---
+
+        **Output Format** (a single valid JSON object matching exactly this schema, without explanations, markdown code fences, or extra text):
+        {{
+            "existing_skills": [
+                "<existing_skill_name_1>"
+            ],
+            "new_skills": [
+                {{
+                    "name": "<new_skill_name>",
+                    "description": "<short_description_of_the_new_skill>"
+                }}
+            ],
+            "selected_technician_id": <technician_id>,
+            "justification": "<pointwise justification, one point per line>"
+        }}
+        """,
+    static={"justification_guidelines": JUSTIFICATION_GUIDELINES}
+))
+
+
+# =====================
+# TECHNICIAN EVALUATION
+# =====================
+
+FEEDBACK_SENTIMENT_PROMPT = registry.register(CompiledPrompt(
+    "feedback_sentiment", "v2",
+    template="""Analyze the sentiment of this user feedback and provide:
+1. A score from -100 to 100:
+   -100: Extremely negative
+   -50: Moderately negative
+   0: Neutral
+   50: Moderately positive
+   100: Extremely positive
+
+2. A brief explanation for the score (max 50 words)
+
+User Feedback: {feedback}
+
+Respond with only a JSON object, without markdown code fences:
+{{"score": <number>, "reasoning": "<explanation>"}}"""
+))
+
+FEEDBACK_SENTIMENT_BATCH_PROMPT = registry.register(CompiledPrompt(
+    "feedback_sentiment_batch", "v2",
+    template="""Analyze the sentiment of each user feedback below and provide for each one:
+1. A score from -100 to 100:
+   -100: Extremely negative
+   -50: Moderately negative
+   0: Neutral
+   50: Moderately positive
+   100: Extremely positive
+
+2. A brief explanation for the score (max 30 words)
+
+{feedback_block}
+
+Respond with only a JSON object holding one result per feedback, in the same order, without markdown code fences:
+{{"results": [{{"feedback": <feedback number>, "score": <number>, "reasoning": "<explanation>"}}]}}"""
+))
+
+SKILL_EVALUATION_PROMPT = registry.register(CompiledPrompt(
+    "skill_evaluation", "v2",
+    template="""Analyze this ticket resolution and rate the demonstrated skill levels:
+
+Ticket Subject: {subject}
+Description: {description}
+Work Logs:
+{work_logs}
+
+For each required skill [{skills}], provide:
+1. Skill proficiency score (0-100)
+2. Brief justification (max 50 words)
+
+Respond with only a JSON object holding one entry per skill, without markdown code fences:
+{{"skills": [{{"skill": "<skill_name>", "score": <number>, "reasoning": "<justification>"}}]}}
+"""
+))
+
+
+# =====================
+# STRUCTURED OUTPUT
+# =====================
+
+STRUCTURED_OUTPUT_REASK_PROMPT = registry.register(CompiledPrompt(
+    "structured_output_reask", "v1",
+    template="""{prompt}
+
+---
+
+Your previous answer to the request above could not be used:
+{answer}
+
+Problem: {error}
+
+Answer the request again with only the JSON object it asks for, matching its schema exactly, without markdown code fences or any other text."""
+))
@@ -0,0 +1,142 @@
+"""
+Sentiment scorer - Local lexicon-based sentiment scoring of ticket feedback on the same
+-100..100 scale as the LLM analysis, with a confidence estimate used to decide whether
+the feedback still needs the LLM
+"""
+import math
+import re
+from typing import Dict, List, Optional, Tuple
+from pydantic import BaseModel
+
+_TOKEN_PATTERN = re.compile(r"[a-z']+|:\)|:\(|[!?.,;]|👍|👎|🙂|🙁|😊|😡")
+_PUNCTUATION = frozenset("!?.,;")
+
+# Term valences on a -3..3 scale, tuned for help desk feedback
+_LEXICON: Dict[str, float] = {
+    # positive
+    "thanks": 2.0, "thank": 2.0, "thx": 1.5, "ty": 1.5, "appreciate": 2.0, "appreciated": 2.0,
+    "great": 2.5, "excellent": 3.0, "awesome": 3.0, "amazing": 3.0, "perfect": 3.0, "fantastic": 3.0,
+    "outstanding": 3.0, "superb": 3.0, "wonderful": 3.0, "brilliant": 3.0, "best": 2.5, "love": 2.5,
+    "good": 1.5, "nice": 1.5, "fine": 0.8, "ok": 0.5, "okay": 0.5, "decent": 1.0, "solid": 1.2,
+    "helpful": 2.0, "friendly": 2.0, "polite": 1.5, "patient": 1.5, "professional": 2.0,
+    "knowledgeable": 2.0, "efficient": 2.0, "quick": 1.5, "quickly": 1.5, "fast": 1.5, "prompt": 1.5,
+    "promptly": 1.5, "smooth": 1.5, "easy": 1.2, "clear": 1.0, "resolved": 1.5, "fixed": 1.5,
+    "solved": 1.5, "works": 1.2, "working": 1.0, "happy": 2.0, "glad": 1.8, "satisfied": 2.0,
+    "pleased": 2.0, "lifesaver": 3.0, "kudos": 2.5, "impressed": 2.5,
+    ":)": 1.5, "👍": 2.0, "🙂": 1.5, "😊": 2.0,
+    # negative
+    "bad": -2.0, "poor": -2.0, "terrible": -3.0, "awful": -3.0, "horrible": -3.0, "worst": -3.0,
+    "worse": -2.0, "useless": -2.5, "unhelpful": -2.5, "rude": -2.5, "unprofessional": -2.5,
+    "slow": -1.8, "slowly": -1.5, "late": -1.5, "delay": -1.5, "delayed": -1.5, "waiting": -1.2,
+    "waited": -1.2, "forever": -1.5, "ignored": -2.5, "unresolved": -2.5, "broken": -2.0,
+    "incomplete": -1.8, "confusing": -1.5, "confused": -1.2, "frustrated": -2.5, "frustrating": -2.5,
+    "annoyed": -2.0, "annoying": -2.0, "disappointed": -2.5, "disappointing": -2.5, "unhappy": -2.5,
+    "angry": -2.5, "hate": -3.0, "waste": -2.5, "wasted": -2.5, "fail": -2.0, "failed": -2.0,
+    "reopened": -1.5, "again": -0.8, "still": -0.8, "nobody": -1.5, "mess": -2.0,
+    ":(": -1.5, "👎": -2.0, "🙁": -1.5, "😡": -2.5,
+}
+
+_NEGATIONS = frozenset("""
+not no never none nothing neither nor cannot can't cant don't dont didn't didnt doesn't doesnt
+isn't isnt wasn't wasnt weren't werent won't wont hardly without
+""".split())
+_INTENSIFIERS = {
+    "very": 1.4, "really": 1.3, "so": 1.3, "extremely": 1.6, "super": 1.4, "incredibly": 1.6,
+    "totally": 1.4, "absolutely": 1.5, "truly": 1.3, "highly": 1.4, "most": 1.3,
+}
+_DOWNTONERS = {"somewhat": 0.6, "slightly": 0.5, "bit": 0.6, "kinda": 0.6, "fairly": 0.8, "little": 0.6}
+_CONTRASTS = frozenset({"but", "however", "although", "though", "yet"})
+
+# Tokens a negation reaches forward, and the factor it applies
+_NEGATION_SCOPE = 3
+_NEGATION_FACTOR = -0.75
+# Normalization constant mapping the raw valence sum onto -1..1 (as in VADER)
+_ALPHA = 15.0
+_EXCLAMATION_BOOST = 0.3
+
+
+class LocalSentiment(BaseModel):
+    score: float  # -100 to 100
+    confidence: float  # 0 to 1
+    reasoning: str
+    word_count: int
+
+
+class LexiconSentimentScorer:
+    """
+    Valence lexicon with negation, intensifier and contrast handling.
+    Confidence is high when sentiment terms agree in polarity and cover a good share
+    of the feedback, and drops for mixed, contrastive or unrecognized feedback.
+    """
+
+    def __init__(self, lexicon: Optional[Dict[str, float]] = None):
+        self.lexicon = dict(lexicon or _LEXICON)
+
+    def tokenize(self, text: str) -> List[str]:
+        return _TOKEN_PATTERN.findall(text.lower().replace("’", "'"))
+
+    def score(self, text: str) -> LocalSentiment:
+        tokens = self.tokenize(text)
+        words = [t for t in tokens if t not in _PUNCTUATION]
+
+        # Clauses after a contrast word carry the speaker's conclusion
+        contrast_at = next((i for i, t in enumerate(tokens) if t in _CONTRASTS), None)
+
+        hits: List[Tuple[str, float]] = []
+        for i, token in enumerate(tokens):
+            valence = self.lexicon.get(token)
+            if valence is None:
+                continue
+
+            # Negations reach back at most a few tokens and never across punctuation
+            window = []
+            for previous_token in reversed(tokens[max(0, i - _NEGATION_SCOPE):i]):
+                if previous_token in _PUNCTUATION:
+                    break
+                window.append(previous_token)
+            previous = tokens[i - 1] if i > 0 else ""
+            valence *= _INTENSIFIERS.get(previous, 1.0) * _DOWNTONERS.get(previous, 1.0)
+            label = token
+            if any(t in _NEGATIONS for t in window):
+                valence *= _NEGATION_FACTOR
+                label = f"not {token}"
+            if contrast_at is not None:
+                valence *= 0.5 if i < contrast_at else 1.5
+            hits.append((label, valence))
+
+        positive = sum(v for _, v in hits if v > 0)
+        negative = -sum(v for _, v in hits if v < 0)
+        total = positive - negative
+        if total:
+            total += math.copysign(_EXCLAMATION_BOOST * min(tokens.count("!"), 3), total)
+        compound = total / math.sqrt(total * total + _ALPHA) if total else 0.0
+
+        if hits:
+            agreement = abs(positive - negative) / (positive + negative)
+            coverage = min(1.0, 2 * len(hits) / max(len(words), 1))
+            confidence = agreement * (0.6 + 0.4 * coverage)
+            if contrast_at is not None:
+                confidence *= 0.7
+        else:
+            # Nothing recognized: neutral, but not something to trust
+            confidence = 0.2 if words else 0.0
+
+        return LocalSentiment(
+            score=round(max(-100.0, min(100.0, compound * 100)), 1),
+            confidence=round(confidence, 3),
+            reasoning=self._reasoning(hits),
+            word_count=len(words)
+        )
+
+    @staticmethod
+    def _reasoning(hits: List[Tuple[str, float]]) -> str:
+        if not hits:
+            return "No sentiment-bearing terms found in feedback"
+        positive = list(dict.fromkeys(t for t, v in hits if v > 0))
+        negative = list(dict.fromkeys(t for t, v in hits if v < 0))
+        parts = []
+        if positive:
+            parts.append(f"positive terms ({', '.join(positive[:5])})")
+        if negative:
+            parts.append(f"negative terms ({', '.join(negative[:5])})")
+        return f"Local lexicon analysis: {' and '.join(parts)}"
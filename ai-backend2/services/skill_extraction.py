@@ -1,14 +1,21 @@
 """
 Skill extraction service - Step 1: Extract skills from ticket using provided skills list
 """
-import json
-import re
 import logging
-from typing import List
-from langchain.prompts import PromptTemplate
+from typing import Any, Dict, List, Optional
 from langchain_google_genai import ChatGoogleGenerativeAI
 from models.ticket import Ticket
 from pydantic import BaseModel, ValidationError
+from services.extraction_cache import SkillExtractionCache, catalog_fingerprint
+from services.llm_steps import LLMSteps, arun_steps, run_steps
+from services.metrics import timed
+from services.prompts import BATCH_SKILL_EXTRACTION_PROMPT, ONE_SHOT_ASSIGNMENT_PROMPT, SKILL_EXTRACTION_PROMPT
+from services.structured_output import (
+    StructuredOutputError,
+    generation_kwargs,
+    load_json,
+    structured_steps,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -23,113 +30,160 @@ class SkillExtractionResponse(BaseModel):
     new_skills: List[NewSkill]
 
 
-def extract_skills_from_ticket(ticket: Ticket, available_skills: List[str], llm: ChatGoogleGenerativeAI) -> SkillExtractionResponse:
+class BatchSkillExtractionResult(SkillExtractionResponse):
+    ticket_index: int
+
+
+class BatchSkillExtractionResponse(BaseModel):
+    results: List[BatchSkillExtractionResult]
+
+
+def extract_skills_from_ticket(
+    ticket: Ticket,
+    available_skills: List[str],
+    llm: ChatGoogleGenerativeAI,
+    cache: Optional[SkillExtractionCache] = None,
+    catalog_version: Optional[str] = None
+) -> SkillExtractionResponse:
     """
     Single-function version of skill extraction.
     Uses an LLM to identify existing and new skills needed for a given support ticket.
+    When a cache is given, repeat and near-identical tickets skip the LLM call.
     """
-
-    # --- Step 1: Prepare the skill extraction prompt (unchanged) ---
-    skill_extraction_prompt = PromptTemplate(
-        template="""You are a service desk assistant designed to analyze incoming support tickets and identify the relevant **technical skills** needed to resolve them.
-
-        You will be provided:
-        1. A support ticket with subject, description, and tags
-        2. A list of available skills (from which you must choose)
-
-        ---
-
-        **Ticket Details**
-        - **Subject**: {subject}
-        - **Description**: {description}
-        - **Tags**: {tags}
-
-        ---
-
-        **Available Skills**:  
-        {available_skills}
-
-        ---
-
-        **Instructions**:
-        - Analyze the subject and description to identify which skills are needed.
-        - Output the result as a valid JSON object that matches exactly the schema below.
-        - Do NOT include explanations, markdown code fences, or extra text.
-        - If no new skills are needed, return an empty list for `new_skills`.
-        - Each skill listed in `all_skills` must have the field `is_new` set correctly.
-
-        ---
-
-        **Output Format**:
-        {{
-            "existing_skills": [
-                "<existing_skill_name_1>",
-                "<existing_skill_name_2>"
-            ],
-            "new_skills": [
-                {{
-                    "name": "<new_skill_name>",
-                    "description": "<short_description_of_the_new_skill>"
-                }}
-            ]
-        }}
-        """,
-        input_variables=["subject", "description", "tags", "available_skills"]
-    )
-
+    return run_steps(_extraction_steps(ticket, available_skills, cache, catalog_version), llm)
+
+
+async def aextract_skills_from_ticket(
+    ticket: Ticket,
+    available_skills: List[str],
+    llm: ChatGoogleGenerativeAI,
+    cache: Optional[SkillExtractionCache] = None,
+    catalog_version: Optional[str] = None
+) -> SkillExtractionResponse:
+    """Async variant of `extract_skills_from_ticket` using `llm.ainvoke`"""
+    return await arun_steps(_extraction_steps(ticket, available_skills, cache, catalog_version), llm)
+
+
+def _extraction_steps(
+    ticket: Ticket,
+    available_skills: List[str],
+    cache: Optional[SkillExtractionCache],
+    catalog_version: Optional[str]
+) -> LLMSteps[SkillExtractionResponse]:
     try:
         logger.info(f"Extracting skills from ticket: {ticket.subject}")
+        if cache is not None:
+            catalog_version = extraction_cache_version(catalog_version or catalog_fingerprint(available_skills))
+            with timed("extraction.cache_lookup"):
+                cached, _ = cache.get(ticket, catalog_version)
+            if cached is not None:
+                return cached
 
-        # --- Step 2: Format input values ---
-        tags_text = ", ".join(ticket.tags) if ticket.tags else "None"
-        available_skills_text = "\n".join([f"- {skill}" for skill in available_skills])
-
-        prompt = skill_extraction_prompt.format(
-            subject=ticket.subject,
-            description=ticket.description,
-            tags=tags_text,
-            available_skills=available_skills_text
-        )
+        with timed("extraction.prompt_build"):
+            prompt = _build_extraction_prompt(ticket, available_skills)
 
         # --- Step 3: Call LLM ---
         logger.debug("Sending prompt to LLM for skill extraction")
-        response = llm.invoke(prompt)
-        raw_content = str(response.content).strip()
+        result = yield from structured_steps(prompt, SkillExtractionResponse, "extraction", normalize_extraction_data)
+        _log_extraction(result)
 
-        # --- Step 4: Clean and parse JSON ---
-        cleaned_json = re.sub(r"^```(?:json)?|```$", "", raw_content, flags=re.MULTILINE).strip()
+        if cache is not None:
+            cache.put(ticket, catalog_version, result)
+        return result
 
-        try:
-            data = json.loads(cleaned_json)
-        except json.JSONDecodeError as je:
-            logger.error(f"Invalid JSON returned by LLM: {je}")
-            logger.debug(f"Raw LLM response: {raw_content}")
-            raise ValueError("LLM returned invalid JSON format.") from je
-
-        # --- Step 5: Normalize schema (handle alternate structure) ---
-        if "skills" in data and "existing_skills" not in data:
-            skills = data.get("skills", [])
-            existing_skills = [s["name"] for s in skills if not s.get("is_new", False)]
-            new_skills = [NewSkill(name=s["name"], description=s["description"]) for s in skills if s.get("is_new", False)]
-            data = {
-                "existing_skills": existing_skills,
-                "new_skills": [ns.dict() for ns in new_skills],
-            }
-
-        # --- Step 6: Validate with Pydantic ---
-        result_data = SkillExtractionResponse.model_validate(data)
-
-        logger.info(
-            f"Successfully extracted {len(result_data.existing_skills)} existing and "
-            f"{len(result_data.new_skills)} new skills from ticket."
-        )
-
-        return result_data
-
-    except ValidationError as ve:
-        logger.error(f"Validation failed for SkillExtractionResponse: {ve}")
+    except StructuredOutputError as se:
+        logger.error(f"Validation failed for SkillExtractionResponse: {se}")
         raise
 
     except Exception as e:
         logger.error(f"Error extracting skills from ticket: {e}")
         raise
+
+
+def extract_skills_from_tickets(
+    tickets: List[Ticket],
+    available_skills: List[str],
+    llm: ChatGoogleGenerativeAI
+) -> Dict[int, SkillExtractionResponse]:
+    """
+    Extract skills for several tickets with a single LLM call.
+    Returns results keyed by position in `tickets`; tickets the LLM skipped or answered
+    with an invalid structure are missing from the result so callers can fall back.
+    """
+    logger.info(f"Extracting skills from {len(tickets)} tickets in one prompt")
+
+    tickets_text = "\n\n".join(
+        f"### Ticket {i}\n"
+        f"- **Subject**: {ticket.subject}\n"
+        f"- **Description**: {ticket.description}\n"
+        f"- **Tags**: {', '.join(ticket.tags) if ticket.tags else 'None'}"
+        for i, ticket in enumerate(tickets)
+    )
+    prompt = BATCH_SKILL_EXTRACTION_PROMPT.format(
+        tickets=tickets_text,
+        available_skills="\n".join(f"- {skill}" for skill in available_skills)
+    )
+
+    # Results are validated one by one below, so a bad result only costs its own ticket
+    with timed("batch_extraction.llm"):
+        response = llm.invoke(prompt, **generation_kwargs(BatchSkillExtractionResponse))
+    with timed("batch_extraction.parse"):
+        data = load_json(str(response.content))
+
+    results: Dict[int, SkillExtractionResponse] = {}
+    for item in data.get("results", []) if isinstance(data, dict) else []:
+        try:
+            result = BatchSkillExtractionResult.model_validate(item)
+        except ValidationError as ve:
+            logger.warning(f"Skipping invalid batch extraction result: {ve}")
+            continue
+        if 0 <= result.ticket_index < len(tickets):
+            results[result.ticket_index] = SkillExtractionResponse(
+                existing_skills=result.existing_skills,
+                new_skills=result.new_skills
+            )
+
+    logger.info(f"Batch extraction returned results for {len(results)} of {len(tickets)} tickets")
+    return results
+
+
+def extraction_cache_version(catalog_version: str) -> str:
+    """
+    Extraction cache namespace for a skills catalog version. Single, batch and one-shot
+    extraction share cached results, which are dropped when any of their prompt versions changes.
+    """
+    return f"{SKILL_EXTRACTION_PROMPT.id},{BATCH_SKILL_EXTRACTION_PROMPT.id},{ONE_SHOT_ASSIGNMENT_PROMPT.id}/{catalog_version}"
+
+
+def _build_extraction_prompt(ticket: Ticket, available_skills: List[str]) -> str:
+    # --- Step 2: Format input values ---
+    tags_text = ", ".join(ticket.tags) if ticket.tags else "None"
+    available_skills_text = "\n".join([f"- {skill}" for skill in available_skills])
+
+    return SKILL_EXTRACTION_PROMPT.format(
+        subject=ticket.subject,
+        description=ticket.description,
+        tags=tags_text,
+        available_skills=available_skills_text
+    )
+
+
+def normalize_extraction_data(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Map the alternate `skills` structure (one list with `is_new` flags) onto `existing_skills` and `new_skills`"""
+    if "skills" in data and "existing_skills" not in data:
+        skills = data.get("skills", [])
+        existing_skills = [s["name"] for s in skills if not s.get("is_new", False)]
+        new_skills = [NewSkill(name=s["name"], description=s["description"]) for s in skills if s.get("is_new", False)]
+        data = {
+            **{key: value for key, value in data.items() if key != "skills"},
+            "existing_skills": existing_skills,
+            "new_skills": [ns.dict() for ns in new_skills],
+        }
+    return data
+
+
+def _log_extraction(result: SkillExtractionResponse) -> None:
+    logger.info(
+        f"Successfully extracted {len(result.existing_skills)} existing and "
+        f"{len(result.new_skills)} new skills from ticket."
+    )
@@ -0,0 +1,147 @@
+"""
+Skill matcher - Local TF-IDF index over the skills catalog used to shortlist candidate
+skills for the extraction prompt and as a no-LLM fallback skill extractor
+"""
+import logging
+import math
+import re
+from collections import Counter
+from typing import Dict, List, Tuple
+import numpy as np
+from models.ticket import Ticket
+from models.skill import Skill
+from services.skill_extraction import SkillExtractionResponse
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset("""
+a an and are as at be but by can cannot for from has have i in is it its me my no not of on or our
+please since so that the their there this to up us was we when with you your
+""".split())
+
+# Field weights: a skill's name says more about it than its description
+_NAME_WEIGHT = 3
+_CATEGORY_WEIGHT = 1
+_DESCRIPTION_WEIGHT = 1
+# Bonus added when the full skill name appears verbatim in the ticket
+_PHRASE_BONUS = 0.5
+
+
+def tokenize(text: str) -> List[str]:
+    tokens = []
+    for token in _TOKEN_PATTERN.findall(text.lower()):
+        if token in _STOPWORDS:
+            continue
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+class SkillMatcher:
+    """
+    TF-IDF index over skill names, categories and descriptions, stored as an inverted
+    index of (skill rows, weights) per term so a query only touches matching postings.
+    """
+
+    def __init__(self, skills: List[Skill]):
+        self.skills = list(skills)
+        self.names = [s.name for s in self.skills]
+        self._phrases = [" ".join(tokenize(s.name)) for s in self.skills]
+
+        documents = [self._document_terms(skill) for skill in self.skills]
+        document_frequency: Counter = Counter()
+        for terms in documents:
+            document_frequency.update(terms.keys())
+
+        total = len(self.skills)
+        self._idf = {term: math.log((1 + total) / (1 + df)) + 1.0 for term, df in document_frequency.items()}
+
+        postings: Dict[str, List[Tuple[int, float]]] = {}
+        for row, terms in enumerate(documents):
+            weights = {term: (1 + math.log(tf)) * self._idf[term] for term, tf in terms.items()}
+            norm = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+            for term, weight in weights.items():
+                postings.setdefault(term, []).append((row, weight / norm))
+
+        self._postings = {
+            term: (np.array([r for r, _ in entries], dtype=np.intp), np.array([w for _, w in entries], dtype=np.float32))
+            for term, entries in postings.items()
+        }
+        logger.info(f"Built skill matcher over {total} skills and {len(self._postings)} terms")
+
+    def __len__(self) -> int:
+        return len(self.skills)
+
+    @staticmethod
+    def _document_terms(skill: Skill) -> Counter:
+        terms: Counter = Counter()
+        for token in tokenize(skill.name):
+            terms[token] += _NAME_WEIGHT
+        for token in tokenize(skill.category or ""):
+            terms[token] += _CATEGORY_WEIGHT
+        for token in tokenize(skill.description or ""):
+            terms[token] += _DESCRIPTION_WEIGHT
+        return terms
+
+    @staticmethod
+    def ticket_text(ticket: Ticket) -> str:
+        return f"{ticket.subject} {ticket.description} {' '.join(ticket.tags or [])}"
+
+    def score(self, text: str) -> np.ndarray:
+        """Cosine similarity between the text and every skill, plus a verbatim-name bonus"""
+        scores = np.zeros(len(self.skills), dtype=np.float32)
+        query = Counter(t for t in tokenize(text) if t in self._postings)
+        if not query:
+            return scores
+
+        weights = {term: (1 + math.log(tf)) * self._idf[term] for term, tf in query.items()}
+        norm = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+        for term, weight in weights.items():
+            rows, values = self._postings[term]
+            np.add.at(scores, rows, values * (weight / norm))
+
+        normalized = f" {' '.join(tokenize(text))} "
+        for row in np.flatnonzero(scores):
+            phrase = self._phrases[row]
+            if phrase and f" {phrase} " in normalized:
+                scores[row] += _PHRASE_BONUS
+        return scores
+
+    def top_skills(self, ticket: Ticket, top_n: int) -> List[Tuple[Skill, float]]:
+        """Top-N catalog skills for a ticket, best match first (only skills with a non-zero score)"""
+        scores = self.score(self.ticket_text(ticket))
+        matched = np.flatnonzero(scores > 0)
+        if matched.size > top_n:
+            matched = matched[np.argpartition(-scores[matched], top_n - 1)[:top_n]]
+        order = matched[np.argsort(-scores[matched], kind="stable")]
+        return [(self.skills[row], float(scores[row])) for row in order]
+
+    def candidate_names(self, ticket: Ticket, top_n: int) -> List[str]:
+        """
+        Skill names to offer the extraction LLM: the top-N local matches, padded up to N with
+        the rest of the catalog (skills in the matched skills' categories first) when fewer
+        match, so a skill the keywords missed can still be chosen. With top_n <= 0, or when
+        nothing matches locally, the whole catalog is returned.
+        """
+        if top_n <= 0 or top_n >= len(self.skills):
+            return list(self.names)
+        candidates = [skill for skill, _ in self.top_skills(ticket, top_n)]
+        if not candidates:
+            return list(self.names)
+        if len(candidates) < top_n:
+            chosen = {skill.name for skill in candidates}
+            categories = {skill.category for skill in candidates if skill.category}
+            rest = [skill for skill in self.skills if skill.name not in chosen]
+            rest.sort(key=lambda skill: skill.category not in categories)
+            candidates += rest[:top_n - len(candidates)]
+        return [skill.name for skill in candidates]
+
+    def extract(self, ticket: Ticket, threshold: float = 0.2, max_skills: int = 5) -> SkillExtractionResponse:
+        """No-LLM skill extraction: catalog skills whose match score reaches the threshold"""
+        ranked = self.top_skills(ticket, max_skills)
+        existing = [skill.name for skill, score in ranked if score >= threshold]
+        if not existing and ranked:
+            existing = [ranked[0][0].name]
+        return SkillExtractionResponse(existing_skills=existing, new_skills=[])
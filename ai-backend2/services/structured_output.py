@@ -0,0 +1,219 @@
+"""
+Structured output - LLM answers parsed into pydantic models. The model's JSON schema is sent
+as the provider's response schema, answers are parsed with orjson, common breakages are
+repaired locally, and an answer that still does not validate gets one re-ask
+"""
+import functools
+import logging
+import os
+import re
+from typing import Any, Callable, Dict, Optional, Tuple, Type, TypeVar
+import orjson
+from pydantic import BaseModel, ValidationError
+from services.llm_steps import LLMSteps, arun_steps, run_steps
+from services.metrics import STRUCTURED_OUTPUTS, timed
+from services.prompts import STRUCTURED_OUTPUT_REASK_PROMPT
+
+logger = logging.getLogger(__name__)
+
+Model = TypeVar("Model", bound=BaseModel)
+Normalizer = Callable[[Dict[str, Any]], Dict[str, Any]]
+
+_CODE_FENCE = re.compile(r"^\s*```[\w-]*\s*$", flags=re.MULTILINE)
+_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+_SMART_QUOTES = str.maketrans({"“": '"', "”": '"'})
+# JSON schema type -> Gemini Schema type
+_SCHEMA_TYPES = {
+    "string": "STRING",
+    "integer": "INTEGER",
+    "number": "NUMBER",
+    "boolean": "BOOLEAN",
+    "array": "ARRAY",
+    "object": "OBJECT",
+}
+# Raised by parsing, normalizing or validating an answer that does not fit its model
+_ANSWER_ERRORS = (ValueError, KeyError, TypeError)
+# Longest previous answer quoted back in a re-ask
+_REASK_ANSWER_CHARS = 4000
+
+
+class StructuredOutputError(ValueError):
+    """An LLM answer that did not match its schema, even after repair and the re-ask"""
+
+
+def native_schema_enabled() -> bool:
+    return os.environ.get("STRUCTURED_OUTPUT_NATIVE", "true").lower() == "true"
+
+
+def reask_enabled() -> bool:
+    return os.environ.get("STRUCTURED_OUTPUT_REASK", "true").lower() == "true"
+
+
+@functools.lru_cache(maxsize=None)
+def response_schema(model: Type[BaseModel]) -> Dict[str, Any]:
+    """The model's JSON schema in the subset Gemini accepts as a response schema (refs inlined, no titles)"""
+    schema = model.model_json_schema()
+    return _convert_schema(schema, schema.get("$defs", {}))
+
+
+def generation_kwargs(model: Type[BaseModel]) -> Dict[str, Any]:
+    """Call arguments asking the provider for JSON matching `model` (none when native schemas are off)"""
+    if not native_schema_enabled():
+        return {}
+    return {"generation_config": {"response_mime_type": "application/json", "response_schema": response_schema(model)}}
+
+
+def load_json(content: str) -> Any:
+    """Parse an LLM answer as JSON, repairing code fences, surrounding prose and trailing commas"""
+    data, _ = _load_json(content)
+    return data
+
+
+def structured_steps(
+    prompt: str,
+    model: Type[Model],
+    stage: str,
+    normalize: Optional[Normalizer] = None
+) -> LLMSteps[Model]:
+    """
+    LLM steps (see services.llm_steps) asking for an answer matching `model`, for callers that
+    run it among other calls. `normalize` maps alternate answer shapes onto the model's before
+    validation. Timings are recorded under `{stage}.llm`, `{stage}.parse` and `{stage}.reask`.
+    Raises StructuredOutputError when no valid answer was obtained.
+    """
+    kwargs = generation_kwargs(model)
+    with timed(f"{stage}.llm"):
+        response = yield prompt, kwargs
+    content = str(response.content)
+    try:
+        with timed(f"{stage}.parse"):
+            return _parse_and_count(content, model, normalize)
+    except _ANSWER_ERRORS as e:
+        if not reask_enabled():
+            raise _failed(model, e) from e
+        error = e
+
+    logger.warning(f"Invalid {model.__name__} from LLM, re-asking once: {_describe(error)}")
+    with timed(f"{stage}.reask"):
+        response = yield _reask_prompt(prompt, content, error), kwargs
+        return _parse_reask(str(response.content), model, normalize)
+
+
+def invoke_structured(
+    llm: Any,
+    prompt: str,
+    model: Type[Model],
+    stage: str,
+    normalize: Optional[Normalizer] = None
+) -> Model:
+    """Call the LLM for an answer matching `model` (see `structured_steps`)"""
+    return run_steps(structured_steps(prompt, model, stage, normalize), llm)
+
+
+async def ainvoke_structured(
+    llm: Any,
+    prompt: str,
+    model: Type[Model],
+    stage: str,
+    normalize: Optional[Normalizer] = None
+) -> Model:
+    """Async variant of `invoke_structured` using `llm.ainvoke`"""
+    return await arun_steps(structured_steps(prompt, model, stage, normalize), llm)
+
+
+# =====================
+# PARSING
+# =====================
+
+def _load_json(content: str) -> Tuple[Any, bool]:
+    """JSON of an answer and whether it needed repair"""
+    try:
+        return orjson.loads(content), False
+    except orjson.JSONDecodeError:
+        pass
+
+    text = _CODE_FENCE.sub("", content).translate(_SMART_QUOTES).strip()
+    starts = [i for i in (text.find("{"), text.find("[")) if i != -1]
+    if starts:
+        start = min(starts)
+        end = text.rfind("}" if text[start] == "{" else "]")
+        text = text[start:end + 1] if end > start else text[start:]
+    text = _TRAILING_COMMA.sub(r"\1", text)
+    try:
+        return orjson.loads(text), True
+    except orjson.JSONDecodeError as je:
+        logger.debug(f"Unrepairable LLM answer: {content}")
+        raise ValueError(f"LLM returned invalid JSON: {je}") from je
+
+
+def _parse_model(content: str, model: Type[Model], normalize: Optional[Normalizer]) -> Tuple[Model, bool]:
+    data, repaired = _load_json(content)
+    if not isinstance(data, dict):
+        raise ValueError(f"LLM returned a JSON {type(data).__name__} instead of an object")
+    if normalize is not None:
+        data = normalize(data)
+    return model.model_validate(data), repaired
+
+
+def _parse_and_count(content: str, model: Type[Model], normalize: Optional[Normalizer]) -> Model:
+    result, repaired = _parse_model(content, model, normalize)
+    STRUCTURED_OUTPUTS.inc(schema=model.__name__, outcome="repaired" if repaired else "parsed")
+    return result
+
+
+def _parse_reask(content: str, model: Type[Model], normalize: Optional[Normalizer]) -> Model:
+    try:
+        result, _ = _parse_model(content, model, normalize)
+    except _ANSWER_ERRORS as e:
+        raise _failed(model, e) from e
+    STRUCTURED_OUTPUTS.inc(schema=model.__name__, outcome="reasked")
+    return result
+
+
+def _failed(model: Type[BaseModel], error: Exception) -> StructuredOutputError:
+    STRUCTURED_OUTPUTS.inc(schema=model.__name__, outcome="failed")
+    return StructuredOutputError(f"LLM answer does not match {model.__name__}: {_describe(error)}")
+
+
+def _describe(error: Exception) -> str:
+    if isinstance(error, ValidationError):
+        return "; ".join(
+            f"{'.'.join(str(part) for part in e['loc']) or 'answer'}: {e['msg']}" for e in error.errors()[:5]
+        )
+    return str(error)
+
+
+def _reask_prompt(prompt: str, answer: str, error: Exception) -> str:
+    return STRUCTURED_OUTPUT_REASK_PROMPT.format(
+        prompt=prompt,
+        answer=answer[:_REASK_ANSWER_CHARS],
+        error=_describe(error)
+    )
+
+
+def _convert_schema(node: Dict[str, Any], defs: Dict[str, Any]) -> Dict[str, Any]:
+    if "$ref" in node:
+        return _convert_schema(defs[node["$ref"].rsplit("/", 1)[-1]], defs)
+
+    options = node.get("anyOf")
+    if options:
+        # Optional[X] is the only union the response models use
+        present = [option for option in options if option.get("type") != "null"]
+        schema = _convert_schema(present[0], defs)
+        if len(present) < len(options):
+            schema["nullable"] = True
+        return schema
+
+    schema: Dict[str, Any] = {"type_": _SCHEMA_TYPES[node.get("type", "string")]}
+    if node.get("description"):
+        schema["description"] = node["description"]
+    if "enum" in node:
+        schema["format_"] = "enum"
+        schema["enum"] = [str(value) for value in node["enum"]]
+    if node.get("type") == "array":
+        schema["items"] = _convert_schema(node.get("items", {}), defs)
+    elif node.get("type") == "object":
+        schema["properties"] = {name: _convert_schema(value, defs) for name, value in node.get("properties", {}).items()}
+        if node.get("required"):
+            schema["required"] = list(node["required"])
+    return schema
@@ -0,0 +1,257 @@
+"""
+Technician skill index - Compact technician x skill score matrix over the technician roster
+"""
+import logging
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+from pydantic import ValidationError
+from models.skill import Skill
+from models.technician import Technician, AvailabilityStatus, SkillLevel
+
+logger = logging.getLogger(__name__)
+
+SKILL_WEIGHT = 0.6
+WORKLOAD_WEIGHT = 0.4
+
+LEVEL_CODES = {level: code for code, level in enumerate(SkillLevel)}
+
+_INITIAL_ROWS = 16
+_INITIAL_COLS = 16
+
+
+def normalize_skill_name(name: str) -> str:
+    return name.strip().lower()
+
+
+class TechnicianSkillIndex:
+    """
+    Technician x skill matrix of skill scores (0-1 scale) with id -> row and
+    skill-name -> column maps, plus per-row workload, availability and level arrays.
+
+    Rows of removed technicians are recycled, and the matrix grows geometrically,
+    so single-technician updates never rebuild the whole index.
+    """
+
+    def __init__(self, technicians: Iterable[Technician] = ()):
+        self.lock = threading.RLock()
+        self._technicians: List[Optional[Technician]] = []
+        self._free_rows: List[int] = []
+        self._row_by_id: Dict[int, int] = {}
+        self._col_by_skill: Dict[str, int] = {}
+
+        self.scores = np.zeros((_INITIAL_ROWS, _INITIAL_COLS), dtype=np.float32)
+        self.workload = np.zeros(_INITIAL_ROWS, dtype=np.float32)
+        self.live = np.zeros(_INITIAL_ROWS, dtype=bool)
+        self.active = np.zeros(_INITIAL_ROWS, dtype=bool)
+        self.available = np.zeros(_INITIAL_ROWS, dtype=bool)
+        self.levels = np.zeros(_INITIAL_ROWS, dtype=np.int8)
+        self.ids = np.full(_INITIAL_ROWS, -1, dtype=np.int64)
+
+        for technician in technicians:
+            self.upsert(technician)
+
+    @classmethod
+    def from_payload(cls, technicians_data: List[Dict[str, Any]]) -> "TechnicianSkillIndex":
+        """Build an index from the raw `/api/v1/technicians/all` payload"""
+        index = cls()
+        for raw in technicians_data:
+            try:
+                index.upsert(Technician.model_validate(raw))
+            except ValidationError as e:
+                logger.warning(f"Skipping invalid technician record {raw.get('id')}: {e}")
+        return index
+
+    # =====================
+    # ACCESSORS
+    # =====================
+
+    def __len__(self) -> int:
+        return len(self._row_by_id)
+
+    def __contains__(self, technician_id: int) -> bool:
+        return technician_id in self._row_by_id
+
+    @property
+    def technicians(self) -> List[Technician]:
+        with self.lock:
+            return [t for t in self._technicians if t is not None]
+
+    @property
+    def skill_names(self) -> List[str]:
+        return list(self._col_by_skill)
+
+    def get(self, technician_id: Optional[int]) -> Optional[Technician]:
+        row = self._row_by_id.get(technician_id)  # type: ignore[arg-type]
+        return self._technicians[row] if row is not None else None
+
+    def row_of(self, technician_id: int) -> Optional[int]:
+        return self._row_by_id.get(technician_id)
+
+    def technician_at(self, row: int) -> Technician:
+        technician = self._technicians[row]
+        if technician is None:
+            raise KeyError(f"Row {row} does not hold a technician")
+        return technician
+
+    def live_rows(self) -> np.ndarray:
+        return np.flatnonzero(self.live[:len(self._technicians)])
+
+    # =====================
+    # INCREMENTAL UPDATES
+    # =====================
+
+    def upsert(self, technician: Technician) -> int:
+        """Insert or replace a technician, returning its row"""
+        with self.lock:
+            key = technician.id if technician.id is not None else -(len(self._technicians) + 1)
+            row = self._row_by_id.get(key)
+            if row is None:
+                row = self._free_rows.pop() if self._free_rows else self._append_row()
+                self._row_by_id[key] = row
+
+            self._technicians[row] = technician
+            self.scores[row, :] = 0.0
+            for ts in technician.technicianSkills or []:
+                col = self._column_for(ts.skill.name)
+                self.scores[row, col] = ts.score / 100.0
+
+            self.workload[row] = min(max(technician.workload, 0), 100)
+            self.live[row] = True
+            self.active[row] = technician.isActive
+            self.available[row] = technician.isActive and technician.availabilityStatus == AvailabilityStatus.AVAILABLE
+            self.levels[row] = LEVEL_CODES[technician.technicianLevel]
+            self.ids[row] = key
+            return row
+
+    def remove(self, technician_id: int) -> bool:
+        with self.lock:
+            row = self._row_by_id.pop(technician_id, None)
+            if row is None:
+                return False
+            self._technicians[row] = None
+            self.scores[row, :] = 0.0
+            self.live[row] = self.active[row] = self.available[row] = False
+            self.ids[row] = -1
+            self._free_rows.append(row)
+            return True
+
+    def adjust_workload(self, technician_id: int, workload_delta: int, ticket_delta: int = 0) -> Optional[Technician]:
+        """Shift a technician's workload (0-100) and current ticket count, returning the updated model"""
+        with self.lock:
+            technician = self.get(technician_id)
+            if technician is None:
+                return None
+            updated = technician.model_copy(update={
+                "workload": min(max(technician.workload + workload_delta, 0), 100),
+                "currentTickets": max(technician.currentTickets + ticket_delta, 0),
+            })
+            self.upsert(updated)
+            return updated
+
+    def copy(self) -> "TechnicianSkillIndex":
+        """Independent copy that can be modified without affecting this index"""
+        with self.lock:
+            clone = TechnicianSkillIndex()
+            clone._technicians = list(self._technicians)
+            clone._free_rows = list(self._free_rows)
+            clone._row_by_id = dict(self._row_by_id)
+            clone._col_by_skill = dict(self._col_by_skill)
+            clone.scores = self.scores.copy()
+            clone.workload = self.workload.copy()
+            clone.live = self.live.copy()
+            clone.active = self.active.copy()
+            clone.available = self.available.copy()
+            clone.levels = self.levels.copy()
+            clone.ids = self.ids.copy()
+            return clone
+
+    def _append_row(self) -> int:
+        row = len(self._technicians)
+        self._technicians.append(None)
+        if row >= self.scores.shape[0]:
+            capacity = self.scores.shape[0] * 2
+            self.scores = _grow(self.scores, (capacity, self.scores.shape[1]))
+            self.workload = _grow(self.workload, (capacity,))
+            self.live = _grow(self.live, (capacity,))
+            self.active = _grow(self.active, (capacity,))
+            self.available = _grow(self.available, (capacity,))
+            self.levels = _grow(self.levels, (capacity,))
+            self.ids = _grow(self.ids, (capacity,), fill=-1)
+        return row
+
+    def _column_for(self, skill_name: str) -> int:
+        key = normalize_skill_name(skill_name)
+        col = self._col_by_skill.get(key)
+        if col is None:
+            col = len(self._col_by_skill)
+            self._col_by_skill[key] = col
+            if col >= self.scores.shape[1]:
+                self.scores = _grow(self.scores, (self.scores.shape[0], self.scores.shape[1] * 2))
+        return col
+
+    # =====================
+    # QUERIES
+    # =====================
+
+    def required_columns(self, required_skills: Sequence[Skill]) -> Tuple[np.ndarray, int]:
+        """Map required skills onto matrix columns; returns (known columns, total distinct required)"""
+        names = {normalize_skill_name(s.name) for s in required_skills}
+        cols = [self._col_by_skill[n] for n in names if n in self._col_by_skill]
+        return np.array(cols, dtype=np.intp), len(names)
+
+    def skill_match(self, required_skills: Sequence[Skill]) -> np.ndarray:
+        """
+        Skill_Match_Score for every row: (matching / required) * (average matching score),
+        i.e. the sum of matching skill scores divided by the number of required skills.
+        """
+        rows = len(self._technicians)
+        cols, total = self.required_columns(required_skills)
+        if total == 0 or cols.size == 0:
+            return np.zeros(rows, dtype=np.float32)
+        return self.scores[:rows, cols].sum(axis=1) / np.float32(total)
+
+    def workload_score(self) -> np.ndarray:
+        return 1.0 - self.workload[:len(self._technicians)] / 100.0
+
+    def suitability(self, required_skills: Sequence[Skill]) -> np.ndarray:
+        return SKILL_WEIGHT * self.skill_match(required_skills) + WORKLOAD_WEIGHT * self.workload_score()
+
+    def matched_skill_names(self, technician: Technician, required_skills: Sequence[Skill]) -> List[str]:
+        required = {normalize_skill_name(s.name) for s in required_skills}
+        return [
+            ts.skill.name for ts in technician.technicianSkills or []
+            if normalize_skill_name(ts.skill.name) in required
+        ]
+
+    def top_k(
+        self,
+        required_skills: Sequence[Skill],
+        k: int,
+        exclude_unavailable: bool = True,
+        levels: Optional[Iterable[SkillLevel]] = None
+    ) -> List[Tuple[Technician, float]]:
+        """Top-K technicians by weighted suitability for the required skills"""
+        with self.lock:
+            rows = len(self._technicians)
+            suitability = self.suitability(required_skills)
+            mask = self.live[:rows].copy()
+            if exclude_unavailable:
+                mask &= self.available[:rows]
+            if levels is not None:
+                mask &= np.isin(self.levels[:rows], [LEVEL_CODES[level] for level in levels])
+
+            candidates = np.flatnonzero(mask)
+            if candidates.size == 0 or k <= 0:
+                return []
+            if candidates.size > k:
+                part = np.argpartition(-suitability[candidates], k - 1)[:k]
+                candidates = candidates[part]
+            order = np.lexsort((self.ids[candidates], -suitability[candidates]))
+            return [(self.technician_at(r), float(suitability[r])) for r in candidates[order]]
+
+
+def _grow(array: np.ndarray, shape: Tuple[int, ...], fill: Any = 0) -> np.ndarray:
+    grown = np.full(shape, fill, dtype=array.dtype)
+    grown[tuple(slice(0, n) for n in array.shape)] = array
+    return grown
@@ -0,0 +1,251 @@
+"""
+Technician scoring service - Deterministic implementation of the assignment rules
+(Rule 1/2/3) used to rank technicians for a ticket without an LLM round-trip
+"""
+import logging
+from typing import Dict, List, Optional, Tuple, Union
+import numpy as np
+from pydantic import BaseModel, ConfigDict
+from models.ticket import Ticket, PriorityLevel
+from models.skill import Skill
+from models.technician import Technician, SkillLevel, AvailabilityStatus
+from services.technician_index import (
+    LEVEL_CODES,
+    SKILL_WEIGHT,
+    WORKLOAD_WEIGHT,
+    TechnicianSkillIndex,
+)
+
+logger = logging.getLogger(__name__)
+
+EXPERIENCED_LEVELS = {SkillLevel.SENIOR, SkillLevel.EXPERT}
+TRAINING_LEVELS = {SkillLevel.JUNIOR, SkillLevel.MID}
+
+RULE_CRITICAL = "critical"
+RULE_STANDARD = "standard"
+RULE_TRAINING = "training"
+
+
+class ScoredTechnician(BaseModel):
+    """A technician together with the scores computed for a ticket"""
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    technician: Technician
+    skill_match: float
+    workload_score: float
+    suitability: float
+    matched_skills: List[str]
+
+
+def as_index(roster: Union[List[Technician], TechnicianSkillIndex]) -> TechnicianSkillIndex:
+    """Accept either a technician list or a prebuilt index"""
+    if isinstance(roster, TechnicianSkillIndex):
+        return roster
+    return TechnicianSkillIndex(roster)
+
+
+def rule_for_priority(priority: PriorityLevel) -> str:
+    """Map a ticket priority onto the assignment rule that governs it"""
+    if priority == PriorityLevel.critical:
+        return RULE_CRITICAL
+    if priority == PriorityLevel.low:
+        return RULE_TRAINING
+    return RULE_STANDARD
+
+
+class RuleEvaluation(BaseModel):
+    """Vectorized result of applying the assignment rules to every live row of an index"""
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    rule: str
+    rows: np.ndarray
+    skill_match: np.ndarray
+    workload_score: np.ndarray
+    suitability: np.ndarray
+    # Named boolean masks (aligned with `rows`) that the eligible tier was built from
+    conditions: Dict[str, np.ndarray]
+    eligible: np.ndarray
+    # Positions into `rows` of the eligible technicians, best candidate first
+    order: np.ndarray
+
+
+def evaluate_rules(
+    ticket: Ticket,
+    index: TechnicianSkillIndex,
+    required_skills: List[Skill]
+) -> RuleEvaluation:
+    """
+    Apply the assignment rules to every technician in the index.
+    Callers must hold `index.lock` while using the returned rows.
+
+    Skill_Match_Score = (matching / required) * (average matching score / 100) and
+    Workload_Score = 1 - workload (workload expressed as a 0-100 percentage).
+    """
+    rule = rule_for_priority(ticket.priority)
+    rows = index.live_rows()
+
+    skill_match = index.skill_match(required_skills)[rows]
+    workload_score = index.workload_score()[rows]
+    suitability = SKILL_WEIGHT * skill_match + WORKLOAD_WEIGHT * workload_score
+    ids = index.ids[rows]
+
+    levels = index.levels[rows]
+    active = index.active[rows]
+    available = index.available[rows]
+    experienced = np.isin(levels, [LEVEL_CODES[level] for level in EXPERIENCED_LEVELS])
+    training = np.isin(levels, [LEVEL_CODES[level] for level in TRAINING_LEVELS])
+    qualified = skill_match > 0
+    everyone = np.ones(rows.size, dtype=bool)
+
+    if rule == RULE_CRITICAL:
+        # Availability is ignored; experienced specialists first, lowest workload wins
+        tiers = [
+            {"active": active, "qualified": qualified, "level": experienced},
+            {"active": active, "qualified": qualified},
+            {"active": active},
+            {},
+        ]
+        order = np.lexsort((ids, -skill_match, -workload_score))
+    else:
+        if rule == RULE_TRAINING:
+            tiers = [
+                {"available": available, "level": training, "qualified": qualified},
+                {"available": available, "qualified": qualified},
+                {"available": available},
+                {"active": active},
+                {},
+            ]
+        else:
+            tiers = [{"available": available}, {"active": active}, {}]
+        order = np.lexsort((ids, -workload_score, -suitability))
+
+    conditions: Dict[str, np.ndarray] = {}
+    eligible = everyone
+    for tier in tiers:
+        mask = everyone.copy()
+        for condition in tier.values():
+            mask &= condition
+        if mask.any() or not tier:
+            conditions, eligible = tier, mask
+            break
+
+    return RuleEvaluation(
+        rule=rule,
+        rows=rows,
+        skill_match=skill_match,
+        workload_score=workload_score,
+        suitability=suitability,
+        conditions=conditions,
+        eligible=eligible,
+        order=order[eligible[order]]
+    )
+
+
+def scored_technician(
+    index: TechnicianSkillIndex,
+    evaluation: RuleEvaluation,
+    position: int,
+    required_skills: List[Skill]
+) -> ScoredTechnician:
+    technician = index.technician_at(evaluation.rows[position])
+    return ScoredTechnician(
+        technician=technician,
+        skill_match=float(evaluation.skill_match[position]),
+        workload_score=float(evaluation.workload_score[position]),
+        suitability=float(evaluation.suitability[position]),
+        matched_skills=index.matched_skill_names(technician, required_skills)
+    )
+
+
+def rank_technicians(
+    ticket: Ticket,
+    roster: Union[List[Technician], TechnicianSkillIndex],
+    required_skills: List[Skill],
+    limit: Optional[int] = None
+) -> Tuple[str, List[ScoredTechnician]]:
+    """
+    Apply the assignment rules to the technician roster.
+    Returns the rule that was applied and the eligible technicians, best candidate first.
+    """
+    index = as_index(roster)
+    with index.lock:
+        evaluation = evaluate_rules(ticket, index, required_skills)
+        order = evaluation.order if limit is None else evaluation.order[:limit]
+        ranked = [scored_technician(index, evaluation, i, required_skills) for i in order]
+    return evaluation.rule, ranked
+
+
+def select_technician_locally(
+    ticket: Ticket,
+    roster: Union[List[Technician], TechnicianSkillIndex],
+    required_skills: List[Skill]
+) -> Tuple[Optional[ScoredTechnician], str]:
+    """Pick the best technician for a ticket using the deterministic rules only"""
+    rule, ranked = rank_technicians(ticket, roster, required_skills, limit=1)
+    if not ranked:
+        return None, rule
+    best = ranked[0]
+    logger.info(
+        f"Local scoring selected {best.technician.name} (ID: {best.technician.id}) "
+        f"under {rule} rule with suitability {best.suitability:.3f}"
+    )
+    return best, rule
+
+
+# =====================
+# TEMPLATED JUSTIFICATION
+# =====================
+
+_LEVEL_DESCRIPTIONS = {
+    SkillLevel.JUNIOR: "junior technician",
+    SkillLevel.MID: "mid-level technician",
+    SkillLevel.SENIOR: "senior specialist",
+    SkillLevel.EXPERT: "experienced expert",
+}
+
+_AVAILABILITY_DESCRIPTIONS = {
+    AvailabilityStatus.AVAILABLE: "currently available",
+    AvailabilityStatus.BUSY: "currently busy",
+    AvailabilityStatus.IN_MEETING: "currently in a meeting",
+    AvailabilityStatus.ON_BREAK: "currently on a break",
+    AvailabilityStatus.END_OF_SHIFT: "at the end of their shift",
+    AvailabilityStatus.FOCUS_MODE: "currently in focus mode",
+}
+
+
+def describe_workload(workload: int) -> str:
+    if workload < 30:
+        return "low current workload"
+    if workload < 70:
+        return "moderate workload"
+    return "high workload"
+
+
+def build_local_justification(ticket: Ticket, scored: ScoredTechnician, rule: str, required_skills: List[Skill]) -> str:
+    """Build a human-readable, pointwise justification without calling the LLM"""
+    tech = scored.technician
+    level = _LEVEL_DESCRIPTIONS.get(tech.technicianLevel, "technician")
+    points = []
+
+    if rule == RULE_CRITICAL:
+        points.append(f"Assigned to handle this critical issue: {ticket.subject}")
+        points.append(f"Technician is a {level} selected for immediate, expert attention")
+    elif rule == RULE_TRAINING:
+        points.append(f"Assigned to handle this low priority request: {ticket.subject}")
+        points.append(f"Technician is a {level}, making this a good skill development opportunity")
+    else:
+        points.append(f"Assigned to handle this {ticket.priority.value} priority request: {ticket.subject}")
+        points.append(f"Technician is a {level} with the best balance of expertise and capacity")
+
+    if scored.matched_skills:
+        if len(scored.matched_skills) == len(required_skills):
+            points.append(f"Possesses all required skills including {', '.join(scored.matched_skills)}")
+        else:
+            points.append(f"Possesses relevant skills including {', '.join(scored.matched_skills)}")
+    elif required_skills:
+        points.append("No technician fully matches the required skills, so capacity and experience were prioritized")
+
+    availability = _AVAILABILITY_DESCRIPTIONS.get(tech.availabilityStatus, "available")
+    points.append(f"Technician is {availability} and has a {describe_workload(tech.workload)}")
+
+    return "\n".join(f"• {point}" for point in points)
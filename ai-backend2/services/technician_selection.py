@@ -1,194 +1,401 @@
 """
 Technician selection service - Select the best technician for a ticket based on skills and availability
 """
-import json
 import logging
-from typing import List, Dict, Any, Optional, Tuple
-from langchain.prompts import PromptTemplate
+import os
+import time
+from typing import List, Dict, Any, Iterator, Optional, Tuple, Union
 from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.output_parsers import JsonOutputParser
+from pydantic import BaseModel
 from models.ticket import Ticket
 from models.skill import Skill
 from models.technician import Technician
+from services.assignment_reservations import AssignmentReservations
+from services.llm_steps import LLMSteps, arun_steps, run_steps
+from services.metrics import record_stage, timed
+from services.prompts import JUSTIFICATION_PROMPT, TECHNICIAN_SELECTION_PROMPT
+from services.structured_output import invoke_structured, structured_steps
+from services.technician_index import TechnicianSkillIndex
+from services.technician_scoring import (
+    ScoredTechnician,
+    as_index,
+    build_local_justification,
+    describe_workload,
+    evaluate_rules,
+    select_technician_locally,
+)
 
 logger = logging.getLogger(__name__)
 
+SELECTION_MODES = ("llm", "hybrid", "fast")
+DEFAULT_SELECTION_MODE = "hybrid"
+DEFAULT_SHORTLIST_SIZE = 10
+
+# Reason reported for technicians excluded by each rule condition
+_FILTER_REASONS = {
+    "active": "inactive",
+    "available": "unavailable",
+    "level": "level_mismatch",
+    "qualified": "no_skill_match",
+}
+
+
+class TechnicianSelectionResponse(BaseModel):
+    """The LLM's answer in "llm" mode"""
+    selected_technician_id: Optional[int] = None
+    justification: str
+
+
+class TechnicianShortlist(BaseModel):
+    """Locally ranked candidates that are forwarded to technician selection"""
+    candidates: List[Technician]
+    rule: str
+    total_technicians: int
+    filter_reasons: Dict[str, int]
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "size": len(self.candidates),
+            "total_technicians": self.total_technicians,
+            "rule": self.rule,
+            "filter_reasons": self.filter_reasons,
+        }
+
+
+def get_shortlist_size() -> int:
+    return int(os.environ.get("TECHNICIAN_SHORTLIST_SIZE", DEFAULT_SHORTLIST_SIZE))
+
+
+def shortlist_technicians(
+    ticket: Ticket,
+    available_technicians: Union[List[Technician], TechnicianSkillIndex],
+    required_skills: List[Skill],
+    size: Optional[int] = None
+) -> TechnicianShortlist:
+    """
+    Prefilter the roster down to the top-K candidates for a ticket.
+    Candidates are ranked locally by the assignment rules (skill overlap with the
+    required skills, availability and workload). A size of 0 disables the cutoff.
+    """
+    size = get_shortlist_size() if size is None else size
+    index = as_index(available_technicians)
+
+    with timed("shortlist"), index.lock:
+        evaluation = evaluate_rules(ticket, index, required_skills)
+        order = evaluation.order if size <= 0 else evaluation.order[:size]
+        candidates = [index.technician_at(evaluation.rows[i]) for i in order]
+
+        filter_reasons: Dict[str, int] = {}
+        excluded = ~evaluation.eligible
+        for name, condition in evaluation.conditions.items():
+            failed = excluded & ~condition
+            if failed.any():
+                filter_reasons[_FILTER_REASONS[name]] = int(failed.sum())
+            excluded &= condition
+        cut = len(evaluation.order) - len(order)
+        if cut:
+            filter_reasons["below_shortlist_cutoff"] = cut
+
+    logger.info(
+        f"Shortlisted {len(candidates)} of {evaluation.rows.size} technicians "
+        f"under {evaluation.rule} rule: {filter_reasons}"
+    )
+    return TechnicianShortlist(
+        candidates=candidates,
+        rule=evaluation.rule,
+        total_technicians=int(evaluation.rows.size),
+        filter_reasons=filter_reasons
+    )
+
+
+def _resolve_mode(mode: Optional[str]) -> str:
+    mode = (mode or os.environ.get("TECHNICIAN_SELECTION_MODE", DEFAULT_SELECTION_MODE)).lower()
+    if mode not in SELECTION_MODES:
+        logger.warning(f"Unknown technician selection mode '{mode}', falling back to '{DEFAULT_SELECTION_MODE}'")
+        mode = DEFAULT_SELECTION_MODE
+    return mode
+
+
+def _degraded_mode(mode: str, llm: Any) -> str:
+    """Local scoring with a templated justification while the LLM circuit breaker is open"""
+    breaker = getattr(llm, "breaker", None)
+    if mode != "fast" and breaker is not None and breaker.is_open:
+        logger.info(f"LLM circuit breaker open, selecting locally instead of '{mode}' mode")
+        return "fast"
+    return mode
+
+
+def selection_mode(mode: Optional[str], llm: Any) -> str:
+    """Mode a selection call with `mode` runs in right now, after any circuit-breaker downgrade"""
+    return _degraded_mode(_resolve_mode(mode), llm)
+
+
+def selection_prompt_names(mode: Optional[str] = None) -> Tuple[str, ...]:
+    """Names of the prompts technician selection sends in the given mode"""
+    mode = _resolve_mode(mode)
+    if mode == "llm":
+        return (TECHNICIAN_SELECTION_PROMPT.name,)
+    if mode == "hybrid":
+        return (JUSTIFICATION_PROMPT.name,)
+    return ()
+
 
 def select_best_technician_for_ticket(
     ticket: Ticket,
-    available_technicians: List[Technician],
+    available_technicians: Union[List[Technician], TechnicianSkillIndex],
     required_skills: List[Skill],
-    llm: ChatGoogleGenerativeAI
+    llm: ChatGoogleGenerativeAI,
+    mode: Optional[str] = None,
+    reservations: Optional[AssignmentReservations] = None
 ) -> Tuple[Optional[Technician], str]:
     """
-    Single-function implementation of the technician selection process using an LLM.
-    This replaces the TechnicianSelectionService class entirely.
-    """
+    Select the best technician for a ticket.
 
-    try:
-        logger.info(f"Selecting technician for ticket: {ticket.subject}")
-
-        # --- Step 1: Setup prompt and parser ---
-        json_parser = JsonOutputParser()
-        technician_selection_prompt = PromptTemplate(
-            template="""
-                LLM Prompt: The Intelligent Ticket Assignment System
-
-                Your Role: You are an advanced AI-powered Ticket Assignment System. Your primary function is to analyze an incoming support ticket and a list of available technicians to determine the single best technician for the job. You must follow a strict set of rules to ensure efficiency, proper skill utilization, and timely resolution of issues.
-
-                Input Data Structure:  
-                You will be given two JSON objects: `technicians` and `ticket`.
-
-                - `technicians`: An array of objects, where each object represents a technician with the following structure.
-                - `ticket`: An object representing the ticket to be assigned.
-
-                Assignment Rules & Logic:  
-                You must follow these rules in order. The first rule that matches the ticket's priority dictates the assignment logic.
-
-                **Rule 1: Critical Priority Tickets**  
-                If `ticket.priority` is `"critical"`:
-                - **Identify Specialists**: Immediately filter the technician list to find those whose specialization matches the core issue described in the ticket's `name` and `description`.
-                - **Select the Expert**: From that filtered list, assign the ticket to a technician with a `skill_level` of `"experienced"`.
-                - **Override Other Factors**: For critical tickets, ignore both `workload` and `availability_status`. The urgency of the ticket is the only thing that matters. If multiple experienced specialists exist, select the one with the lower workload.
-
-                **Rule 2: High & Medium Priority Tickets**  
-                If `ticket.priority` is `"high"` or `"medium"`:
-                - **Filter by Availability**: First, filter the list to exclude all the technicians with `availability_status` of `"unavailable"`.
-                - **Calculate Suitability Score**: For each available technician, calculate a Suitability Score using the following weighted formula:  
-                `Score = (0.6 * Skill_Match_Score) + (0.4 * Workload_Score)`
-
-                - *Skill_Match_Score* (0 to 1 scale):  
-                    Count how many of the `ticket.required_skills` the technician possesses.  
-                    Calculate the average percentage of those matching skills.  
-                    Final `Skill_Match_Score` = (count_of_matching_skills / total_required_skills) * (average_percentage / 100).  
-                    A technician who has most of the required skills with a high percentage will score the highest.
-
-                - *Workload_Score* (0 to 1 scale):  
-                    This score is inversely related to the technician's workload. A lower workload is better.  
-                    Calculate it as: `1 - workload`.  
-                    A technician with a workload of 0.2 gets a score of 0.8.
-
-                - **Assign to Highest Score**: Assign the ticket to the technician with the highest final Suitability Score.
-
-                **Rule 3: Low Priority Tickets**  
-                If `ticket.priority` is `"low"`:
-                - **Training Opportunity**: These tickets are ideal for skill development. You should primarily consider technicians with a `skill_level` of `"junior"` or `"mid"`.
-                - **Apply Standard Scoring**: Use the same Suitability Score formula from Rule 2 to find the best fit among junior and mid-level technicians who are `"available"`. This ensures they are still qualified, but gives them the opportunity before it goes to an experienced technician.
-                - **Fallback**: If no junior or mid-level technicians are available or qualified, then evaluate experienced technicians using the same scoring logic.
-
-                Output Format Requirements:
-
-                Your final output must be a single JSON object containing the ID of the chosen technician and a clear, detailed, and pointwise justification for your choice.
-
-                CRITICAL INSTRUCTIONS FOR JUSTIFICATION:
-
-                **STRICTLY PROHIBITED ELEMENTS - NEVER INCLUDE THESE:**
-                - NO SKILL IDs (e.g., "Skill ID 42", "Skill ID 26") - Always use actual skill names
-                - NO TECHNICIAN IDs in justification text (only in the selected_technician_id field)
-                - NO TICKET IDs or internal reference numbers
-                - NO RULE NUMBERS (e.g., "Rule 2", "High & Medium Priority Rule")
-                - NO TECHNICAL METADATA or system-generated codes
-                - NO PERCENTAGE VALUES IN PARENTHESES after skill names (e.g., "Access Control (92%)")
-                - NO NUMERICAL SCORES or calculations in the justification text
-
-                **REQUIRED JUSTIFICATION FORMAT:**
-                - Each point must start on a new line with a bullet point or number
-                - Use only human-readable skill names (e.g., "Network Security", "Database Management", "Active Directory")
-                - Reference availability status in plain English (e.g., "currently available", "busy")
-                - Mention skill level in descriptive terms (e.g., "experienced specialist", "mid-level technician")
-                - Describe workload in general terms (e.g., "low current workload", "moderate workload")
-                - Keep language professional and presentable to end-users
-                - Focus on business rationale rather than technical calculations
-                - Keep the justification detailed and pointwise considering every scenarios.
-
-                Example Output:
-                {{
-                    "selected_technician_id": 10,
-                    "justification": "• Assigned to handle this critical network security incident\\n• Technician is an experienced specialist in Network Security with proven expertise\\n• Possesses all required skills including Firewall Management and Intrusion Detection\\n• Currently available and has low workload to ensure immediate response\\n• Strong track record in resolving similar high-impact security issues"
-                }}
-
-                **Input:**
-
-                Ticket Data  
-                Name: {ticket_name}  
-                Description: {ticket_description}  
-                Priority: {ticket_priority}  
-
-                Skills required for the ticket:  
-                {required_skills}
-
-                Technicians:  
-                {available_technicians}
-            """,
-            input_variables=["ticket_name", "ticket_description", "ticket_priority", "available_technicians", "required_skills"]
-        )
+    Modes (defaults to the TECHNICIAN_SELECTION_MODE environment variable):
+    - "llm":    the LLM applies the assignment rules and writes the justification
+    - "hybrid": the rules are scored locally and the LLM only writes the justification
+    - "fast":   the rules are scored locally and the justification is templated (no LLM call)
 
-        # --- Step 2: Helper formatters ---
-        def _format_skills(skills: List[Skill]) -> str:
-            return "\n".join(f"- {skill.name}" for skill in skills)
-
-        def _format_technicians_for_prompt(technicians: List[Technician]) -> str:
-            lines = []
-            for tech in technicians:
-                # Format skills properly
-                skills_str = ", ".join([f"{ts.skill.name} ({ts.score}%)" for ts in tech.technicianSkills]) if tech.technicianSkills else "No skills"
-                
-                info = [
-                    f"- ID: {tech.id}, Name: {tech.name}",
-                    f"Workload: {tech.workload}%",
-                    f"Skills: {skills_str}",
-                    f"Skill Level: {tech.technicianLevel.value}",
-                    f"Availability: {tech.availabilityStatus.value}"
-                ]
-                lines.append(", ".join(info))
-            return "\n".join(lines)
-
-        def _find_technician_by_id(technicians: List[Technician], technician_id: int) -> Optional[Technician]:
-            return next((t for t in technicians if t.id == technician_id), None)
-
-        def _parse_llm_response(content: str) -> Dict[str, Any]:
-            try:
-                return json_parser.parse(str(content))
-            except Exception:
-                try:
-                    return json.loads(str(content))
-                except json.JSONDecodeError as je:
-                    logger.error(f"Invalid JSON from LLM: {content}")
-                    raise ValueError(f"Invalid JSON response from LLM: {str(je)}")
-
-        # --- Step 3: Prepare data ---
-        required_skills_text = _format_skills(required_skills)
-        technicians_text = _format_technicians_for_prompt(available_technicians)
-
-        prompt = technician_selection_prompt.format(
-            ticket_name=ticket.subject,
-            ticket_description=ticket.description,
-            ticket_priority=ticket.priority,
-            available_technicians=technicians_text,
-            required_skills=required_skills_text
-        )
+    `available_technicians` may be a prebuilt TechnicianSkillIndex, which avoids
+    rebuilding the skill matrix on every call.
 
-        # --- Step 4: Send to LLM ---
-        logger.info("Sending technician selection prompt to LLM")
-        response = llm.invoke(prompt)
+    With `reservations`, technicians are compared on their effective workload (including
+    assignments still in flight) and the chosen technician is reserved for the ticket
+    right away, before any justification is written.
+    """
+    mode = _degraded_mode(_resolve_mode(mode), llm)
+    return run_steps(_selection_steps(ticket, available_technicians, required_skills, mode, reservations), llm)
 
-        # --- Step 5: Parse response ---
-        result_data = _parse_llm_response(str(response.content))
-        selected_technician_id = result_data["selected_technician_id"]
-        justification = result_data["justification"]
 
-        selected_technician = _find_technician_by_id(available_technicians, selected_technician_id)
+async def aselect_best_technician_for_ticket(
+    ticket: Ticket,
+    available_technicians: Union[List[Technician], TechnicianSkillIndex],
+    required_skills: List[Skill],
+    llm: ChatGoogleGenerativeAI,
+    mode: Optional[str] = None,
+    reservations: Optional[AssignmentReservations] = None
+) -> Tuple[Optional[Technician], str]:
+    """Async variant of `select_best_technician_for_ticket` using `llm.ainvoke`"""
+    mode = _degraded_mode(_resolve_mode(mode), llm)
+    return await arun_steps(_selection_steps(ticket, available_technicians, required_skills, mode, reservations), llm)
 
-        if selected_technician:
-            logger.info(
-                f"Technician selected: {selected_technician.name} (ID: {selected_technician.id}) "
-                f"with justification: {justification}"
-            )
-        else:
-            logger.warning(f"LLM selected technician ID {selected_technician_id} not found in available technicians")
 
-        return selected_technician, justification
+def _selection_steps(
+    ticket: Ticket,
+    available_technicians: Union[List[Technician], TechnicianSkillIndex],
+    required_skills: List[Skill],
+    mode: str,
+    reservations: Optional[AssignmentReservations]
+) -> LLMSteps[Tuple[Optional[Technician], str]]:
+    index = as_index(available_technicians)
+
+    try:
+        logger.info(f"Selecting technician for ticket: {ticket.subject} (mode: {mode})")
+
+        if mode == "llm":
+            try:
+                logger.info("Sending technician selection prompt to LLM")
+                with timed("selection.prompt_build"):
+                    prompt = _build_selection_prompt(ticket, _effective(index, reservations), required_skills)
+                selection = yield from structured_steps(prompt, TechnicianSelectionResponse, "selection")
+            except Exception as e:
+                logger.error(f"LLM technician selection failed, falling back to local scoring: {str(e)}")
+                mode = "fast"
+            else:
+                return _resolve_llm_selection(index, selection, ticket, reservations)
+
+        with timed("selection.local_scoring"):
+            best, rule = _select_locally(ticket, index, required_skills, reservations)
+        if not best:
+            return None, "No technicians available for selection"
+
+        if mode == "fast":
+            return best.technician, build_local_justification(ticket, best, rule, required_skills)
+
+        try:
+            logger.info("Sending justification prompt to LLM")
+            with timed("justification.llm"):
+                response = yield _build_justification_prompt(ticket, best, required_skills), {}
+            justification = str(response.content).strip()
+        except Exception as e:
+            logger.error(f"Error generating justification with LLM: {str(e)}")
+            justification = ""
+
+        return best.technician, justification or build_local_justification(ticket, best, rule, required_skills)
 
     except Exception as e:
         logger.error(f"Error during technician selection: {str(e)}")
         return None, f"Error during technician selection: {str(e)}"
+
+
+def iter_technician_selection(
+    ticket: Ticket,
+    available_technicians: Union[List[Technician], TechnicianSkillIndex],
+    required_skills: List[Skill],
+    llm: ChatGoogleGenerativeAI,
+    mode: Optional[str] = None,
+    reservations: Optional[AssignmentReservations] = None
+) -> Iterator[Tuple[str, Any]]:
+    """
+    Streaming variant of `select_best_technician_for_ticket`, yielding (event, value) pairs:
+    - ("technician", Technician or None) as soon as the choice is made: right after local
+      scoring in "hybrid" and "fast" mode, once the LLM answered in "llm" mode
+    - ("justification", str) pieces of the justification, token by token in "hybrid" mode
+    - ("justification_reset", None) when a streamed justification broke off and is replaced
+    - ("done", (justification, source)) with the full justification and its source ("llm" or "local")
+    Nothing follows a None technician.
+    """
+    mode = _degraded_mode(_resolve_mode(mode), llm)
+    index = as_index(available_technicians)
+    logger.info(f"Streaming technician selection for ticket: {ticket.subject} (mode: {mode})")
+
+    if mode == "llm":
+        try:
+            with timed("selection.prompt_build"):
+                prompt = _build_selection_prompt(ticket, _effective(index, reservations), required_skills)
+            selection = invoke_structured(llm, prompt, TechnicianSelectionResponse, "selection")
+        except Exception as e:
+            logger.error(f"LLM technician selection failed, falling back to local scoring: {str(e)}")
+            mode = "fast"
+        else:
+            technician, justification = _resolve_llm_selection(index, selection, ticket, reservations)
+            yield "technician", technician
+            if technician:
+                yield "justification", justification
+                yield "done", (justification, "llm")
+            return
+
+    with timed("selection.local_scoring"):
+        best, rule = _select_locally(ticket, index, required_skills, reservations)
+    yield "technician", best.technician if best else None
+    if not best:
+        return
+
+    if mode == "hybrid":
+        streamed: List[str] = []
+        completed = False
+        started = time.perf_counter()
+        try:
+            for chunk in llm.stream(_build_justification_prompt(ticket, best, required_skills)):
+                delta = str(chunk.content)
+                if not delta:
+                    continue
+                if not streamed:
+                    record_stage("justification.first_token", time.perf_counter() - started)
+                streamed.append(delta)
+                yield "justification", delta
+            completed = True
+        except Exception as e:
+            logger.error(f"Error streaming justification from LLM: {str(e)}")
+        finally:
+            record_stage("justification.stream", time.perf_counter() - started)
+
+        justification = "".join(streamed).strip()
+        if completed and justification:
+            yield "done", (justification, "llm")
+            return
+        if streamed:
+            yield "justification_reset", None
+
+    justification = build_local_justification(ticket, best, rule, required_skills)
+    yield "justification", justification
+    yield "done", (justification, "local")
+
+
+def _effective(index: TechnicianSkillIndex, reservations: Optional[AssignmentReservations]) -> TechnicianSkillIndex:
+    return reservations.effective(index) if reservations is not None else index
+
+
+def _select_locally(
+    ticket: Ticket,
+    index: TechnicianSkillIndex,
+    required_skills: List[Skill],
+    reservations: Optional[AssignmentReservations]
+) -> Tuple[Optional[ScoredTechnician], str]:
+    """Local pick on effective workloads, reserving the pick before concurrent selections can see the same roster"""
+    if reservations is None:
+        return select_technician_locally(ticket, index, required_skills)
+    with reservations.lock:
+        best, rule = select_technician_locally(ticket, reservations.effective(index), required_skills)
+        if best:
+            reservations.reserve(index.get(best.technician.id) or best.technician, ticket.id)
+    return best, rule
+
+
+# =====================
+# PROMPT BUILDING AND PARSING
+# =====================
+
+def _format_skills(skills: List[Skill]) -> str:
+    return "\n".join(f"- {skill.name}" for skill in skills)
+
+
+def _format_technician_skills(tech: Technician) -> str:
+    return ", ".join(
+        f"{ts.skill.name} ({ts.score}%)" for ts in tech.technicianSkills
+    ) if tech.technicianSkills else "No skills"
+
+
+def format_technicians_for_prompt(technicians: List[Technician]) -> str:
+    lines = []
+    for tech in technicians:
+        info = [
+            f"- ID: {tech.id}, Name: {tech.name}",
+            f"Workload: {tech.workload}%",
+            f"Skills: {_format_technician_skills(tech)}",
+            f"Skill Level: {tech.technicianLevel.value}",
+            f"Availability: {tech.availabilityStatus.value}"
+        ]
+        lines.append(", ".join(info))
+    return "\n".join(lines)
+
+
+def _build_selection_prompt(ticket: Ticket, index: TechnicianSkillIndex, required_skills: List[Skill]) -> str:
+    return TECHNICIAN_SELECTION_PROMPT.format(
+        ticket_name=ticket.subject,
+        ticket_description=ticket.description,
+        ticket_priority=ticket.priority,
+        available_technicians=format_technicians_for_prompt(index.technicians),
+        required_skills=_format_skills(required_skills)
+    )
+
+
+def _build_justification_prompt(ticket: Ticket, scored: ScoredTechnician, required_skills: List[Skill]) -> str:
+    tech = scored.technician
+    return JUSTIFICATION_PROMPT.format(
+        ticket_name=ticket.subject,
+        ticket_description=ticket.description,
+        ticket_priority=ticket.priority.value,
+        required_skills=_format_skills(required_skills) or "None",
+        technician_name=tech.name,
+        technician_level=tech.technicianLevel.value,
+        technician_availability=tech.availabilityStatus.value,
+        technician_workload=describe_workload(tech.workload),
+        technician_skills=_format_technician_skills(tech),
+        matched_skills=", ".join(scored.matched_skills) or "None"
+    )
+
+
+def _resolve_llm_selection(
+    index: TechnicianSkillIndex,
+    selection: TechnicianSelectionResponse,
+    ticket: Optional[Ticket] = None,
+    reservations: Optional[AssignmentReservations] = None
+) -> Tuple[Optional[Technician], str]:
+    """Look the LLM's selection up in the index and reserve the technician for the ticket"""
+    selected_technician_id = selection.selected_technician_id
+    justification = selection.justification
+
+    selected_technician = index.get(selected_technician_id) if selected_technician_id is not None else None
+
+    if selected_technician:
+        logger.info(
+            f"Technician selected: {selected_technician.name} (ID: {selected_technician.id}) "
+            f"with justification: {justification}"
+        )
+        if reservations is not None:
+            reservations.reserve(selected_technician, ticket.id if ticket else None)
+    else:
+        logger.warning(f"LLM selected technician ID {selected_technician_id} not found in available technicians")
+
+    return selected_technician, justification
@@ -0,0 +1,282 @@
+"""
+Technician state store - In-memory technician roster bootstrapped once from the backend and
+then kept current by change events, delta pulls and locally computed skill updates, so
+assignments read fresh technician state without a network call
+"""
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional
+from pydantic import ValidationError
+from models.technician import Technician
+from services.backend_client import BackendClient
+from services.catalog_cache import CatalogEntry
+from services.metrics import timed
+from services.technician_index import TechnicianSkillIndex
+
+logger = logging.getLogger(__name__)
+
+
+def _parse_timestamp(value: Any) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+
+
+class TechnicianStateStore:
+    """
+    Live technician index. It is built from `/api/v1/technicians/all` on first use and then
+    updated in place:
+    - `apply_updates` for technician-updated events pushed by the backend (full records,
+      or partial ones such as `{"id": 3, "workload": 40}` for technicians already known)
+    - `pull_changes` for a delta pull of technicians changed since the last sync, run
+      every `sync_interval` seconds by the sync thread, with a full resync every
+      `full_sync_interval` seconds to pick up removals and changes deltas cannot see
+    - `apply_skill_updates` for skill scores computed by technician evaluation
+    Events carrying an `updatedAt` older than the state already held are ignored.
+    Exposed to the catalog cache as the "technicians" catalog via `get()` and `status()`.
+    """
+
+    def __init__(
+        self,
+        client: BackendClient,
+        sync_interval: float = 15.0,
+        full_sync_interval: float = 600.0,
+        skill_names: Optional[Callable[[], Mapping[int, str]]] = None
+    ):
+        self.client = client
+        self.sync_interval = sync_interval
+        self.full_sync_interval = full_sync_interval
+        # Skill id -> name lookup for skill updates naming skills a technician did not have yet
+        self.skill_names = skill_names
+
+        self._index: Optional[TechnicianSkillIndex] = None
+        self._version = 0
+        self._cursor: Optional[str] = None
+        self._updated_at: Dict[int, datetime] = {}
+        self._synced_at = 0.0
+        self._full_synced_at = 0.0
+        self._lock = threading.RLock()
+        self._bootstrap_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._stats = {
+            "events_applied": 0,
+            "events_stale": 0,
+            "events_unknown": 0,
+            "skill_updates_applied": 0,
+            "delta_pulls": 0,
+            "full_syncs": 0,
+            "sync_errors": 0,
+        }
+
+    @classmethod
+    def from_env(
+        cls,
+        client: BackendClient,
+        env: Mapping[str, str],
+        skill_names: Optional[Callable[[], Mapping[int, str]]] = None
+    ) -> "TechnicianStateStore":
+        return cls(
+            client=client,
+            sync_interval=float(env.get("TECHNICIAN_STATE_SYNC_INTERVAL", 15)),
+            full_sync_interval=float(env.get("TECHNICIAN_STATE_FULL_SYNC_INTERVAL", 600)),
+            skill_names=skill_names
+        )
+
+    # =====================
+    # READS
+    # =====================
+
+    @property
+    def index(self) -> TechnicianSkillIndex:
+        """The live index, bootstrapping it from the backend on first use"""
+        if self._index is None:
+            with self._bootstrap_lock:
+                if self._index is None:
+                    self.bootstrap()
+        return self._index
+
+    def get(self) -> CatalogEntry:
+        """The roster as a catalog entry, versioned by the number of changes applied"""
+        index = self.index
+        return CatalogEntry(value=index, version=f"state-{self._version}", etag=None, fetched_at=self._synced_at)
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "live": True,
+                "bootstrapped": self._index is not None,
+                "technicians": len(self._index) if self._index is not None else 0,
+                "version": self._version,
+                "cursor": self._cursor,
+                "seconds_since_sync": round(time.monotonic() - self._synced_at, 1) if self._synced_at else None,
+                "sync_thread_running": self.running,
+                **self._stats,
+            }
+
+    # =====================
+    # SYNCHRONIZATION
+    # =====================
+
+    def bootstrap(self) -> None:
+        """Replace the state with a full listing from the backend"""
+        with timed("technician_state.full_sync"):
+            fetched = self.client.get_technicians()
+        records = fetched.payload.get("data", {}).get("technicians", [])
+        index = TechnicianSkillIndex.from_payload(records)
+
+        with self._lock:
+            self._index = index
+            self._updated_at = {
+                record["id"]: stamp for record in records
+                if isinstance(record, dict) and (stamp := _parse_timestamp(record.get("updatedAt")))
+            }
+            # Without change timestamps from the backend, deltas are impossible and the
+            # sync thread falls back to full syncs
+            newest = max(self._updated_at.values(), default=None)
+            self._cursor = newest.isoformat() if newest else None
+            self._version += 1
+            self._synced_at = self._full_synced_at = time.monotonic()
+            self._stats["full_syncs"] += 1
+        logger.info(f"Technician state bootstrapped with {len(index)} technicians (cursor {self._cursor})")
+
+    def pull_changes(self) -> int:
+        """Apply technicians changed since the last sync; returns the number applied"""
+        if self._index is None or self._cursor is None:
+            self.bootstrap()
+            return len(self._index)
+
+        with timed("technician_state.delta_pull"):
+            data = self.client.get_technicians_changed(self._cursor)
+        applied = self.apply_updates(data.get("technicians", []))
+        with self._lock:
+            if data.get("syncedAt"):
+                self._cursor = data["syncedAt"]
+            self._synced_at = time.monotonic()
+            self._stats["delta_pulls"] += 1
+        return applied
+
+    def invalidate(self) -> None:
+        """Drop the state so the next read bootstraps it again"""
+        with self._lock:
+            self._index = None
+            self._cursor = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """Start the background thread running delta pulls and periodic full syncs"""
+        if self.running or self.sync_interval <= 0:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="technician-state-sync", daemon=True)
+        self._thread.start()
+        logger.info(f"Technician state sync every {self.sync_interval}s (full sync every {self.full_sync_interval}s)")
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.sync_interval):
+            try:
+                if time.monotonic() - self._full_synced_at >= self.full_sync_interval:
+                    self.bootstrap()
+                else:
+                    self.pull_changes()
+            except Exception as e:
+                self._stats["sync_errors"] += 1
+                logger.warning(f"Technician state sync failed, keeping current state: {e}")
+
+    # =====================
+    # UPDATES
+    # =====================
+
+    def apply_updates(self, records: Iterable[Dict[str, Any]], deleted_ids: Iterable[int] = ()) -> int:
+        """
+        Apply technician records (full or partial) and removals; returns the number of
+        changes applied. Records with `isActive` false (delta pulls return deactivated
+        technicians) remove the technician, as a full sync would. Partial records of unknown
+        technicians cannot be applied and are counted as unknown; the next full sync picks
+        those technicians up.
+        """
+        index = self.index
+        applied = 0
+        with self._lock, index.lock:
+            for record in records:
+                technician_id = record.get("id") if isinstance(record, dict) else None
+                if technician_id is None:
+                    self._stats["events_unknown"] += 1
+                    continue
+
+                stamp = _parse_timestamp(record.get("updatedAt"))
+                known = self._updated_at.get(technician_id)
+                if stamp is not None and known is not None and stamp < known:
+                    self._stats["events_stale"] += 1
+                    continue
+
+                if record.get("isActive") is False:
+                    if index.remove(technician_id):
+                        self._updated_at.pop(technician_id, None)
+                        applied += 1
+                    continue
+
+                current = index.get(technician_id)
+                try:
+                    merged = {**current.model_dump(), **record} if current is not None else record
+                    technician = Technician.model_validate(merged)
+                except ValidationError as e:
+                    logger.warning(f"Ignoring technician update for {technician_id}: {e.error_count()} invalid field(s)")
+                    self._stats["events_unknown"] += 1
+                    continue
+
+                index.upsert(technician)
+                if stamp is not None:
+                    self._updated_at[technician_id] = stamp
+                applied += 1
+
+            for technician_id in deleted_ids:
+                if index.remove(technician_id):
+                    self._updated_at.pop(technician_id, None)
+                    applied += 1
+
+            if applied:
+                self._version += 1
+            self._stats["events_applied"] += applied
+        return applied
+
+    def apply_skill_updates(self, technician_id: int, skills: List[Dict[str, Any]]) -> bool:
+        """
+        Apply skill scores computed by technician evaluation (`[{"id": skill_id, "score": 0-100}]`)
+        to a known technician; returns whether the technician was updated
+        """
+        index = self.index
+        with self._lock, index.lock:
+            current = index.get(technician_id)
+            if current is None:
+                return False
+
+            names = {ts.skill.id: ts.skill.name for ts in current.technicianSkills or []}
+            if any(skill.get("id") not in names for skill in skills) and self.skill_names is not None:
+                try:
+                    names = {**self.skill_names(), **names}
+                except Exception as e:
+                    logger.warning(f"Skill catalog unavailable for skill updates of technician {technician_id}: {e}")
+
+            technician_skills = [
+                {"score": int(round(min(max(float(skill["score"]), 0), 100))), "skill": {"id": skill["id"], "name": names[skill["id"]]}}
+                for skill in skills
+                if skill.get("id") in names and skill.get("score") is not None
+            ]
+            index.upsert(Technician.model_validate({**current.model_dump(), "technicianSkills": technician_skills}))
+            self._version += 1
+            self._stats["skill_updates_applied"] += 1
+        return True
@@ -0,0 +1,55 @@
+"""
+Shared fixtures - A controllable clock, technician records and tickets
+"""
+import pytest
+from models.technician import Technician
+from models.ticket import Ticket
+
+
+class FakeClock:
+    """Stands in for the `time` module of the service under test; only moves when advanced"""
+
+    def __init__(self, start: float = 1000.0):
+        self.now = start
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def time(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.advance(seconds)
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def _technician(technician_id: int, workload: int = 20, current_tickets: int = 2, **fields) -> Technician:
+    return Technician(
+        id=technician_id,
+        name=f"Technician {technician_id}",
+        email=f"technician{technician_id}@example.com",
+        workload=workload,
+        currentTickets=current_tickets,
+        **fields
+    )
+
+
+@pytest.fixture
+def make_technician():
+    return _technician
+
+
+def _ticket(subject: str, description: str = "", ticket_id: int = 1, **fields) -> Ticket:
+    return Ticket(id=ticket_id, subject=subject, description=description, **fields)
+
+
+@pytest.fixture
+def make_ticket():
+    return _ticket
@@ -0,0 +1,79 @@
+"""
+Assignment reservations - effective workloads, reconciliation against the roster and expiry
+"""
+import pytest
+from services import assignment_reservations
+from services.assignment_reservations import AssignmentReservations
+from services.technician_index import TechnicianSkillIndex
+
+
+@pytest.fixture
+def reservations(clock, monkeypatch):
+    monkeypatch.setattr(assignment_reservations, "time", clock)
+    return AssignmentReservations(ttl=60, workload_increment=10)
+
+
+def test_reserve_raises_effective_workload(reservations, make_technician):
+    technician = make_technician(1, workload=20, current_tickets=2)
+    reservations.reserve(technician, ticket_id=100)
+    reservations.reserve(technician, ticket_id=101)
+
+    [effective] = reservations.effective([technician])
+    assert effective.workload == 40
+    assert effective.currentTickets == 4
+    # The roster record itself is left untouched
+    assert technician.workload == 20
+
+
+def test_effective_index_is_a_copy(reservations, make_technician):
+    index = TechnicianSkillIndex([make_technician(1, workload=20), make_technician(2, workload=30)])
+    reservations.reserve(index.get(1), ticket_id=100)
+
+    effective = reservations.effective(index)
+    assert effective is not index
+    assert effective.get(1).workload == 30
+    assert effective.get(2).workload == 30
+    assert index.get(1).workload == 20
+
+
+def test_reservation_reconciles_when_current_tickets_catch_up(reservations, make_technician):
+    technician = make_technician(1, workload=20, current_tickets=2)
+    reservations.reserve(technician, ticket_id=100)
+    reservations.reserve(technician, ticket_id=101)
+
+    # The backend recorded the first assignment only
+    one_recorded = technician.model_copy(update={"currentTickets": 3, "workload": 30})
+    [effective] = reservations.effective([one_recorded])
+    assert effective.currentTickets == 4
+    assert effective.workload == 40
+    assert reservations.status()["reconciled"] == 1
+
+    both_recorded = technician.model_copy(update={"currentTickets": 4, "workload": 40})
+    assert reservations.effective([both_recorded]) == [both_recorded]
+    assert reservations.status()["active"] == 0
+    assert reservations.status()["reconciled"] == 2
+
+
+def test_reservation_expires_after_ttl(reservations, clock, make_technician):
+    technician = make_technician(1, workload=20)
+    reservations.reserve(technician, ticket_id=100)
+
+    clock.advance(59)
+    assert reservations.effective([technician])[0].workload == 30
+
+    clock.advance(2)
+    assert reservations.effective([technician])[0].workload == 20
+    status = reservations.status()
+    assert status["active"] == 0
+    assert status["expired"] == 1
+
+
+def test_reserving_a_ticket_again_moves_its_reservation(reservations, make_technician):
+    first, second = make_technician(1), make_technician(2)
+    reservations.reserve(first, ticket_id=100)
+    reservations.reserve(second, ticket_id=100)
+
+    effective = {t.id: t for t in reservations.effective([first, second])}
+    assert effective[1].workload == first.workload
+    assert effective[2].workload == second.workload + 10
+    assert reservations.status()["released"] == 1
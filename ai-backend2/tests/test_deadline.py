@@ -0,0 +1,153 @@
+"""
+Request deadlines - budgets, propagation to backend retries, and hedged LLM calls
+"""
+import asyncio
+import pytest
+import requests
+from langchain_core.messages import AIMessage
+from services import backend_client, deadline
+from services.backend_client import BackendClient
+from services.deadline import DeadlineExceeded, deadline_scope
+from services.llm_hedging import HedgePolicy
+from services.llm_scheduler import LLMScheduler, ScheduledLLM
+
+
+@pytest.fixture
+def frozen(clock, monkeypatch):
+    monkeypatch.setattr(deadline, "time", clock)
+    monkeypatch.setattr(backend_client, "time", clock)
+    return clock
+
+
+class FakeSession:
+    """Records each attempt's timeout and deadline header, answering with `outcome` after `seconds`"""
+
+    def __init__(self, clock, seconds, outcome):
+        self.clock = clock
+        self.seconds = seconds
+        self.outcome = outcome
+        self.attempts = []
+
+    def request(self, method, url, timeout=None, headers=None, **kwargs):
+        self.attempts.append((timeout, (headers or {}).get(deadline.DEADLINE_HEADER)))
+        self.clock.advance(self.seconds)
+        if isinstance(self.outcome, Exception):
+            raise self.outcome
+        return self.outcome
+
+
+class FakeResponse:
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+
+def make_client(session, backoff=0.0):
+    client = BackendClient("http://backend", connect_timeout=3.0, timeouts={"technician": 10.0}, backoff=backoff)
+    client.session = session
+    return client
+
+
+def test_nested_scope_keeps_the_earlier_deadline(frozen):
+    with deadline_scope(5):
+        with deadline_scope(30):
+            assert deadline.remaining() == 5
+        with deadline_scope(2):
+            assert deadline.budget(10) == 2
+            assert deadline.header_value() == "2000"
+    assert deadline.remaining() is None
+    assert deadline.budget(10) == 10
+
+
+def test_check_raises_once_the_deadline_passed(frozen):
+    with deadline_scope(1):
+        deadline.check()
+        frozen.advance(1)
+        with pytest.raises(DeadlineExceeded):
+            deadline.check()
+
+
+def test_each_retry_gets_the_budget_left(frozen):
+    session = FakeSession(frozen, 2, requests.exceptions.ReadTimeout("slow"))
+    with deadline_scope(5), pytest.raises(requests.exceptions.ReadTimeout):
+        make_client(session).request("GET", "/api/v1/technicians/1", "technician")
+
+    assert session.attempts == [((3.0, 5.0), "5000"), ((3.0, 3.0), "3000"), ((3.0, 1.0), "1000")]
+
+
+def test_no_retry_once_the_deadline_passed(frozen):
+    session = FakeSession(frozen, 3, requests.exceptions.ReadTimeout("slow"))
+    with deadline_scope(5), pytest.raises(DeadlineExceeded):
+        make_client(session).request("GET", "/api/v1/technicians/1", "technician")
+
+    assert len(session.attempts) == 2
+
+
+def test_backoff_ending_past_the_deadline_returns_the_last_response(frozen, monkeypatch):
+    monkeypatch.setattr(backend_client.random, "uniform", lambda low, high: high)
+    session = FakeSession(frozen, 1, FakeResponse(503))
+    with deadline_scope(5):
+        response = make_client(session, backoff=5.0).request("GET", "/api/v1/technicians/1", "technician")
+
+    assert response.status_code == 503
+    assert len(session.attempts) == 1
+    assert frozen.now == 1001.0
+
+
+def test_caller_timeout_is_kept_on_every_attempt(frozen):
+    session = FakeSession(frozen, 1, requests.exceptions.ReadTimeout("slow"))
+    with deadline_scope(30), pytest.raises(requests.exceptions.ReadTimeout):
+        make_client(session).request("GET", "/api/v1/technicians/1", "technician", timeout=(1.0, 2.0))
+
+    assert [timeout for timeout, _ in session.attempts] == [(1.0, 2.0)] * 3
+
+
+class SleepyModel:
+    def __init__(self, name, seconds):
+        self.name = name
+        self.seconds = seconds
+
+    async def ainvoke(self, prompt, **kwargs):
+        await asyncio.sleep(self.seconds)
+        return AIMessage(content=f"{self.name} answer")
+
+
+def hedged_llm(primary_seconds, fallback_seconds):
+    hedging = HedgePolicy(min_samples=5, min_delay=0.05)
+    for _ in range(5):
+        hedging.observe(0.05)
+    llm = ScheduledLLM(
+        SleepyModel("primary", primary_seconds), LLMScheduler(), hedging=hedging,
+        fallback_llm=SleepyModel("fallback", fallback_seconds)
+    )
+    return llm, hedging
+
+
+def test_hedge_policy_waits_for_samples_and_skips_other_lanes():
+    hedging = HedgePolicy(quantile=0.5, min_samples=3, min_delay=0.1, max_delay=1.0)
+    hedging.observe(0.2)
+    assert hedging.delay("interactive") is None
+
+    for seconds in (0.3, 5.0):
+        hedging.observe(seconds)
+    assert hedging.delay("interactive") == 0.3
+    assert hedging.delay("background") is None
+
+
+def test_slow_call_is_hedged_and_the_first_answer_wins():
+    llm, hedging = hedged_llm(primary_seconds=1.0, fallback_seconds=0.0)
+
+    response = asyncio.run(llm.ainvoke("ticket"))
+
+    assert response.content == "fallback answer"
+    assert hedging.status()["hedge_won"] == 1
+
+
+def test_no_hedge_when_the_deadline_ends_before_the_hedge_delay():
+    llm, hedging = hedged_llm(primary_seconds=0.0, fallback_seconds=0.0)
+
+    async def call():
+        with deadline_scope(0.04):
+            return await llm.ainvoke("ticket")
+
+    assert asyncio.run(call()).content == "primary answer"
+    assert hedging.status()["hedged"] == 0
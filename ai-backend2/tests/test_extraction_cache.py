@@ -0,0 +1,80 @@
+"""
+Skill extraction cache - exact and similarity tiers, expiry and catalog versioning
+"""
+import pytest
+from services import extraction_cache as cache_module
+from services.extraction_cache import SkillExtractionCache, catalog_fingerprint
+from services.skill_extraction import SkillExtractionResponse
+
+CATALOG = catalog_fingerprint(["VPN Troubleshooting", "Printer Setup"])
+DESCRIPTION = (
+    "Since this morning the VPN client on my laptop keeps dropping the connection every few minutes "
+    "while I am working from home and I cannot reach the file shares or the intranet at all"
+)
+
+
+@pytest.fixture
+def cache(clock, monkeypatch):
+    monkeypatch.setattr(cache_module, "time", clock)
+    return SkillExtractionCache(ttl=60, similarity_threshold=0.8)
+
+
+def _result(*skills: str) -> SkillExtractionResponse:
+    return SkillExtractionResponse(existing_skills=list(skills), new_skills=[])
+
+
+def test_exact_hit_ignores_case_and_punctuation(cache, make_ticket):
+    cache.put(make_ticket("VPN keeps dropping", DESCRIPTION), CATALOG, _result("VPN Troubleshooting"))
+
+    result, tier = cache.get(make_ticket("vpn keeps dropping!", DESCRIPTION.upper()), CATALOG)
+
+    assert tier == "exact"
+    assert result.existing_skills == ["VPN Troubleshooting"]
+
+
+def test_near_duplicate_ticket_is_a_similar_hit(cache, make_ticket):
+    cache.put(make_ticket("VPN keeps dropping", DESCRIPTION), CATALOG, _result("VPN Troubleshooting"))
+
+    result, tier = cache.get(make_ticket("VPN keeps dropping", DESCRIPTION + " thanks"), CATALOG)
+
+    assert tier == "similar"
+    assert result.existing_skills == ["VPN Troubleshooting"]
+
+
+def test_unrelated_ticket_misses(cache, make_ticket):
+    cache.put(make_ticket("VPN keeps dropping", DESCRIPTION), CATALOG, _result("VPN Troubleshooting"))
+
+    _, tier = cache.get(make_ticket("Printer jam", "The third floor printer shows a paper jam"), CATALOG)
+
+    assert tier == "miss"
+
+
+def test_new_catalog_version_misses(cache, make_ticket):
+    ticket = make_ticket("VPN keeps dropping", DESCRIPTION)
+    cache.put(ticket, CATALOG, _result("VPN Troubleshooting"))
+
+    _, tier = cache.get(ticket, catalog_fingerprint(["VPN Troubleshooting"]))
+
+    assert tier == "miss"
+
+
+def test_expired_entries_are_dropped_from_both_tiers(cache, clock, make_ticket):
+    cache.put(make_ticket("VPN keeps dropping", DESCRIPTION), CATALOG, _result("VPN Troubleshooting"))
+    clock.advance(61)
+
+    _, exact_tier = cache.get(make_ticket("VPN keeps dropping", DESCRIPTION), CATALOG)
+    cache.put(make_ticket("Printer jam", "Paper jam on the third floor"), CATALOG, _result("Printer Setup"))
+    _, similar_tier = cache.get(make_ticket("VPN keeps dropping", DESCRIPTION + " thanks"), CATALOG)
+
+    assert (exact_tier, similar_tier) == ("miss", "miss")
+    assert cache.stats()["entries"] == 1
+    assert len(set().union(*cache._buckets.values())) == 1
+
+
+def test_tickets_without_words_are_never_cached(cache, make_ticket):
+    cache.put(make_ticket("?????", "   "), CATALOG, _result("Password Reset"))
+
+    _, tier = cache.get(make_ticket("!!!!!", ""), CATALOG)
+
+    assert tier == "miss"
+    assert cache.stats()["entries"] == 0
@@ -0,0 +1,185 @@
+"""
+Job queue - retries with backoff, lease reclaim of jobs whose worker was lost, and idempotency
+"""
+import sqlite3
+import threading
+import time
+import pytest
+from services import job_queue
+from services.job_queue import JobQueue, JobWorkerPool, PermanentJobError, payload_idempotency_key
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return JobQueue(str(tmp_path / "jobs.sqlite3"), max_attempts=3, lease_seconds=60)
+
+
+def run_until_finished(queue, handlers, job_id, timeout=5.0):
+    pool = JobWorkerPool(queue, handlers, concurrency=1, poll_interval=0.01, retry_backoff=0)
+    pool.start()
+    try:
+        stop_by = time.monotonic() + timeout
+        while time.monotonic() < stop_by:
+            job = queue.get(job_id)
+            if job.status in ("succeeded", "failed"):
+                return job
+            time.sleep(0.01)
+        raise AssertionError(f"Job {job_id} did not finish: {queue.get(job_id)}")
+    finally:
+        pool.stop(timeout)
+
+
+def test_failed_attempt_is_retried(queue):
+    calls = []
+
+    def flaky(payload):
+        calls.append(payload)
+        if len(calls) < 2:
+            raise RuntimeError("backend unavailable")
+        return {"ok": payload["n"]}
+
+    job, created = queue.submit("work", {"n": 1})
+    finished = run_until_finished(queue, {"work": flaky}, job.id)
+    assert created
+    assert finished.status == "succeeded"
+    assert finished.attempts == 2
+    assert finished.result == {"ok": 1}
+
+
+def test_job_fails_after_max_attempts(queue):
+    def broken(payload):
+        raise RuntimeError("still broken")
+
+    job, _ = queue.submit("work", {})
+    finished = run_until_finished(queue, {"work": broken}, job.id)
+    assert finished.status == "failed"
+    assert finished.attempts == 3
+    assert "still broken" in finished.error
+
+
+def test_permanent_error_is_not_retried(queue):
+    def invalid(payload):
+        raise PermanentJobError("invalid ticket")
+
+    job, _ = queue.submit("work", {})
+    finished = run_until_finished(queue, {"work": invalid}, job.id)
+    assert finished.status == "failed"
+    assert finished.attempts == 1
+
+
+def test_expired_lease_is_reclaimed(queue, clock, monkeypatch):
+    monkeypatch.setattr(job_queue, "time", clock)
+    job, _ = queue.submit("work", {})
+    assert queue.claim().id == job.id
+    assert queue.claim() is None
+
+    clock.advance(61)
+    reclaimed = queue.claim()
+    assert reclaimed.id == job.id
+    assert reclaimed.attempts == 2
+
+
+def test_expired_lease_on_last_attempt_fails_the_job(queue, clock, monkeypatch):
+    monkeypatch.setattr(job_queue, "time", clock)
+    job, _ = queue.submit("work", {})
+    for _ in range(3):
+        assert queue.claim().id == job.id
+        clock.advance(61)
+
+    assert queue.claim() is None
+    lost = queue.get(job.id)
+    assert lost.status == "failed"
+    assert "Lease expired" in lost.error
+
+
+def test_concurrent_claims_hand_out_a_job_once(queue):
+    for n in range(20):
+        queue.submit("work", {"n": n})
+    claimed, lock = [], threading.Lock()
+
+    def claim_all():
+        while (job := queue.claim()) is not None:
+            with lock:
+                claimed.append(job.id)
+
+    threads = [threading.Thread(target=claim_all) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(claimed) == len(set(claimed)) == 20
+
+
+def test_idempotency_key_follows_the_payload(queue):
+    first = payload_idempotency_key("technician_evaluation", 7, {"ticket": {"id": 7, "feedback": "slow"}})
+    same = payload_idempotency_key("technician_evaluation", 7, {"ticket": {"feedback": "slow", "id": 7}})
+    changed = payload_idempotency_key("technician_evaluation", 7, {"ticket": {"id": 7, "feedback": "great"}})
+    assert first == same != changed
+
+    job, _ = queue.submit("technician_evaluation", {"n": 1}, first)
+    queue.complete(queue.claim(), {"ok": True})
+    duplicate, created = queue.submit("technician_evaluation", {"n": 1}, same)
+    assert not created and duplicate.id == job.id
+    _, created = queue.submit("technician_evaluation", {"n": 2}, changed)
+    assert created
+
+
+def test_only_the_current_lease_owner_records_the_outcome(queue, clock, monkeypatch):
+    monkeypatch.setattr(job_queue, "time", clock)
+    queue.submit("work", {})
+    stale = queue.claim()
+    clock.advance(61)
+    current = queue.claim()
+
+    assert not queue.complete(stale, {"from": "stale"})
+    assert not queue.fail(stale, "late failure")
+    assert queue.complete(current, {"from": "current"})
+    assert queue.get(current.id).result == {"from": "current"}
+
+
+def test_unserializable_result_fails_without_retry(queue):
+    job, _ = queue.submit("work", {})
+    finished = run_until_finished(queue, {"work": lambda payload: {"at": object()}}, job.id)
+    assert finished.status == "failed"
+    assert finished.attempts == 1
+    assert "not JSON serializable" in finished.error
+
+
+def test_queue_file_from_before_lease_owners_is_migrated(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    legacy = sqlite3.connect(path)
+    legacy.executescript(
+        "CREATE TABLE jobs (id TEXT PRIMARY KEY, kind TEXT NOT NULL, idempotency_key TEXT UNIQUE, "
+        "payload TEXT NOT NULL, status TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0, "
+        "max_attempts INTEGER NOT NULL, result TEXT, error TEXT, callback_url TEXT, created_at REAL NOT NULL, "
+        "updated_at REAL NOT NULL, available_at REAL NOT NULL, lease_until REAL);"
+    )
+    legacy.close()
+
+    queue = JobQueue(path)
+    job, _ = queue.submit("work", {})
+    assert queue.complete(queue.claim(), {"ok": True})
+    assert queue.get(job.id).status == "succeeded"
+
+
+def test_stop_waits_at_most_its_timeout_in_all(queue):
+    release, started = threading.Event(), threading.Semaphore(0)
+
+    def blocking(payload):
+        started.release()
+        release.wait()
+        return {}
+
+    pool = JobWorkerPool(queue, {"work": blocking}, concurrency=3, poll_interval=0.01)
+    for n in range(3):
+        queue.submit("work", {"n": n})
+    pool.start()
+    try:
+        for _ in range(3):
+            assert started.acquire(timeout=5)
+        began = time.monotonic()
+        pool.stop(0.3)
+        assert time.monotonic() - began < 0.6
+    finally:
+        release.set()
+        pool.stop(5)
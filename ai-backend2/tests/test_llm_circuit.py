@@ -0,0 +1,76 @@
+"""
+LLM circuit breaker - opening on failures, half-open probing and recovery
+"""
+import pytest
+from services import llm_circuit
+from services.llm_circuit import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, LLMCircuitOpen
+
+
+@pytest.fixture
+def breaker(clock, monkeypatch):
+    monkeypatch.setattr(llm_circuit, "time", clock)
+    return CircuitBreaker(failure_rate=0.5, min_calls=4, window=60, slow_call_seconds=5, open_seconds=30)
+
+
+def fail_calls(breaker, count, seconds=1.0, ok=False):
+    for _ in range(count):
+        assert breaker.before_call() is False
+        breaker.record(ok, seconds)
+
+
+def test_stays_closed_below_min_calls(breaker):
+    fail_calls(breaker, 3)
+    assert breaker.state == CLOSED
+
+
+def test_opens_on_failure_rate_and_refuses_calls(breaker):
+    fail_calls(breaker, 2, ok=True)
+    fail_calls(breaker, 2)
+    assert breaker.state == OPEN
+    assert breaker.is_open
+    with pytest.raises(LLMCircuitOpen):
+        breaker.before_call()
+    assert breaker.status()["rejected"] == 1
+
+
+def test_slow_calls_count_as_failures(breaker):
+    fail_calls(breaker, 4, seconds=6.0, ok=True)
+    assert breaker.state == OPEN
+
+
+def test_open_half_open_closed(breaker, clock):
+    fail_calls(breaker, 4)
+    clock.advance(30)
+    assert breaker.state == HALF_OPEN
+
+    # One probe at a time; other calls are still refused
+    assert breaker.before_call() is True
+    assert breaker.is_open
+    with pytest.raises(LLMCircuitOpen):
+        breaker.before_call()
+
+    breaker.record(True, 1.0, probe=True)
+    assert breaker.state == CLOSED
+    assert breaker.before_call() is False
+    assert breaker.status()["closed"] == 1
+
+
+def test_failed_probe_opens_again(breaker, clock):
+    fail_calls(breaker, 4)
+    clock.advance(30)
+    assert breaker.before_call() is True
+    breaker.record(False, 1.0, probe=True)
+    assert breaker.state == OPEN
+    assert breaker.status()["opened"] == 2
+
+    clock.advance(29)
+    assert breaker.state == OPEN
+
+
+def test_released_probe_frees_its_slot(breaker, clock):
+    fail_calls(breaker, 4)
+    clock.advance(30)
+    assert breaker.before_call() is True
+    breaker.release_probe()
+    assert breaker.state == HALF_OPEN
+    assert breaker.before_call() is True
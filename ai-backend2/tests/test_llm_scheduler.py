@@ -0,0 +1,123 @@
+"""
+LLM scheduler - concurrency caps, token buckets, permit accounting and callers that give up
+"""
+import asyncio
+import threading
+import pytest
+from services import llm_scheduler
+from services.llm_scheduler import LLMQueueTimeout, LLMScheduler, ScheduledLLM
+from services.metrics import LLM_CALLS
+
+
+class FakeModel:
+    """Chat model whose calls block until `answer` is set"""
+
+    def __init__(self):
+        self.answer = threading.Event()
+
+    async def ainvoke(self, prompt, **kwargs):
+        await asyncio.to_thread(self.answer.wait)
+        return f"answer to {prompt}"
+
+    def stream(self, prompt, **kwargs):
+        yield from ["first ", "second ", "third"]
+
+
+@pytest.fixture
+def frozen(clock, monkeypatch):
+    monkeypatch.setattr(llm_scheduler, "time", clock)
+    return clock
+
+
+def test_concurrency_cap_until_release():
+    scheduler = LLMScheduler(max_concurrency=2)
+    permits = [scheduler.acquire("interactive", 10) for _ in range(2)]
+    with pytest.raises(LLMQueueTimeout):
+        scheduler.acquire("interactive", 10, timeout=0)
+
+    scheduler.release(permits.pop())
+    permits.append(scheduler.acquire("interactive", 10, timeout=0))
+    assert scheduler.stats()["in_flight"] == 2
+
+
+def test_background_lane_keeps_headroom_for_interactive_calls():
+    scheduler = LLMScheduler(max_concurrency=4, background_share=0.5)
+    for _ in range(2):
+        scheduler.acquire("background", 10)
+    with pytest.raises(LLMQueueTimeout):
+        scheduler.acquire("background", 10, timeout=0)
+    scheduler.acquire("interactive", 10, timeout=0)
+    assert scheduler.stats()["lanes"]["background"]["timeouts"] == 1
+
+
+def test_request_bucket_refills_over_time(frozen):
+    scheduler = LLMScheduler(requests_per_minute=2, max_concurrency=10)
+    for _ in range(2):
+        scheduler.release(scheduler.acquire("interactive", 10))
+    with pytest.raises(LLMQueueTimeout):
+        scheduler.acquire("interactive", 10, timeout=0)
+
+    frozen.advance(30)
+    scheduler.acquire("interactive", 10, timeout=0)
+
+
+def test_release_settles_the_token_estimate(frozen):
+    scheduler = LLMScheduler(tokens_per_minute=1000, max_concurrency=10)
+    scheduler.release(scheduler.acquire("interactive", 100), used_tokens=600)
+
+    with pytest.raises(LLMQueueTimeout):
+        scheduler.acquire("interactive", 500, timeout=0)
+    scheduler.acquire("interactive", 400, timeout=0)
+
+
+def test_rate_limit_pauses_admissions(frozen):
+    scheduler = LLMScheduler(max_concurrency=10, rate_limit_cooldown=5)
+    scheduler.release(scheduler.acquire("interactive", 10), rate_limited=True)
+    with pytest.raises(LLMQueueTimeout):
+        scheduler.acquire("interactive", 10, timeout=0)
+
+    frozen.advance(5)
+    scheduler.acquire("interactive", 10, timeout=0)
+    assert scheduler.stats()["rate_limited"] == 1
+
+
+def test_caller_that_gives_up_while_queued_does_not_leak_its_permit():
+    scheduler = LLMScheduler(max_concurrency=1)
+    model = FakeModel()
+    llm = ScheduledLLM(model, scheduler)
+    held = scheduler.acquire("interactive", 10)
+
+    async def give_up():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(llm.ainvoke("ticket"), 0.05)
+
+    # Closed with the admission still waiting, like the per-request loop of an async view
+    loop = asyncio.new_event_loop()
+    # ("Task was destroyed but it is pending" is expected for the abandoned admission)
+    loop.set_exception_handler(lambda loop, context: None)
+    loop.run_until_complete(give_up())
+    loop.close()
+
+    # Admitted on its worker thread after the caller and its loop are gone: handed straight back
+    scheduler.release(held)
+    assert scheduler.drain(2.0)
+    assert scheduler.stats()["in_flight"] == 0
+
+    model.answer.set()
+    assert asyncio.run(llm.ainvoke("ticket")) == "answer to ticket"
+    assert scheduler.stats()["in_flight"] == 0
+
+
+def test_stream_closed_mid_way_releases_its_permit_as_cancelled():
+    scheduler = LLMScheduler(max_concurrency=1)
+    llm = ScheduledLLM(FakeModel(), scheduler, lane="critical")
+    cancelled = LLM_CALLS._values.get(("critical", "cancelled"), 0)
+    ok = LLM_CALLS._values.get(("critical", "ok"), 0)
+
+    stream = llm.stream("ticket")
+    assert next(stream) == "first "
+    stream.close()
+
+    assert scheduler.stats()["in_flight"] == 0
+    assert LLM_CALLS._values.get(("critical", "cancelled"), 0) == cancelled + 1
+    assert LLM_CALLS._values.get(("critical", "ok"), 0) == ok
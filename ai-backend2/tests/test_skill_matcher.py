@@ -0,0 +1,61 @@
+"""
+Skill matcher - local ranking of catalog skills and the candidates offered to the extraction LLM
+"""
+import pytest
+from models.skill import Skill
+from services.skill_matcher import SkillMatcher, tokenize
+
+CATALOG = [
+    ("VPN Troubleshooting", "Networking", "Diagnose VPN tunnels and client connection failures"),
+    ("DNS Configuration", "Networking", "Zones, records and resolvers"),
+    ("Wi-Fi Troubleshooting", "Networking", "Wireless access points and signal problems"),
+    ("Firewall Configuration", "Networking", "Rules, NAT and port forwarding"),
+    ("Outlook Troubleshooting", "Email", "Mail client profiles, sync and calendars"),
+    ("Exchange Administration", "Email", "Mailboxes, transport rules and retention"),
+    ("Password Reset", "Accounts", "Locked accounts and credential resets"),
+    ("Printer Setup", "Hardware", "Drivers, queues and network printers"),
+]
+
+
+@pytest.fixture
+def matcher():
+    return SkillMatcher([Skill(name=name, category=category, description=description) for name, category, description in CATALOG])
+
+
+def test_tokenize_drops_stopwords_and_plural_s():
+    assert tokenize("The printers are NOT working for us") == ["printer", "working"]
+
+
+def test_verbatim_skill_name_ranks_first(matcher, make_ticket):
+    ticket = make_ticket("VPN troubleshooting needed", "Cannot connect to the VPN from home since this morning")
+    ranked = matcher.top_skills(ticket, 3)
+    assert ranked[0][0].name == "VPN Troubleshooting"
+    assert [score for _, score in ranked] == sorted((score for _, score in ranked), reverse=True)
+
+
+def test_top_skills_only_returns_matches(matcher, make_ticket):
+    ranked = matcher.top_skills(make_ticket("Printer jammed", "The office printer shows a paper jam"), 5)
+    assert [skill.name for skill, _ in ranked] == ["Printer Setup"]
+
+
+def test_candidates_are_padded_to_top_n(matcher, make_ticket):
+    ticket = make_ticket("VPN keeps dropping", "VPN disconnects every few minutes")
+    candidates = matcher.candidate_names(ticket, 4)
+
+    assert len(candidates) == 4
+    assert candidates[0] == "VPN Troubleshooting"
+    assert len(set(candidates)) == 4
+    # Padding prefers the matched skills' category
+    assert set(candidates[1:]) <= {"DNS Configuration", "Wi-Fi Troubleshooting", "Firewall Configuration"}
+
+
+def test_candidates_fall_back_to_whole_catalog(matcher, make_ticket):
+    assert matcher.candidate_names(make_ticket("Something odd happened", "Nobody knows what"), 3) == matcher.names
+    assert matcher.candidate_names(make_ticket("VPN keeps dropping"), 0) == matcher.names
+    assert matcher.candidate_names(make_ticket("VPN keeps dropping"), len(CATALOG)) == matcher.names
+
+
+def test_extract_keeps_best_match_below_threshold(matcher, make_ticket):
+    extraction = matcher.extract(make_ticket("Calendar sync issue", "Meetings missing"), threshold=0.99)
+    assert extraction.existing_skills == ["Outlook Troubleshooting"]
+    assert extraction.new_skills == []
@@ -0,0 +1,125 @@
+"""
+Structured output - JSON repair, response schemas, and the single re-ask of an invalid answer
+"""
+from enum import Enum
+from typing import List, Optional
+import pytest
+from langchain_core.messages import AIMessage
+from pydantic import BaseModel
+from services.structured_output import (
+    StructuredOutputError,
+    generation_kwargs,
+    invoke_structured,
+    load_json,
+    response_schema,
+)
+
+
+class Urgency(str, Enum):
+    low = "low"
+    high = "high"
+
+
+class Reason(BaseModel):
+    text: str
+
+
+class Choice(BaseModel):
+    technician_id: int
+    urgency: Urgency
+    reasons: List[Reason]
+    note: Optional[str] = None
+
+
+class ScriptedLLM:
+    """Answers each call with the next scripted content and keeps the prompts it was sent"""
+
+    def __init__(self, *answers):
+        self.answers = list(answers)
+        self.prompts = []
+        self.kwargs = []
+
+    def invoke(self, prompt, **kwargs):
+        self.prompts.append(prompt)
+        self.kwargs.append(kwargs)
+        return AIMessage(content=self.answers.pop(0))
+
+
+VALID = '{"technician_id": 3, "urgency": "high", "reasons": [{"text": "knows VPN"}]}'
+
+
+@pytest.mark.parametrize("content", [
+    VALID,
+    f"```json\n{VALID}\n```",
+    f"Sure! Here is the answer:\n{VALID}\nHope this helps.",
+    '{"technician_id": 3, "urgency": "high", "reasons": [{"text": "knows VPN"},],}',
+    VALID.replace('"knows VPN"', "“knows VPN”"),
+])
+def test_load_json_repairs_common_breakages(content):
+    assert load_json(content)["reasons"] == [{"text": "knows VPN"}]
+
+
+def test_load_json_rejects_what_it_cannot_repair():
+    with pytest.raises(ValueError):
+        load_json("I could not find a suitable technician")
+
+
+def test_response_schema_inlines_refs_and_marks_optional_fields():
+    schema = response_schema(Choice)
+
+    assert schema["type_"] == "OBJECT"
+    assert schema["required"] == ["technician_id", "urgency", "reasons"]
+    assert schema["properties"]["urgency"] == {"type_": "STRING", "format_": "enum", "enum": ["low", "high"]}
+    assert schema["properties"]["reasons"]["items"]["properties"] == {"text": {"type_": "STRING"}}
+    assert schema["properties"]["note"] == {"type_": "STRING", "nullable": True}
+
+
+def test_native_schema_can_be_switched_off(monkeypatch):
+    assert generation_kwargs(Choice)["generation_config"]["response_mime_type"] == "application/json"
+    monkeypatch.setenv("STRUCTURED_OUTPUT_NATIVE", "false")
+    assert generation_kwargs(Choice) == {}
+
+
+def test_valid_answer_needs_one_call():
+    llm = ScriptedLLM(VALID)
+
+    choice = invoke_structured(llm, "Pick a technician", Choice, "test")
+
+    assert choice.technician_id == 3 and choice.urgency == Urgency.high
+    assert len(llm.prompts) == 1
+    assert llm.kwargs[0] == generation_kwargs(Choice)
+
+
+def test_invalid_answer_is_reasked_once_with_the_error():
+    llm = ScriptedLLM('{"technician_id": "three", "urgency": "high", "reasons": []}', VALID)
+
+    choice = invoke_structured(llm, "Pick a technician", Choice, "test")
+
+    assert choice.technician_id == 3
+    assert len(llm.prompts) == 2
+    assert "technician_id" in llm.prompts[1] and "Pick a technician" in llm.prompts[1]
+
+
+def test_normalizer_maps_alternate_shapes_before_validation():
+    llm = ScriptedLLM('{"selection": ' + VALID + "}")
+
+    choice = invoke_structured(llm, "Pick a technician", Choice, "test", normalize=lambda data: data.get("selection", data))
+
+    assert choice.technician_id == 3
+
+
+def test_second_invalid_answer_fails():
+    llm = ScriptedLLM("no idea", '{"technician_id": 3}')
+
+    with pytest.raises(StructuredOutputError):
+        invoke_structured(llm, "Pick a technician", Choice, "test")
+    assert len(llm.prompts) == 2
+
+
+def test_no_reask_when_disabled(monkeypatch):
+    monkeypatch.setenv("STRUCTURED_OUTPUT_REASK", "false")
+    llm = ScriptedLLM("[1, 2, 3]")
+
+    with pytest.raises(StructuredOutputError, match="JSON list"):
+        invoke_structured(llm, "Pick a technician", Choice, "test")
+    assert len(llm.prompts) == 1
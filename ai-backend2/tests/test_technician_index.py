@@ -0,0 +1,97 @@
+"""
+Technician skill index - score matrix, incremental updates, and ranking under the assignment rules
+"""
+import pytest
+from models.skill import Skill
+from models.technician import AvailabilityStatus, SkillLevel
+from services.technician_index import TechnicianSkillIndex
+from services.technician_scoring import RULE_CRITICAL, RULE_STANDARD, RULE_TRAINING, rank_technicians
+
+
+def skills(**scores):
+    """technicianSkills payload from skill_name=score pairs (underscores become spaces)"""
+    return [
+        {"score": score, "skill": {"id": n, "name": name.replace("_", " ")}}
+        for n, (name, score) in enumerate(scores.items(), start=1)
+    ]
+
+
+def required(*names):
+    return [Skill(name=name) for name in names]
+
+
+@pytest.fixture
+def roster(make_technician):
+    return [
+        make_technician(1, workload=60, technicianLevel=SkillLevel.EXPERT, technicianSkills=skills(VPN=90, DNS=80)),
+        make_technician(2, workload=10, technicianLevel=SkillLevel.MID, technicianSkills=skills(VPN=50)),
+        make_technician(3, workload=20, technicianLevel=SkillLevel.SENIOR, technicianSkills=skills(VPN=70),
+                        availabilityStatus=AvailabilityStatus.BUSY),
+        make_technician(4, workload=0, technicianLevel=SkillLevel.JUNIOR, technicianSkills=skills(Printers=90)),
+        make_technician(5, workload=0, isActive=False, technicianSkills=skills(VPN=100, DNS=100)),
+    ]
+
+
+def test_skill_match_and_suitability_follow_the_scoring_rules(make_technician):
+    index = TechnicianSkillIndex([make_technician(1, workload=30, technicianSkills=skills(VPN=80, DNS=60))])
+    row = index.row_of(1)
+
+    # (2 matching / 3 required) * average matching score 0.7
+    assert index.skill_match(required("vpn", "DNS", "Outlook"))[row] == pytest.approx(1.4 / 3)
+    assert index.suitability(required("VPN", "DNS", "Outlook"))[row] == pytest.approx(0.6 * 1.4 / 3 + 0.4 * 0.7)
+    assert index.matched_skill_names(index.get(1), required("dns", "Outlook")) == ["DNS"]
+
+
+def test_top_k_ranks_available_technicians_by_suitability(roster, make_technician):
+    index = TechnicianSkillIndex(roster + [make_technician(6, workload=10, technicianSkills=skills(VPN=50))])
+
+    ranked = [(technician.id, round(score, 3)) for technician, score in index.top_k(required("VPN"), 3)]
+
+    # 2 and 6 tie, so the lower id comes first; 3 is busy and 5 inactive
+    assert ranked == [(1, 0.7), (2, 0.66), (6, 0.66)]
+    assert [t.id for t, _ in index.top_k(required("VPN"), 2, exclude_unavailable=False)] == [5, 3]
+
+
+def test_updates_replace_rows_and_recycle_removed_ones(make_technician):
+    index = TechnicianSkillIndex(make_technician(n, technicianSkills=skills(**{f"skill_{n}": 50})) for n in range(1, 41))
+    assert len(index) == 40 and len(index.skill_names) == 40
+
+    index.upsert(make_technician(7, workload=90, technicianSkills=skills(skill_1=100)))
+    assert index.skill_match(required("skill 7"))[index.row_of(7)] == 0
+    assert index.skill_match(required("skill 1"))[index.row_of(7)] == 1.0
+
+    row = index.row_of(3)
+    assert index.remove(3) and 3 not in index
+    index.upsert(make_technician(99))
+    assert index.row_of(99) == row
+
+
+def test_copy_is_independent(roster):
+    index = TechnicianSkillIndex(roster)
+    clone = index.copy()
+    clone.adjust_workload(2, 50, ticket_delta=1)
+
+    assert clone.get(2).workload == 60 and clone.get(2).currentTickets == 3
+    assert index.get(2).workload == 10 and index.get(2).currentTickets == 2
+
+
+def test_standard_rule_prefers_available_technicians(roster, make_ticket):
+    rule, ranked = rank_technicians(make_ticket("VPN drops", priority="normal"), roster, required("VPN"))
+
+    assert rule == RULE_STANDARD
+    assert [s.technician.id for s in ranked] == [1, 2, 4]
+
+
+def test_critical_rule_picks_the_least_loaded_experienced_specialist(roster, make_ticket):
+    rule, ranked = rank_technicians(make_ticket("VPN down", priority="critical"), roster, required("VPN"))
+
+    # Availability is ignored (3 is busy), inactive technicians never qualify
+    assert rule == RULE_CRITICAL
+    assert [s.technician.id for s in ranked] == [3, 1]
+
+
+def test_training_rule_prefers_qualified_junior_and_mid_technicians(roster, make_ticket):
+    rule, ranked = rank_technicians(make_ticket("VPN slow", priority="low"), roster, required("VPN"))
+
+    assert rule == RULE_TRAINING
+    assert [s.technician.id for s in ranked] == [2]
@@ -6,8 +6,19 @@ import { NextRequest, NextResponse } from "next/server";
 
 export async function GET(req: NextRequest) {
   try {
+    // ?since=<ISO timestamp> returns only technicians changed after it (deactivated ones included)
+    const since = req.nextUrl.searchParams.get("since");
+    const sinceDate = since ? new Date(since) : null;
+    if (sinceDate && isNaN(sinceDate.getTime())) {
+        return NextResponse.json(
+            { success: false, message: "Invalid 'since' timestamp" },
+            { status: 400 }
+        )
+    }
+    const syncedAt = new Date();
+
     const technicians = await prisma.technician.findMany({
-        where: { isActive: true },
+        where: sinceDate ? { updatedAt: { gt: sinceDate } } : { isActive: true },
       select: {
         id: true,
         name: true,
@@ -31,11 +42,12 @@ export async function GET(req: NextRequest) {
         },
         technicianLevel: true,
         availabilityStatus: true,
-        experience: true
+        experience: true,
+        updatedAt: true
       },
     });
 
-    if (technicians.length === 0) {
+    if (!sinceDate && technicians.length === 0) {
         return NextResponse.json(
             { success: false, message: "No technicians found" },
             { status: 404 }
@@ -47,6 +59,8 @@ export async function GET(req: NextRequest) {
         data: {
             technicians:technicians,
             total: technicians.length,
+            // Cursor for the next delta pull; left out of full listings so their content stays cacheable
+            ...(sinceDate ? { syncedAt: syncedAt.toISOString() } : {}),
         }
     })
   }catch (error:any){